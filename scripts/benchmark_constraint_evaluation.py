@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+制約評価ベンチマーク
+
+全検出パターンを一つの正規表現に結合した単一パス走査と、
+ConstraintEvaluator（パターンごとの走査）を 1KB〜100KB の提案変更（差分を含む）で比較する
+
+使い方:
+    python scripts/benchmark_constraint_evaluation.py [--repeat 50]
+"""
+
+import argparse
+import re
+import sys
+import timeit
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.corethink_mcp.constraint_composer import ConstraintComposer
+from src.corethink_mcp.constraint_evaluator import TRIGGER_FLAGS, ConstraintEvaluator
+from src.corethink_mcp.constraint_index import ConstraintIndex
+
+CONSTRAINTS_DIR = project_root / "src" / "corethink_mcp" / "constraints"
+
+CHANGE_CHUNK = '''\
+diff --git a/src/service/lending.py b/src/service/lending.py
+@@ -10,12 +10,14 @@ class LendingService:
+-    def score(self, application):
++    def score(self, application, model=None):
++        """融資申込のスコアを算出する"""
+         features = self._extract(application)
+-        try:
+-            return self.model.predict(features)
+-        except ModelError:
+-            return None
++        print("debug", features)
++        return (model or self.model).predict(features)
++
++API_KEY = "sk-test-0123456789"
+ 公開APIのレスポンス形式は変更しない。ログはloggingモジュールで出力する。
+'''
+
+
+def build_combined(triggers: list[str]) -> "re.Pattern[str]":
+    """全パターンをゼロ幅先読みの選択に結合（重なった一致も取りこぼさない単一パス走査）"""
+    return re.compile(
+        "|".join(f"(?=(?P<t{number}>{trigger}))" for number, trigger in enumerate(triggers)),
+        TRIGGER_FLAGS,
+    )
+
+
+def combined_evaluate(combined: "re.Pattern[str]", patterns: list["re.Pattern[str]"], text: str) -> set[tuple[int, int]]:
+    """結合正規表現による単一パス走査（同じ位置で一致する後続パターンはその位置で照合）"""
+    found = set()
+    last_end = [-1] * len(patterns)
+    for match in combined.finditer(text):
+        position = match.start()
+        first = int(match.lastgroup[1:])
+        candidates = [(first, match.end(match.lastgroup))]
+        for number in range(first + 1, len(patterns)):
+            other = patterns[number].match(text, position)
+            if other:
+                candidates.append((number, other.end()))
+        for number, end in candidates:
+            if end > position >= last_end[number]:
+                last_end[number] = end
+                found.add((number, position))
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="制約評価ベンチマーク")
+    parser.add_argument("--repeat", type=int, default=50, help="各計測の繰り返し回数")
+    args = parser.parse_args()
+
+    index = ConstraintIndex(CONSTRAINTS_DIR)
+    composed = ConstraintComposer(index).compose(index.snapshot().domains())
+    evaluator = ConstraintEvaluator(composed.rules)
+
+    triggers = list(dict.fromkeys(trigger for rule in composed.rules for trigger in rule.triggers))
+    patterns = [re.compile(trigger, TRIGGER_FLAGS) for trigger in triggers]
+    combined = build_combined(triggers)
+
+    build_time = timeit.timeit(lambda: ConstraintEvaluator(composed.rules), number=20) / 20
+    print(f"ルール数: {len(composed.rules)}, 検出パターン数: {evaluator.pattern_count}")
+    print(f"評価器構築: {build_time * 1000:.2f}ms")
+    print()
+    print(f"{'サイズ':>8}{'結合単一パス(ms)':>18}{'評価器(ms)':>12}{'違反':>6}{'注意':>6}{'一致数':>8}")
+
+    unit = len(CHANGE_CHUNK.encode("utf-8"))
+    for size_kb in (1, 10, 100):
+        text = CHANGE_CHUNK * max(1, size_kb * 1024 // unit)
+
+        # 一致数が一致することを確認（同一パターンを共有するルールは1回として数える）
+        result = evaluator.evaluate(text)
+        expected = len(combined_evaluate(combined, patterns, text))
+        actual = sum(1 for pattern in patterns for match in pattern.finditer(text) if match.end() > match.start())
+        if expected != actual:
+            raise SystemExit(f"評価結果不一致 ({size_kb}KB): {expected} != {actual}")
+
+        combined_time = timeit.timeit(lambda: combined_evaluate(combined, patterns, text), number=args.repeat) / args.repeat
+        evaluator_time = timeit.timeit(lambda: evaluator.evaluate(text), number=args.repeat) / args.repeat
+        print(
+            f"{f'{size_kb}KB':>8}{combined_time * 1000:>18.3f}{evaluator_time * 1000:>12.3f}"
+            f"{len(result.violations):>6}{len(result.warnings):>6}{actual:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+分野検出ベンチマーク
+
+従来の「分野 × キーワード × 部分文字列検索」方式と、全キーワードの出現を列挙する
+3方式（str.find・単一の選択正規表現・純Python の Aho-Corasick）、
+コンパイル済み検出器 DomainMatcher を数KB〜数十KBの日本語・英語入力で比較する
+
+使い方:
+    python scripts/benchmark_domain_detection.py [--repeat 200]
+"""
+
+import argparse
+import re
+import sys
+import timeit
+from collections import deque
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.corethink_mcp.constraint_index import ConstraintIndex
+from src.corethink_mcp.domain_detector import DomainMatcher
+
+CONSTRAINTS_DIR = project_root / "src" / "corethink_mcp" / "constraints"
+
+JAPANESE_PARAGRAPH = (
+    "新しい融資審査システムでは、患者の診断履歴を参照せずに信用リスクを評価する必要がある。"
+    "クラウド上のKubernetesクラスタへデプロイし、機械学習モデルによる予測結果を監査ログに記録する。"
+    "契約条項の変更は法務部門の確認を経てから本番環境へ反映すること。"
+)
+ENGLISH_PARAGRAPH = (
+    "The new lending pipeline runs on AWS with Docker containers orchestrated by Kubernetes. "
+    "An LLM based on the Transformer architecture scores each application, and every decision "
+    "is written to an audit log so that KYC and AML reviews can be reproduced later. "
+)
+
+
+def naive_detect(domain_keywords: dict[str, list[str]], text: str) -> set[str]:
+    """従来実装（_detect_domain の旧ループ）"""
+    text_lower = text.lower()
+    return {
+        domain for domain, keywords in domain_keywords.items()
+        if any(kw.lower() in text_lower for kw in keywords)
+    }
+
+
+def normalized_table(domain_keywords: dict[str, list[str]]) -> dict[str, list[str]]:
+    """小文字化したキーワード → 分野"""
+    table: dict[str, list[str]] = {}
+    for domain, keywords in domain_keywords.items():
+        for keyword in keywords:
+            normalized = keyword.strip().lower()
+            if normalized and domain not in table.setdefault(normalized, []):
+                table[normalized].append(domain)
+    return table
+
+
+def find_scan(table: dict[str, list[str]], text: str) -> dict[str, int]:
+    """キーワードごとに str.find で全出現を列挙（分野 → ヒット数）"""
+    text_lower = text.lower()
+    counts: dict[str, int] = {}
+    for keyword, domains in table.items():
+        index = text_lower.find(keyword)
+        while index >= 0:
+            for domain in domains:
+                counts[domain] = counts.get(domain, 0) + 1
+            index = text_lower.find(keyword, index + 1)
+    return counts
+
+
+def compile_alternation(table: dict[str, list[str]]) -> re.Pattern:
+    """全キーワードを長い順の選択正規表現にまとめる"""
+    return re.compile("|".join(re.escape(keyword) for keyword in sorted(table, key=len, reverse=True)))
+
+
+def regex_scan(pattern: re.Pattern, table: dict[str, list[str]], text: str) -> dict[str, int]:
+    """選択正規表現による単一パス走査（重ならない出現のみ）"""
+    counts: dict[str, int] = {}
+    for match in pattern.finditer(text.lower()):
+        for domain in table[match.group()]:
+            counts[domain] = counts.get(domain, 0) + 1
+    return counts
+
+
+class AhoCorasick:
+    """純Python の Aho-Corasick オートマトン"""
+
+    def __init__(self, keywords):
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.output: list[list[str]] = [[]]
+        for keyword in keywords:
+            state = 0
+            for char in keyword:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append(keyword)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            current = queue.popleft()
+            for char, state in self.goto[current].items():
+                queue.append(state)
+                fallback = self.fail[current]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[state] = target if target != state else 0
+                self.output[state] = self.output[state] + self.output[self.fail[state]]
+
+    def scan(self, table: dict[str, list[str]], text: str) -> dict[str, int]:
+        """全出現を一文字ずつ走査（分野 → ヒット数）"""
+        counts: dict[str, int] = {}
+        state = 0
+        for char in text.lower():
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for keyword in self.output[state]:
+                for domain in table[keyword]:
+                    counts[domain] = counts.get(domain, 0) + 1
+        return counts
+
+
+def build_input(paragraph: str, size_bytes: int) -> str:
+    """指定バイト数程度になるまで段落を繰り返す"""
+    unit = len(paragraph.encode("utf-8"))
+    return paragraph * max(1, size_bytes // unit)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="分野検出ベンチマーク")
+    parser.add_argument("--repeat", type=int, default=200, help="各計測の繰り返し回数")
+    args = parser.parse_args()
+
+    domain_keywords = ConstraintIndex(CONSTRAINTS_DIR).snapshot().keywords()
+    table = normalized_table(domain_keywords)
+    alternation = compile_alternation(table)
+    automaton = AhoCorasick(table)
+
+    build_time = timeit.timeit(lambda: DomainMatcher(domain_keywords), number=20) / 20
+    matcher = DomainMatcher(domain_keywords)
+    print(f"分野数: {len(domain_keywords)}, キーワード数: {matcher.keyword_count}")
+    print(f"検出器構築: {build_time * 1000:.2f}ms")
+    print()
+
+    candidates = {
+        "従来": lambda text: naive_detect(domain_keywords, text),
+        "find": lambda text: find_scan(table, text),
+        "正規表現": lambda text: regex_scan(alternation, table, text),
+        "AC": lambda text: automaton.scan(table, text),
+        "検出器": matcher.scan,
+    }
+    print(f"{'入力':<8}{'サイズ':>8}" + "".join(f"{f'{name}(ms)':>14}" for name in candidates))
+
+    for label, paragraph in (("日本語", JAPANESE_PARAGRAPH), ("英語", ENGLISH_PARAGRAPH)):
+        for size_kb in (1, 4, 16, 64):
+            text = build_input(paragraph, size_kb * 1024)
+
+            # 検出される分野の一致を確認
+            expected = naive_detect(domain_keywords, text)
+            for name, scan in candidates.items():
+                actual = set(scan(text))
+                if expected != actual:
+                    raise SystemExit(f"検出結果不一致 ({name} {label} {size_kb}KB): {expected} != {actual}")
+
+            # 大きい入力は純Python の走査が遅いため繰り返しを減らす
+            repeat = max(1, args.repeat // size_kb)
+            timings = [
+                timeit.timeit(lambda: scan(text), number=repeat) / repeat
+                for scan in candidates.values()
+            ]
+            print(f"{label:<8}{f'{size_kb}KB':>8}" + "".join(f"{elapsed * 1000:>14.3f}" for elapsed in timings))
+
+
+if __name__ == "__main__":
+    main()
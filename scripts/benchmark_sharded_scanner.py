@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+シャード分割スキャナーベンチマーク
+
+リポジトリ内のテキストファイルを複製した合成リポジトリで、ワーカー数ごとに
+トークン化（転置リスト作成・統合）、索引の初回構築、全件走査検索（depth="comprehensive"）の時間を計測する
+
+使い方:
+    python scripts/benchmark_sharded_scanner.py [--files 4000] [--workers 1,2,4,8] [--repeat 3]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.corethink_mcp.file_enumerator import FileEnumerator
+from src.corethink_mcp.repo_index import INDEXED_EXTENSIONS, RepoIndex
+from src.corethink_mcp.sharded_scanner import ShardedScanner
+
+QUERY = "constraint evaluator 制約 評価"
+
+
+def build_corpus(target: Path, file_count: int) -> None:
+    """リポジトリのテキストファイルを file_count 件になるまで複製"""
+    sources = [
+        project_root / entry.path
+        for entry in FileEnumerator(project_root, use_git=False).files(INDEXED_EXTENSIONS)
+    ]
+    if not sources:
+        raise SystemExit("複製元のテキストファイルがありません")
+    for number in range(file_count):
+        source = sources[number % len(sources)]
+        destination = target / f"pkg{number // 200:03d}" / f"{number:05d}_{source.name}"
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, destination)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="シャード分割スキャナーベンチマーク")
+    parser.add_argument("--files", type=int, default=4000, help="合成リポジトリのファイル数")
+    parser.add_argument("--workers", default="", help="計測するワーカー数（カンマ区切り、既定は1からCPU数まで倍々）")
+    parser.add_argument("--repeat", type=int, default=3, help="各計測の繰り返し回数")
+    args = parser.parse_args()
+
+    cpu_count = os.cpu_count() or 1
+    if args.workers:
+        worker_counts = [int(value) for value in args.workers.split(",") if value.strip()]
+    else:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= cpu_count:
+            worker_counts.append(worker_counts[-1] * 2)
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory) / "repo"
+        build_corpus(root, args.files)
+        enumerator = FileEnumerator(root, use_git=False)
+        entries = [(entry.path, entry.mtime_ns, entry.size) for entry in enumerator.files(INDEXED_EXTENSIONS)]
+        total_bytes = sum(size for _, _, size in entries)
+        print(f"ファイル数: {len(entries):,}, 合計: {total_bytes / (1024 * 1024):.1f}MB, CPU数: {cpu_count}")
+        print()
+        print(f"{'ワーカー':>8}{'トークン化(ms)':>16}{'索引初回構築(ms)':>18}{'全件走査検索(ms)':>18}{'速度比':>8}")
+
+        baseline = None
+        expected = None
+        for workers in worker_counts:
+            scanner = ShardedScanner(root, workers)
+
+            # 統合結果がワーカー数に依存しないことを確認
+            merged = scanner.scan(entries)
+            signature = (len(merged.files), len(merged.postings), sum(frequency for _, _, frequency in merged.postings))
+            if expected is None:
+                expected = signature
+            elif signature != expected:
+                raise SystemExit(f"統合結果不一致 (ワーカー {workers}): {signature} != {expected}")
+
+            scan_time = timeit.timeit(lambda: scanner.scan(entries), number=args.repeat) / args.repeat
+
+            def cold_build() -> None:
+                index_path = Path(directory) / f"index_{workers}.sqlite"
+                index_path.unlink(missing_ok=True)
+                RepoIndex(root, index_path, enumerator=enumerator, workers=workers, sharded_min_files=0).refresh()
+
+            build_time = timeit.timeit(cold_build, number=args.repeat) / args.repeat
+
+            index = RepoIndex(root, Path(directory) / "search.sqlite", enumerator=enumerator, workers=workers, sharded_min_files=0)
+            search_time = timeit.timeit(lambda: index.scan_search(QUERY, 20), number=args.repeat) / args.repeat
+
+            baseline = baseline or scan_time
+            print(
+                f"{workers:>8}{scan_time * 1000:>16.1f}{build_time * 1000:>18.1f}"
+                f"{search_time * 1000:>18.1f}{baseline / scan_time:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
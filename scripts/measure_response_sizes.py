@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+応答サイズ計測
+
+MCPツールの応答の文字数・UTF-8バイト数を、ツール・深度・応答プロファイル（full / compact）・
+出力形式（markdown / json）ごとに計測する。--max-chars を指定すると文字数上限を適用した応答も計測する。
+推論結果キャッシュ・適応的深度制御・Sampling は無効にして、指定した深度のまま毎回推論する。
+execute_with_safeguards はサンドボックス（git worktree）を作成するため計測しない。
+
+使い方:
+    python scripts/measure_response_sizes.py [--depths minimal,standard,deep,comprehensive] [--max-chars 2000]
+"""
+
+import argparse
+import asyncio
+import sys
+import timeit
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.corethink_mcp.feature_flags import feature_flags
+from src.corethink_mcp.server import corethink_server as server
+
+SITUATION = (
+    "本番データベースのユーザーテーブルにカラムを追加するマイグレーションを実行したい。"
+    "既存の API レスポンスとの互換性を保ち、失敗時はロールバックできるようにする"
+)
+PROPOSED_CHANGE = "users テーブルに last_login_at カラムを追加し、print でデバッグ出力を残す"
+DEPTHS = ("minimal", "standard", "deep", "comprehensive")
+TRACE_DEPTHS = ("minimal", "standard", "detailed")
+MATERIAL_TYPES = "constraints,precedents,implications,risk_factors,domain_knowledge"
+
+# (表示名, 引数) — full の Markdown を比の基準にする
+VARIANTS = (
+    ("full", {}),
+    ("compact", {"response_profile": "compact"}),
+    ("json", {"output_format": "json"}),
+)
+
+
+def _tool(tool):
+    """@app.tool() で登録した関数の本体（FastMCP のツールオブジェクトは fn に保持）"""
+    return getattr(tool, "fn", tool)
+
+
+def measure(call, repeat: int):
+    """応答と1回あたりの所要時間（ms）"""
+    response = asyncio.run(call())
+    elapsed = timeit.timeit(lambda: asyncio.run(call()), number=repeat) / repeat if repeat > 0 else 0.0
+    return response, elapsed * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="応答サイズ計測")
+    parser.add_argument("--depths", default=",".join(DEPTHS), help="計測する深度（カンマ区切り）")
+    parser.add_argument("--max-chars", type=int, default=0, help="適用する文字数上限（0 で計測しない）")
+    parser.add_argument("--repeat", type=int, default=0, help="所要時間の計測の繰り返し回数（0 で計測しない）")
+    parser.add_argument("--situation", default=SITUATION, help="推論・材料収集の対象")
+    args = parser.parse_args()
+
+    for name, value in (
+        ("ENABLE_RESULT_CACHE", False),
+        ("ENABLE_ADAPTIVE_DEPTH", False),
+        ("ENABLE_SAMPLING_ENHANCEMENT", False),
+        ("RESPONSE_PROFILE", "full"),
+        ("MAX_RESPONSE_CHARS", 0),
+    ):
+        feature_flags.set_flag(name, value)
+
+    depths = [value.strip() for value in args.depths.split(",") if value.strip()]
+    variants = list(VARIANTS)
+    if args.max_chars > 0:
+        variants += [
+            (f"full≤{args.max_chars}", {"max_response_chars": args.max_chars}),
+            (f"compact≤{args.max_chars}", {"response_profile": "compact", "max_response_chars": args.max_chars}),
+            (f"json≤{args.max_chars}", {"output_format": "json", "max_response_chars": args.max_chars}),
+        ]
+
+    cases = []
+    for depth in depths:
+        cases.append(("unified_gsr_reasoning", depth, lambda options, depth=depth: server._unified_gsr_reasoning_impl(
+            situation_description=args.situation, context_depth=depth, **options
+        )))
+        cases.append(("collect_reasoning_materials", depth, lambda options, depth=depth: server._collect_reasoning_materials_impl(
+            topic=args.situation, material_types=MATERIAL_TYPES, depth=depth, **options
+        )))
+    cases.append(("validate_against_constraints", "-", lambda options: _tool(server.validate_against_constraints)(
+        proposed_change=PROPOSED_CHANGE, **options
+    )))
+    for depth in TRACE_DEPTHS:
+        cases.append(("trace_reasoning_steps", depth, lambda options, depth=depth: _tool(server.trace_reasoning_steps)(
+            context=args.situation, step_description="制約の適用", reasoning_depth=depth, **options
+        )))
+    cases.append(("manage_system_state", "-", lambda options: _tool(server.manage_system_state)(
+        operation="cache_stats", **options
+    )))
+    # JSON 出力のないツール
+    markdown_only = {"trace_reasoning_steps", "manage_system_state"}
+
+    print(f"{'ツール':<30}{'深度':<15}{'形式':<16}{'文字数':>8}{'バイト数':>10}{'対full':>8}{'時間(ms)':>10}")
+    totals = {}
+    for tool, depth, call in cases:
+        baseline = None
+        for label, options in variants:
+            if tool in markdown_only and "output_format" in options:
+                continue
+            response, elapsed = measure(lambda: call(options), args.repeat)
+            chars = len(response)
+            baseline = baseline or chars
+            totals[label] = totals.get(label, 0) + chars
+            timing = f"{elapsed:>10.1f}" if args.repeat > 0 else f"{'-':>10}"
+            print(
+                f"{tool:<30}{depth:<15}{label:<16}{chars:>8,}{len(response.encode('utf-8')):>10,}"
+                f"{chars / baseline:>7.0%} {timing}"
+            )
+
+    print()
+    print("形式ごとの合計文字数: " + ", ".join(f"{label} {total:,}" for label, total in totals.items()))
+
+
+if __name__ == "__main__":
+    main()
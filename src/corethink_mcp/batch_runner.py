@@ -0,0 +1,156 @@
+"""
+CoreThink-MCP バッチ推論実行
+
+複数の状況を同時実行数の上限付きで並行に推論し、結果を入力順に返す。
+正規化した状況が同一の項目は一度だけ推論し、結果を共有する。
+制約スナップショット・分野検出・索引の更新の共有は呼び出し側で行う
+（corethink_server の unified_gsr_reasoning_batch を参照）。
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from .materials_cache import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+# 項目別所要時間の一覧に表示する状況の文字数
+SITUATION_PREVIEW_CHARS = 40
+
+
+@dataclass(frozen=True)
+class BatchItemResult:
+    """バッチ1項目の推論結果"""
+    index: int  # 入力順（0始まり）
+    situation: str
+    content: str
+    elapsed_ms: float  # 推論の実行時間（順番待ちを含まない）
+    wait_ms: float = 0.0  # 同時実行数の上限による順番待ち
+    shared_with: Optional[int] = None  # 同一入力の結果を共有した項目
+    error: bool = False
+
+
+@dataclass
+class BatchResult:
+    """バッチ推論の結果（項目は入力順）"""
+    items: List[BatchItemResult] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+    max_concurrency: int = 1
+
+    @property
+    def executed(self) -> List[BatchItemResult]:
+        return [item for item in self.items if item.shared_with is None]
+
+    def summary(self) -> str:
+        shared = len(self.items) - len(self.executed)
+        errors = sum(1 for item in self.items if item.error)
+        text = (
+            f"項目数: {len(self.items)}（推論 {len(self.executed)}、同一入力の共有 {shared}）, "
+            f"同時実行数: {self.max_concurrency}, 全体所要時間: {self.elapsed_ms:.1f}ms"
+        )
+        if errors:
+            text += f", エラー: {errors}"
+        return text
+
+    def timing_table(self) -> str:
+        """項目別の所要時間"""
+        lines = []
+        for item in self.items:
+            preview = item.situation[:SITUATION_PREVIEW_CHARS] + ("..." if len(item.situation) > SITUATION_PREVIEW_CHARS else "")
+            if item.shared_with is not None:
+                lines.append(f"{item.index + 1}. 共有（項目{item.shared_with + 1}と同一入力） {preview}")
+            else:
+                status = "エラー " if item.error else ""
+                lines.append(f"{item.index + 1}. {status}{item.elapsed_ms:.1f}ms（待機 {item.wait_ms:.1f}ms） {preview}")
+        return "\n".join(lines)
+
+    def render(self, compact: bool = False) -> str:
+        """応答文字列（共有した項目の結果は共有元を参照し、再掲しない。compact では表題を省く）"""
+        parts = [] if compact else ["🧠 **CoreThink統合GSR推論 バッチ結果**"]
+        parts += [
+            f"【バッチ概要】\n{self.summary()}",
+            f"【項目別所要時間】\n{self.timing_table()}",
+        ]
+        total = len(self.items)
+        for item in self.items:
+            if item.shared_with is not None:
+                parts.append(f"## 項目 {item.index + 1}/{total}\n項目 {item.shared_with + 1} と同一入力のため結果を共有")
+            else:
+                parts.append(f"## 項目 {item.index + 1}/{total}\n{item.content}")
+        return "\n\n".join(parts)
+
+
+async def run_batch(
+    situations: Sequence[str],
+    run: Callable[[str], Awaitable[str]],
+    max_concurrency: int,
+    on_item_done: Optional[Callable[[BatchItemResult, int], Awaitable[None]]] = None,
+) -> BatchResult:
+    """状況ごとに run を並行実行し、入力順の結果を返す
+
+    同時に実行するのは最大 max_concurrency 件。正規化した状況が同一の項目は
+    最初の項目だけを実行し、残りは結果を共有する。
+    例外は他の項目に波及させず、その項目のエラー結果として返す。
+    on_item_done には推論した項目と完了件数を渡す（進捗通知用）。
+    """
+    started = time.perf_counter()
+    concurrency = max(1, int(max_concurrency))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    first_by_key: Dict[str, int] = {}
+    shared: Dict[int, int] = {}
+    for index, situation in enumerate(situations):
+        key = normalize_topic(situation)
+        if key in first_by_key:
+            shared[index] = first_by_key[key]
+        else:
+            first_by_key[key] = index
+
+    completed = 0
+
+    async def _run_item(index: int) -> BatchItemResult:
+        nonlocal completed
+        queued = time.perf_counter()
+        async with semaphore:
+            item_started = time.perf_counter()
+            error = False
+            try:
+                content = await run(situations[index])
+            except Exception as e:
+                logger.error(f"バッチ推論エラー (項目{index + 1}): {e}")
+                content, error = f"バッチ推論エラー: {str(e)}", True
+            finished = time.perf_counter()
+        result = BatchItemResult(
+            index=index,
+            situation=situations[index],
+            content=content,
+            elapsed_ms=(finished - item_started) * 1000,
+            wait_ms=(item_started - queued) * 1000,
+            error=error,
+        )
+        completed += 1
+        if on_item_done is not None:
+            await on_item_done(result, completed)
+        return result
+
+    executed = await asyncio.gather(*(_run_item(index) for index in first_by_key.values()))
+    by_index = {result.index: result for result in executed}
+
+    items = []
+    for index, situation in enumerate(situations):
+        if index in by_index:
+            items.append(by_index[index])
+        else:
+            source = by_index[shared[index]]
+            items.append(BatchItemResult(
+                index=index,
+                situation=situation,
+                content=source.content,
+                elapsed_ms=0.0,
+                shared_with=source.index,
+                error=source.error,
+            ))
+    return BatchResult(items, (time.perf_counter() - started) * 1000, concurrency)
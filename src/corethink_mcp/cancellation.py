@@ -0,0 +1,86 @@
+"""
+CoreThink-MCP 協調的キャンセル
+
+MCP クライアントが要求を取り消すと、ツールのタスクには次の await で CancelledError が届く。
+一方、asyncio.to_thread で実行中のスレッド（先例の全件走査・リポジトリ統計など）は取り消せず、
+結果を待つ者がいなくなっても完了までワーカーを使い続ける。
+
+cancel_scope() は取り消しトークンを ContextVar に設定し、スコープを例外（取り消し・期限切れ・エラー）で
+抜けるとトークンを取り消す。asyncio.to_thread は呼び出し時のコンテキストをスレッドに引き継ぐため、
+スレッド側の長いループで check_cancelled() を呼ぶと、見捨てられた処理を次の区切りで打ち切れる。
+スコープは入れ子にでき、親スコープの取り消しは子スコープにも及ぶ。
+"""
+
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class OperationCancelled(Exception):
+    """取り消されたスコープのスレッド処理を打ち切る例外"""
+
+
+class CancelToken:
+    """取り消しトークン（スレッド間で共有、親トークンの取り消しを引き継ぐ）"""
+
+    def __init__(self, parent: Optional["CancelToken"] = None):
+        self.parent = parent
+        self.reason = ""
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    def cancel(self, reason: str = "") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise OperationCancelled(self.reason or (self.parent.reason if self.parent else "") or "取り消されました")
+
+
+_current_token: ContextVar[Optional[CancelToken]] = ContextVar("corethink_cancel_token", default=None)
+
+
+def current_token() -> Optional[CancelToken]:
+    """現在のスコープの取り消しトークン（スコープ外では None）"""
+    return _current_token.get()
+
+
+def check_cancelled(token: Optional[CancelToken] = None) -> None:
+    """スコープが取り消されていれば OperationCancelled を送出（スコープ外では何もしない）
+
+    コンテキストを引き継がないスレッド（ThreadPoolExecutor のワーカーなど）では、
+    呼び出し元で current_token() を取得して token に渡す。
+    """
+    token = token or _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+@contextmanager
+def cancel_scope() -> Iterator[CancelToken]:
+    """取り消しスコープ（例外で抜けた場合、スコープ内で始めたスレッド処理を打ち切る）"""
+    token = CancelToken(parent=_current_token.get())
+    reset = _current_token.set(token)
+    try:
+        yield token
+    except BaseException as e:
+        token.cancel(type(e).__name__)
+        raise
+    finally:
+        _current_token.reset(reset)
+
+
+def cancellable(func):
+    """非同期関数の実行全体を取り消しスコープにするデコレーター"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with cancel_scope():
+            return await func(*args, **kwargs)
+    return wrapper
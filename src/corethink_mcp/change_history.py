@@ -0,0 +1,456 @@
+"""
+CoreThink-MCP 変更履歴索引
+
+対象リポジトリの git 履歴（コミットメッセージ・変更ファイルのパス・差分ハンク）を
+SQLite の転置インデックスに保存し、過去の類似した変更を先例として検索する。
+
+最後に索引したコミットの SHA を記録し、次回以降は新しいコミットだけを追加する。
+履歴の取得は `git log -p` を1回実行して出力を逐次解析する（コミットごとに diff を取らない）。
+GitPython が使えない・git 管理下でない場合は何も索引せず、検索結果は空になる。
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .repo_index import MAX_QUERY_TERMS, index_terms, rank_postings
+
+# GitPython の import（エラーハンドリング付き）
+try:
+    import git
+    GIT_AVAILABLE = True
+except ImportError:
+    GIT_AVAILABLE = False
+    git = None
+
+logger = logging.getLogger(__name__)
+
+# 索引の構造を変更した場合は必ず上げる（不一致なら索引を作り直す）
+SCHEMA_VERSION = 1
+
+# 1回の更新で索引するコミット数の上限（初回は HEAD から遡ってこの件数まで）
+DEFAULT_MAX_COMMITS = 2000
+# 1コミットあたりに保存・索引する差分の上限バイト数
+MAX_DIFF_BYTES_PER_COMMIT = 16 * 1024
+# 抜粋の最大文字数
+SNIPPET_MAX_CHARS = 160
+# 検索結果に表示する変更ファイル数
+DISPLAY_PATHS = 3
+
+# git log の出力形式（コミット先頭に \x1e、ヘッダー項目の区切りに \x1f、メッセージ末尾に \x1d）
+_LOG_FORMAT = "%x1e%H%x1f%at%x1f%an%n%B%x1d"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS commits (
+    id INTEGER PRIMARY KEY,
+    sha TEXT NOT NULL UNIQUE,
+    authored_at INTEGER NOT NULL,
+    author TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    paths TEXT NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hunks (
+    commit_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hunks_commit ON hunks (commit_id);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    commit_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, commit_id)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass
+class CommitRecord:
+    """git log から解析したコミット1件"""
+    sha: str
+    authored_at: int
+    author: str
+    message: str
+    paths: List[str] = field(default_factory=list)
+    hunks: List[Tuple[str, int, str]] = field(default_factory=list)  # (パス, 変更後の開始行, ハンクの行)
+
+    @property
+    def summary(self) -> str:
+        return self.message.strip().splitlines()[0] if self.message.strip() else ""
+
+
+@dataclass(frozen=True)
+class HistoryUpdate:
+    """変更履歴索引の更新結果"""
+    added: int
+    commit_count: int
+    head: str
+    version: int
+    elapsed_ms: float
+
+
+@dataclass(frozen=True)
+class ChangeHit:
+    """類似した過去の変更"""
+    sha: str
+    summary: str
+    authored_at: int
+    paths: Tuple[str, ...]
+    score: float
+    matched_terms: Tuple[str, ...]
+    hunk_path: str  # 一致語を最も多く含むハンク（なければ空文字）
+    hunk_line: int
+    snippet: str
+
+    def render(self) -> str:
+        """`sha 日付 要約 (変更ファイル)` と、あればハンクの抜粋"""
+        date = datetime.fromtimestamp(self.authored_at).strftime("%Y-%m-%d")
+        paths = ", ".join(self.paths[:DISPLAY_PATHS])
+        if len(self.paths) > DISPLAY_PATHS:
+            paths += f" 他{len(self.paths) - DISPLAY_PATHS}件"
+        line = f"{self.sha[:8]} {date} {self.summary}" + (f"（{paths}）" if paths else "")
+        if self.snippet:
+            line += f"\n    {self.hunk_path}:{self.hunk_line}: {self.snippet}"
+        return line
+
+
+def parse_log(lines: Iterator[str]) -> Iterator[CommitRecord]:
+    """`git log -p --format=_LOG_FORMAT` の出力を1コミットずつ解析"""
+    record: Optional[CommitRecord] = None
+    in_message = False
+    message_lines: List[str] = []
+    hunk: Optional[List] = None  # [パス, 開始行, 行のリスト]
+    path = ""
+    diff_bytes = 0
+
+    def _finish() -> Optional[CommitRecord]:
+        if record is None:
+            return None
+        if hunk is not None and hunk[2]:
+            record.hunks.append((hunk[0], hunk[1], "\n".join(hunk[2])))
+        return record
+
+    for line in lines:
+        line = line.rstrip("\n")
+        if line.startswith("\x1e"):
+            finished = _finish()
+            if finished is not None:
+                yield finished
+            sha, authored_at, author = (line[1:].split("\x1f") + ["", "0", ""])[:3]
+            record = CommitRecord(sha=sha, authored_at=int(authored_at or 0), author=author, message="")
+            in_message = True
+            message_lines = []
+            hunk = None
+            path = ""
+            diff_bytes = 0
+            continue
+        if record is None:
+            continue
+        if in_message:
+            if "\x1d" in line:
+                message_lines.append(line[:line.index("\x1d")])
+                record.message = "\n".join(message_lines).strip()
+                in_message = False
+            else:
+                message_lines.append(line)
+            continue
+
+        if line.startswith("diff --git "):
+            if hunk is not None and hunk[2]:
+                record.hunks.append((hunk[0], hunk[1], "\n".join(hunk[2])))
+            hunk = None
+            path = line.rsplit(" b/", 1)[-1]
+            record.paths.append(path)
+        elif line.startswith("@@"):
+            if hunk is not None and hunk[2]:
+                record.hunks.append((hunk[0], hunk[1], "\n".join(hunk[2])))
+            start = 0
+            try:
+                start = int(line.split("+", 1)[1].split(" ", 1)[0].split(",", 1)[0])
+            except (IndexError, ValueError):
+                pass
+            hunk = [path, start, []]
+        elif hunk is not None and line[:1] in ("+", "-", " ") and not line.startswith(("+++", "---")):
+            # 差分の上限を超えた分は索引しない（メッセージとパスは索引する）
+            diff_bytes += len(line)
+            if diff_bytes <= MAX_DIFF_BYTES_PER_COMMIT:
+                hunk[2].append(line)
+
+    finished = _finish()
+    if finished is not None:
+        yield finished
+
+
+class ChangeHistoryIndex:
+    """git 履歴の永続転置インデックス
+
+    `refresh()` で前回索引したコミット以降の新しいコミットを追加し、
+    `search()` でクエリ語を含むコミットを一致語数 → BM25 の順に返す。
+    """
+
+    def __init__(self, root: Path, index_path: Path, max_commits: int = DEFAULT_MAX_COMMITS):
+        self.root = Path(root).resolve()
+        self.index_path = Path(index_path)
+        self.max_commits = max_commits
+        self._lock = threading.Lock()
+        self._version = 0
+        self._last_refresh = 0.0
+        self._initialized = False
+
+    @property
+    def version(self) -> int:
+        """索引の世代（コミットが追加されるたびに増える）"""
+        return self._version
+
+    @property
+    def available(self) -> bool:
+        return GIT_AVAILABLE
+
+    # ------------------------------------------------------------------ 更新
+
+    def ensure_fresh(self, max_age_seconds: float) -> Optional[HistoryUpdate]:
+        """前回の更新から max_age_seconds 以上経過していれば新しいコミットを索引する"""
+        if self._last_refresh and time.monotonic() - self._last_refresh < max_age_seconds:
+            return None
+        return self.refresh()
+
+    def refresh(self) -> HistoryUpdate:
+        """HEAD までの未索引のコミットを索引に追加"""
+        with self._lock:
+            started = time.perf_counter()
+            connection = self._connect()
+            try:
+                last_sha = self._get_meta(connection, "last_sha", "")
+                version = int(self._get_meta(connection, "version", "0"))
+                head, records = self._new_commits(last_sha)
+                added = 0
+                if head and head != last_sha:
+                    connection.execute("BEGIN IMMEDIATE")
+                    for record in records:
+                        if self._insert_commit(connection, record):
+                            added += 1
+                    if added:
+                        version += 1
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                        [("last_sha", head), ("version", str(version))],
+                    )
+                    connection.commit()
+                commit_count = connection.execute("SELECT COUNT(*) FROM commits").fetchone()[0]
+            except Exception:
+                if connection.in_transaction:
+                    connection.rollback()
+                raise
+            finally:
+                connection.close()
+
+            self._version = version
+            self._last_refresh = time.monotonic()
+            result = HistoryUpdate(
+                added=added,
+                commit_count=commit_count,
+                head=head,
+                version=version,
+                elapsed_ms=(time.perf_counter() - started) * 1000,
+            )
+            if added:
+                logger.info(f"変更履歴索引更新: 追加{added}コミット ({commit_count}コミット, {result.elapsed_ms:.0f}ms)")
+            return result
+
+    def _new_commits(self, last_sha: str) -> Tuple[str, List[CommitRecord]]:
+        """(HEAD の SHA, 未索引のコミット)。前回の SHA が HEAD の祖先でなければ HEAD から遡る"""
+        if not GIT_AVAILABLE:
+            return "", []
+        try:
+            repo = git.Repo(self.root, search_parent_directories=True)
+        except Exception:
+            return "", []
+        try:
+            try:
+                head = repo.head.commit.hexsha
+            except ValueError:
+                return "", []  # コミットのないリポジトリ
+            if head == last_sha:
+                return head, []
+
+            revision = head
+            if last_sha:
+                try:
+                    if repo.is_ancestor(last_sha, head):
+                        revision = f"{last_sha}..{head}"
+                except Exception:
+                    pass  # 履歴の書き換えなどで前回の SHA が存在しない（索引済みのコミットは挿入時に除外）
+
+            # ルートがリポジトリのサブディレクトリなら、その配下を変更したコミットに限る
+            top = Path(repo.working_tree_dir).resolve()
+            pathspec = "." if top == self.root else self.root.relative_to(top).as_posix()
+            process = repo.git.log(
+                "--no-color", "--no-ext-diff", "--unified=1", "-p",
+                f"--format={_LOG_FORMAT}", f"--max-count={self.max_commits}",
+                revision, "--", pathspec,
+                as_process=True,
+            )
+            lines = (raw.decode("utf-8", errors="replace") for raw in process.stdout)
+            records = list(parse_log(lines))
+            process.wait()
+            return head, records
+        finally:
+            repo.close()
+
+    @staticmethod
+    def _insert_commit(connection: sqlite3.Connection, record: CommitRecord) -> bool:
+        """コミットを索引に追加（索引済みなら何もしない）"""
+        terms = index_terms(record.message) + index_terms(" ".join(record.paths))
+        for _, _, text in record.hunks:
+            # 前後の文脈行は索引しない（追加・削除行のみ）
+            terms.extend(index_terms("\n".join(line for line in text.split("\n") if line[:1] in ("+", "-"))))
+        counts = Counter(terms)
+
+        cursor = connection.execute(
+            "INSERT OR IGNORE INTO commits (sha, authored_at, author, summary, paths, length) VALUES (?, ?, ?, ?, ?, ?)",
+            (record.sha, record.authored_at, record.author, record.summary, "\n".join(record.paths), len(terms)),
+        )
+        if not cursor.rowcount:
+            return False
+        commit_id = cursor.lastrowid
+        connection.executemany(
+            "INSERT INTO hunks (commit_id, path, line, text) VALUES (?, ?, ?, ?)",
+            ((commit_id, path, line, text) for path, line, text in record.hunks),
+        )
+        connection.executemany(
+            "INSERT INTO postings (term, commit_id, tf) VALUES (?, ?, ?)",
+            ((term, commit_id, frequency) for term, frequency in counts.items()),
+        )
+        return True
+
+    # ------------------------------------------------------------------ 検索
+
+    def search(self, query: str, k: int = 5) -> List[ChangeHit]:
+        """クエリ語を含む過去のコミットを関連度順に最大k件返す（ハンクの抜粋付き）"""
+        terms = list(dict.fromkeys(index_terms(query)))[:MAX_QUERY_TERMS]
+        if not terms or k <= 0:
+            return []
+
+        connection = self._connect()
+        try:
+            document_count, average_length = connection.execute(
+                "SELECT COUNT(*), AVG(length) FROM commits"
+            ).fetchone()
+            if not document_count:
+                return []
+            placeholders = ",".join("?" * len(terms))
+            rows = connection.execute(
+                f"SELECT p.term, p.commit_id, p.tf, c.length FROM postings p "
+                f"JOIN commits c ON c.id = p.commit_id WHERE p.term IN ({placeholders})",
+                terms,
+            ).fetchall()
+            ranked, scores, matched = rank_postings(rows, document_count, average_length or 1.0, k)
+            if not ranked:
+                return []
+
+            placeholders = ",".join("?" * len(ranked))
+            commits = {
+                commit_id: (sha, summary, authored_at, paths)
+                for commit_id, sha, summary, authored_at, paths in connection.execute(
+                    f"SELECT id, sha, summary, authored_at, paths FROM commits WHERE id IN ({placeholders})", ranked
+                )
+            }
+            hunks: Dict[int, List[Tuple[str, int, str]]] = {}
+            for commit_id, path, line, text in connection.execute(
+                f"SELECT commit_id, path, line, text FROM hunks WHERE commit_id IN ({placeholders})", ranked
+            ):
+                hunks.setdefault(commit_id, []).append((path, line, text))
+        finally:
+            connection.close()
+
+        hits = []
+        for commit_id in ranked:
+            if commit_id not in commits:
+                continue
+            sha, summary, authored_at, paths = commits[commit_id]
+            ordered_terms = tuple(term for term in terms if term in matched[commit_id])
+            hunk_path, hunk_line, snippet = self._snippet(hunks.get(commit_id, []), ordered_terms)
+            hits.append(ChangeHit(
+                sha=sha,
+                summary=summary,
+                authored_at=authored_at,
+                paths=tuple(path for path in paths.split("\n") if path),
+                score=scores[commit_id],
+                matched_terms=ordered_terms,
+                hunk_path=hunk_path,
+                hunk_line=hunk_line,
+                snippet=snippet,
+            ))
+        return hits
+
+    @staticmethod
+    def _snippet(hunks: List[Tuple[str, int, str]], terms: Tuple[str, ...]) -> Tuple[str, int, str]:
+        """一致語を最も多く含む追加・削除行を抜粋として返す（行番号は変更後のファイルの行）"""
+        best: Optional[Tuple[int, str, int, str]] = None
+        for path, start, text in hunks:
+            line_number = start
+            for line in text.split("\n"):
+                if line[:1] in ("+", "-"):
+                    lowered = line.lower()
+                    count = sum(1 for term in terms if term in lowered)
+                    if count and (best is None or count > best[0]):
+                        best = (count, path, line_number, line)
+                # 削除行は変更後のファイルに存在しない
+                if not line.startswith("-"):
+                    line_number += 1
+        if best is None:
+            return "", 0, ""
+        snippet = " ".join(best[3].split())
+        if len(snippet) > SNIPPET_MAX_CHARS:
+            snippet = snippet[:SNIPPET_MAX_CHARS] + "…"
+        return best[1], best[2], snippet
+
+    # ------------------------------------------------------------------ 状態
+
+    def stats(self) -> Dict[str, object]:
+        """索引済みコミット数・最後に索引した SHA・世代"""
+        connection = self._connect()
+        try:
+            commit_count = connection.execute("SELECT COUNT(*) FROM commits").fetchone()[0]
+            last_sha = self._get_meta(connection, "last_sha", "")
+        finally:
+            connection.close()
+        return {"commits": commit_count, "last_sha": last_sha, "version": self._version}
+
+    def _connect(self) -> sqlite3.Connection:
+        """接続を開く（初回は表を作成し、ルート・構造の異なる索引は作り直す）"""
+        if not self._initialized:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.index_path, timeout=30.0, isolation_level=None)
+        if not self._initialized:
+            connection.executescript(_SCHEMA)
+            expected = {"schema_version": str(SCHEMA_VERSION), "root": str(self.root)}
+            if any(self._get_meta(connection, key, None) != value for key, value in expected.items()):
+                logger.info(f"変更履歴索引を初期化します: {self.index_path}")
+                connection.execute("BEGIN IMMEDIATE")
+                connection.execute("DELETE FROM postings")
+                connection.execute("DELETE FROM hunks")
+                connection.execute("DELETE FROM commits")
+                connection.execute("DELETE FROM meta WHERE key = 'last_sha'")
+                version = int(self._get_meta(connection, "version", "0")) + 1
+                connection.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    list(expected.items()) + [("version", str(version))],
+                )
+                connection.commit()
+            self._initialized = True
+        return connection
+
+    @staticmethod
+    def _get_meta(connection: sqlite3.Connection, key: str, default: Optional[str]) -> Optional[str]:
+        row = connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
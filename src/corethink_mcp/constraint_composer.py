@@ -0,0 +1,138 @@
+"""
+CoreThink-MCP 分野横断制約合成
+
+基本制約と検出された全分野の制約をルール単位で重複除去して統合し、
+結果を (分野の組, 制約インデックスのバージョン) をキーとするLRUに保持する
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, Iterable, List, Tuple
+
+from .constraint_evaluator import ConstraintEvaluator
+from .constraint_index import BASE_DOMAIN, ConstraintIndex, ConstraintRule, parse_rule_line, rule_key
+from .constraint_retriever import RuleRetriever
+from .domain_detector import DOMAIN_PRIORITY
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ComposedConstraints:
+    """合成済み制約セット"""
+    domains: Tuple[str, ...]  # 適用分野（優先順位順）
+    version: int  # 合成に使用した制約インデックスのバージョン
+    base_text: str  # 基本制約
+    domain_text: str  # 分野特化制約（重複ルール除去済み）
+    rules: Tuple[ConstraintRule, ...]  # 基本＋分野の全ルール（重複除去済み）
+
+    @property
+    def text(self) -> str:
+        """基本制約と分野特化制約を連結した全文"""
+        if not self.domain_text:
+            return self.base_text
+        return f"{self.base_text}\n\n{self.domain_text}" if self.base_text else self.domain_text
+
+    @cached_property
+    def evaluator(self) -> ConstraintEvaluator:
+        """全ルールの検出パターンを結合した評価器（合成結果ごとに一度だけ構築）"""
+        return ConstraintEvaluator(self.rules)
+
+    @cached_property
+    def retriever(self) -> RuleRetriever:
+        """全ルールの BM25 検索インデックス（合成結果ごとに一度だけ構築）"""
+        return RuleRetriever(self.rules)
+
+
+class ConstraintComposer:
+    """複数分野の制約を統合するコンポーザー（LRUキャッシュ付き）"""
+
+    def __init__(self, index: ConstraintIndex, max_entries: int = 64):
+        self.index = index
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple[Tuple[str, ...], int], ComposedConstraints]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compose(self, domains: Iterable[str]) -> ComposedConstraints:
+        """指定分野の制約を統合する（同じ分野の組はキャッシュから返す）"""
+        snapshot = self.index.snapshot()
+        selected = tuple(sorted({domain for domain in domains if domain != BASE_DOMAIN and snapshot.get(domain)}))
+        key = (selected, snapshot.version)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        composed = self._compose(snapshot, selected)
+
+        with self._lock:
+            self._cache[key] = composed
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+        logger.debug(f"制約合成: {list(composed.domains) or ['general']} (ルール {len(composed.rules)}件)")
+        return composed
+
+    def get_stats(self) -> Dict[str, int]:
+        """キャッシュ統計"""
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        """キャッシュをクリア"""
+        with self._lock:
+            self._cache.clear()
+
+    @staticmethod
+    def _ordered(domains: Tuple[str, ...]) -> List[str]:
+        """分野を優先順位順に並べる（優先順位外は名前順で後ろ）"""
+        ranked = [domain for domain in DOMAIN_PRIORITY if domain in domains]
+        return ranked + sorted(domain for domain in domains if domain not in DOMAIN_PRIORITY)
+
+    def _compose(self, snapshot, domains: Tuple[str, ...]) -> ComposedConstraints:
+        """ルール単位の重複除去を行いながら制約を連結"""
+        base_file = snapshot.get(BASE_DOMAIN)
+        base_text = base_file.body if base_file else ""
+        rules: List[ConstraintRule] = list(base_file.rules) if base_file else []
+        seen = {rule_key(rule.level, rule.text) for rule in rules}
+
+        ordered = self._ordered(domains)
+        sections = []
+        for domain in ordered:
+            domain_file = snapshot.get(domain)
+            lines = []
+            kept = set()
+            for line in domain_file.body.splitlines():
+                parsed_rule = parse_rule_line(line)
+                if parsed_rule:
+                    key = rule_key(*parsed_rule)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    kept.add(key)
+                lines.append(line)
+
+            for rule in domain_file.rules:
+                key = rule_key(rule.level, rule.text)
+                if key in kept:
+                    rules.append(rule)
+                    kept.discard(key)
+            sections.append(f"## 分野特化制約（{domain.upper()}）\n" + "\n".join(lines).strip())
+
+        return ComposedConstraints(
+            domains=tuple(ordered),
+            version=snapshot.version,
+            base_text=base_text,
+            domain_text="\n\n".join(sections),
+            rules=tuple(rules),
+        )
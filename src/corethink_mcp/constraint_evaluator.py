@@ -0,0 +1,244 @@
+"""
+CoreThink-MCP 制約評価エンジン
+
+各ルールの検出パターン（制約ファイルの `TRIGGER:` 行）をコンパイル済みで保持し、
+提案変更に対するルールごとの判定と検出位置を返す
+"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .constraint_index import ConstraintRule
+
+logger = logging.getLogger(__name__)
+
+TRIGGER_FLAGS = re.IGNORECASE | re.MULTILINE
+
+# ルールごとに保持する検出位置の上限（件数は全件数える）
+MAX_MATCHES_PER_RULE = 20
+# 検出箇所の抜粋の最大文字数
+EXCERPT_LENGTH = 60
+
+# 判定
+STATUS_VIOLATION = "violation"  # MUST/NEVER の検出パターンに該当
+STATUS_WARNING = "warning"  # SHOULD の検出パターンに該当
+STATUS_PASS = "pass"  # 検出パターンに該当なし
+STATUS_UNCHECKED = "unchecked"  # 検出パターン未定義（文脈判断が必要）
+
+# 総合判定
+JUDGMENT_REJECT = "REJECT"  # MUST/NEVER 違反を検出
+JUDGMENT_CAUTION = "CAUTION"  # SHOULD の要確認を検出
+JUDGMENT_NEEDS_REVIEW = "NEEDS_REVIEW"  # 検出なし・検出パターン未定義の MUST/NEVER ルールあり
+JUDGMENT_PROCEED = "PROCEED"  # 検出なし・MUST/NEVER ルールはすべて検出パターンで確認済み
+
+# 未確認のまま PROCEED にできないルールの重要度
+CRITICAL_LEVELS = ("MUST", "NEVER")
+
+
+@dataclass(frozen=True)
+class RuleMatch:
+    """検出パターンの一致箇所"""
+    start: int
+    end: int
+    excerpt: str
+
+
+@dataclass
+class RuleVerdict:
+    """ルールごとの判定"""
+    rule: ConstraintRule
+    status: str
+    matches: List[RuleMatch] = field(default_factory=list)
+    match_count: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "level": self.rule.level,
+            "domain": self.rule.domain,
+            "section": self.rule.section,
+            "rule": self.rule.text,
+            "status": self.status,
+            "match_count": self.match_count,
+            "matches": [
+                {"start": match.start, "end": match.end, "excerpt": match.excerpt}
+                for match in self.matches
+            ],
+        }
+
+
+@dataclass
+class EvaluationResult:
+    """提案変更に対する全ルールの評価結果"""
+    verdicts: List[RuleVerdict]
+    input_length: int
+    elapsed_ms: float
+
+    @property
+    def violations(self) -> List[RuleVerdict]:
+        return [verdict for verdict in self.verdicts if verdict.status == STATUS_VIOLATION]
+
+    @property
+    def warnings(self) -> List[RuleVerdict]:
+        return [verdict for verdict in self.verdicts if verdict.status == STATUS_WARNING]
+
+    @property
+    def passed(self) -> List[RuleVerdict]:
+        return [verdict for verdict in self.verdicts if verdict.status == STATUS_PASS]
+
+    @property
+    def unchecked(self) -> List[RuleVerdict]:
+        return [verdict for verdict in self.verdicts if verdict.status == STATUS_UNCHECKED]
+
+    @property
+    def unchecked_critical(self) -> List[RuleVerdict]:
+        """検出パターン未定義の MUST/NEVER ルール"""
+        return [verdict for verdict in self.unchecked if verdict.rule.level in CRITICAL_LEVELS]
+
+    @property
+    def trigger_judgment(self) -> str:
+        """検出パターンだけによる判定（REJECT / CAUTION / PROCEED）
+
+        PROCEED は「該当する検出パターンがない」ことしか意味しない。
+        """
+        if self.violations:
+            return JUDGMENT_REJECT
+        return JUDGMENT_CAUTION if self.warnings else JUDGMENT_PROCEED
+
+    @property
+    def judgment(self) -> str:
+        """総合判定（REJECT / CAUTION / NEEDS_REVIEW / PROCEED）
+
+        検出パターン未定義の MUST/NEVER ルールが残る場合、検出がなくても PROCEED とせず NEEDS_REVIEW を返す。
+        """
+        judgment = self.trigger_judgment
+        if judgment == JUDGMENT_PROCEED and self.unchecked_critical:
+            return JUDGMENT_NEEDS_REVIEW
+        return judgment
+
+    @property
+    def verdict_summary(self) -> str:
+        """件数付きの総合判定（例: NEEDS_REVIEW（違反 0件・要確認 0件・未確認 MUST/NEVER 12件））"""
+        return (
+            f"{self.judgment}（違反 {len(self.violations)}件・要確認 {len(self.warnings)}件"
+            f"・未確認 MUST/NEVER {len(self.unchecked_critical)}件）"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "judgment": self.judgment,
+            "trigger_judgment": self.trigger_judgment,
+            "unchecked_critical": len(self.unchecked_critical),
+            "input_length": self.input_length,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+            "counts": {
+                STATUS_VIOLATION: len(self.violations),
+                STATUS_WARNING: len(self.warnings),
+                STATUS_PASS: len(self.passed),
+                STATUS_UNCHECKED: len(self.unchecked),
+            },
+            "verdicts": [verdict.to_dict() for verdict in self.verdicts],
+        }
+
+    def render(self) -> str:
+        """【詳細チェック】以降の自然言語レポート"""
+        lines = ["【詳細チェック】"]
+        for verdict in self.violations + self.warnings:
+            icon, label = ("❌", "違反") if verdict.status == STATUS_VIOLATION else ("⚠️", "要確認")
+            locations = ", ".join(
+                f"{match.start}-{match.end}「{match.excerpt}」" for match in verdict.matches[:3]
+            )
+            more = f" 他{verdict.match_count - 3}件" if verdict.match_count > 3 else ""
+            lines.append(f"{icon} {verdict.rule.level}「{verdict.rule.text}」 → {label} ({verdict.match_count}件: {locations}{more})")
+
+        if not self.violations and not self.warnings:
+            lines.append("✅ 検出パターンに該当する制約違反はありません")
+        lines.append(f"✅ 検出パターン付きルール {len(self.passed)}件: 該当なし")
+        if self.unchecked:
+            lines.append(
+                f"➖ 検出パターン未定義ルール {len(self.unchecked)}件"
+                f"（うち MUST/NEVER {len(self.unchecked_critical)}件）: 文脈に基づく確認が必要"
+            )
+
+        lines.append("")
+        lines.append(f"【総合判定】{self.verdict_summary}")
+        if self.violations:
+            lines.append("【推奨】違反箇所を修正してから再検証してください")
+        elif self.warnings:
+            lines.append("【推奨】要確認の項目を確認してから実行してください")
+        elif self.unchecked_critical:
+            lines.append("【推奨】検出パターン未定義の MUST/NEVER ルールを文脈に照らして確認してから実行してください")
+        else:
+            lines.append("【推奨】検出パターン付きの MUST/NEVER ルールに該当はありません。実行可能です")
+        return "\n".join(lines)
+
+
+class ConstraintEvaluator:
+    """ルールの検出パターンをコンパイル済みで保持する評価器
+
+    構築時に全ルールの検出パターンを一度だけコンパイルし、同一パターンを持つ
+    複数のルールは一度の照合結果を共有する。
+
+    全パターンを一つの選択正規表現に結合した単一パス走査は、CPython の re では
+    入力の各位置で全選択肢を試すうえに各パターン先頭のリテラル検索最適化が効かなくなるため、
+    パターンごとの finditer より遅い（scripts/benchmark_constraint_evaluation.py で計測）。
+    """
+
+    def __init__(self, rules: Iterable[ConstraintRule]):
+        self.rules: Tuple[ConstraintRule, ...] = tuple(rules)
+
+        owners: Dict[str, List[int]] = {}
+        compiled: List[Tuple[str, "re.Pattern[str]"]] = []
+        for index, rule in enumerate(self.rules):
+            for trigger in rule.triggers:
+                if trigger in owners:
+                    if index not in owners[trigger]:
+                        owners[trigger].append(index)
+                    continue
+                try:
+                    pattern = re.compile(trigger, TRIGGER_FLAGS)
+                except re.error as e:
+                    logger.warning(f"検出パターンが不正なため無視します ({rule.level}: {rule.text}): {e}")
+                    continue
+                owners[trigger] = [index]
+                compiled.append((trigger, pattern))
+
+        # (パターン, 所有ルールの添字) の並び
+        self._patterns: Tuple[Tuple["re.Pattern[str]", Tuple[int, ...]], ...] = tuple(
+            (pattern, tuple(owners[trigger])) for trigger, pattern in compiled
+        )
+        self.pattern_count = len(self._patterns)
+
+    def evaluate(self, text: str) -> EvaluationResult:
+        """全ルールの判定と検出位置を返す"""
+        started = time.perf_counter()
+        matches: List[List[RuleMatch]] = [[] for _ in self.rules]
+        counts = [0] * len(self.rules)
+
+        if text:
+            for pattern, owner_indexes in self._patterns:
+                for found in pattern.finditer(text):
+                    start, end = found.span()
+                    if end <= start:
+                        continue
+                    for owner in owner_indexes:
+                        counts[owner] += 1
+                        if len(matches[owner]) < MAX_MATCHES_PER_RULE:
+                            excerpt = text[start:min(end, start + EXCERPT_LENGTH)].replace("\n", " ")
+                            matches[owner].append(RuleMatch(start, end, excerpt))
+
+        verdicts = []
+        for index, rule in enumerate(self.rules):
+            if counts[index]:
+                status = STATUS_WARNING if rule.level == "SHOULD" else STATUS_VIOLATION
+            else:
+                status = STATUS_PASS if rule.triggers else STATUS_UNCHECKED
+            verdicts.append(RuleVerdict(rule=rule, status=status, matches=matches[index], match_count=counts[index]))
+
+        return EvaluationResult(
+            verdicts=verdicts,
+            input_length=len(text),
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
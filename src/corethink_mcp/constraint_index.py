@@ -0,0 +1,355 @@
+"""
+CoreThink-MCP 制約インデックス
+
+constraints/constraints*.txt を一度だけ解析して構造化ルールとしてメモリに保持し、
+ファイルの mtime・サイズが変化した場合のみ再解析する
+"""
+
+import functools
+import hashlib
+import logging
+import re
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 基本制約（constraints.txt）に割り当てる分野名
+BASE_DOMAIN = "general"
+
+RULE_LEVELS = ("MUST", "NEVER", "SHOULD")
+
+_RULE_PATTERN = re.compile(r"^(MUST|NEVER|SHOULD)\s*[:：]\s*(.+?)\s*$")
+_SECTION_PATTERN = re.compile(r"^#{2,}\s*(.+?)\s*$")
+# 直前のルールに付与する検出パターン（`TRIGGER: 正規表現`）
+_TRIGGER_PATTERN = re.compile(r"^TRIGGER\s*[:：]\s*(.+?)\s*$")
+# 英数字語・漢字列・カタカナ列をキーワードとして抽出（ひらがなは助詞等が多いため除外）
+_KEYWORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9_+\-./]*|[\u4e00-\u9fff\u3005]+|[\u30a1-\u30fa\u30fc]+")
+
+
+@dataclass(frozen=True)
+class ConstraintRule:
+    """構造化された制約ルール"""
+    level: str  # MUST / NEVER / SHOULD
+    section: str
+    domain: str
+    text: str
+    keywords: Tuple[str, ...] = ()
+    triggers: Tuple[str, ...] = ()  # 違反（SHOULDは注意）を示す入力の正規表現
+
+    def render(self) -> str:
+        """制約ファイルと同じ `LEVEL: text` 形式で出力"""
+        return f"{self.level}: {self.text}"
+
+
+@dataclass(frozen=True)
+class ConstraintFile:
+    """解析済み制約ファイル"""
+    path: Path
+    domain: str
+    mtime_ns: int
+    size: int
+    content: str  # ファイル全文
+    body: str  # KEYWORDSセクションを除いた制約本文
+    keywords: Tuple[str, ...]
+    rules: Tuple[ConstraintRule, ...]
+
+
+@dataclass(frozen=True)
+class ConstraintSnapshot:
+    """ある時点の制約インデックス全体（不変）"""
+    version: int
+    files: Dict[str, ConstraintFile] = field(default_factory=dict)
+
+    def get(self, domain: str) -> Optional[ConstraintFile]:
+        return self.files.get(domain)
+
+    @functools.cached_property
+    def fingerprint(self) -> str:
+        """全ファイルの内容の SHA-256（version と異なり、再起動後も内容が同じなら同じ値）"""
+        digest = hashlib.sha256()
+        for domain in sorted(self.files):
+            digest.update(f"{domain}\0{self.files[domain].content}\0".encode("utf-8"))
+        return digest.hexdigest()
+
+    def text(self, domain: str) -> str:
+        """分野のファイル全文（存在しない場合は空文字）"""
+        constraint_file = self.files.get(domain)
+        return constraint_file.content if constraint_file else ""
+
+    def domains(self) -> List[str]:
+        """基本制約を除く分野名の一覧"""
+        return [domain for domain in self.files if domain != BASE_DOMAIN]
+
+    def keywords(self) -> Dict[str, List[str]]:
+        """分野 → 検出用キーワードの対応表"""
+        return {
+            domain: list(constraint_file.keywords)
+            for domain, constraint_file in self.files.items()
+            if domain != BASE_DOMAIN and constraint_file.keywords
+        }
+
+    def rules(self, domain: Optional[str] = None) -> List[ConstraintRule]:
+        """指定分野（省略時は全分野）のルール一覧"""
+        if domain is not None:
+            constraint_file = self.files.get(domain)
+            return list(constraint_file.rules) if constraint_file else []
+        return [rule for constraint_file in self.files.values() for rule in constraint_file.rules]
+
+    def lookup(self, file_path: Path) -> Optional[ConstraintFile]:
+        """ファイルパスから解析済みファイルを検索"""
+        try:
+            resolved = Path(file_path).resolve()
+        except OSError:
+            return None
+        for constraint_file in self.files.values():
+            if constraint_file.path == resolved:
+                return constraint_file
+        return None
+
+
+def domain_for_path(file_path: Path) -> str:
+    """constraints_<domain>.txt から分野名を取り出す"""
+    stem = Path(file_path).stem
+    if stem == "constraints":
+        return BASE_DOMAIN
+    return stem[len("constraints_"):] if stem.startswith("constraints_") else stem
+
+
+def parse_rule_line(line: str) -> Optional[Tuple[str, str]]:
+    """`MUST: ...` 形式の行から (レベル, 本文) を取り出す（ルール行でなければNone）"""
+    rule_match = _RULE_PATTERN.match(line.strip())
+    return rule_match.groups() if rule_match else None
+
+
+def rule_key(level: str, text: str) -> Tuple[str, str]:
+    """重複判定用のルールキー（空白の揺れを無視）"""
+    return level, " ".join(text.split())
+
+
+def extract_keywords(text: str) -> Tuple[str, ...]:
+    """ルール本文から検索用キーワードを抽出（小文字化・重複除去済み）"""
+    seen = dict.fromkeys(match.lower() for match in _KEYWORD_PATTERN.findall(text))
+    return tuple(seen)
+
+
+def parse_constraint_text(content: str, domain: str) -> Tuple[str, Tuple[str, ...], Tuple[ConstraintRule, ...]]:
+    """制約ファイルの内容を解析する
+
+    `## KEYWORDS` セクションは次の見出しまでをキーワード行として扱い、
+    それ以外の行を制約本文とする。ルール直後の `TRIGGER: 正規表現` 行は
+    そのルールの検出パターンとして取り込み、本文には含めない。
+
+    Returns:
+        tuple: (制約本文, キーワード, 構造化ルール)
+    """
+    body_lines: List[str] = []
+    keywords: List[str] = []
+    rules: List[ConstraintRule] = []
+    section = ""
+    in_keywords = False
+
+    for raw_line in content.splitlines():
+        line = raw_line.strip()
+
+        heading = _SECTION_PATTERN.match(line)
+        if heading:
+            title = heading.group(1)
+            if title == "KEYWORDS":
+                in_keywords = True
+                continue
+            in_keywords = False
+            # "## ====" のような区切り線は見出しとして扱わない
+            if title.strip("=").strip():
+                section = title
+
+        if in_keywords:
+            if line and not line.startswith("#") and line.strip("-"):
+                # カンマ区切りのキーワードを分割
+                keywords.extend(kw.strip() for kw in line.split(",") if kw.strip())
+            continue
+
+        trigger = _TRIGGER_PATTERN.match(line)
+        if trigger:
+            if rules:
+                rules[-1] = replace(rules[-1], triggers=rules[-1].triggers + (trigger.group(1),))
+            else:
+                logger.warning(f"ルールより前の TRIGGER 行を無視します ({domain}): {line}")
+            continue
+
+        body_lines.append(raw_line)
+
+        parsed_rule = parse_rule_line(line)
+        if parsed_rule:
+            level, text = parsed_rule
+            rules.append(ConstraintRule(
+                level=level,
+                section=section,
+                domain=domain,
+                text=text,
+                keywords=extract_keywords(text),
+            ))
+
+    return "\n".join(body_lines).strip(), tuple(keywords), tuple(rules)
+
+
+class ConstraintIndex:
+    """制約ファイルの解析結果をメモリに保持するインデックス
+
+    特徴:
+    - 各ファイルは初回アクセス時に一度だけ解析
+    - mtime・サイズが変化したファイルのみ再解析
+    - 解析結果は不変のスナップショットとして差し替え（読み取り側はロック不要）
+    - ファイル監視（ConstraintWatcher）稼働中は読み取り側でファイルI/Oを行わない
+    - pin_snapshot で修飾した処理の実行中は同じスナップショットを参照し続ける
+    """
+
+    def __init__(self, constraints_dir: Path, pattern: str = "constraints*.txt"):
+        self.constraints_dir = Path(constraints_dir)
+        self.pattern = pattern
+        self._lock = threading.Lock()
+        self._snapshot = ConstraintSnapshot(version=0)
+        self._watched = False
+        self._listeners: List[Callable[[ConstraintSnapshot], None]] = []
+        self._pinned: ContextVar[Optional[ConstraintSnapshot]] = ContextVar(
+            f"constraint_snapshot_{id(self)}", default=None
+        )
+
+    @property
+    def version(self) -> int:
+        """現在のスナップショットのバージョン（再解析のたびに増加）"""
+        return self._snapshot.version
+
+    def snapshot(self) -> ConstraintSnapshot:
+        """最新のスナップショットを返す
+
+        処理中に固定されたスナップショットがあればそれを返す。
+        ファイル監視が稼働していない場合は変更を確認してから返す。
+        """
+        pinned = self._pinned.get()
+        if pinned is not None:
+            return pinned
+        if not self._watched or self._snapshot.version == 0:
+            self.refresh()
+        return self._snapshot
+
+    def set_watched(self, watched: bool) -> None:
+        """ファイル監視の稼働状態を設定（稼働中は snapshot() で変更確認を省略）"""
+        self._watched = watched
+
+    def add_listener(self, listener: Callable[[ConstraintSnapshot], None]) -> None:
+        """スナップショット差し替え時に呼び出すコールバックを登録
+
+        コールバックは差し替えを行ったスレッド（監視中は監視スレッド）で実行されるため、
+        派生データの事前構築をリクエスト処理の外で行える。
+        """
+        self._listeners.append(listener)
+
+    def pin_snapshot(self, func):
+        """非同期関数の実行中、制約スナップショットを固定するデコレーター"""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if self._pinned.get() is not None:
+                return await func(*args, **kwargs)
+            token = self._pinned.set(self.snapshot())
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self._pinned.reset(token)
+        return wrapper
+
+    def refresh(self) -> bool:
+        """変更されたファイルを再解析する
+
+        Returns:
+            スナップショットが更新された場合True
+        """
+        with self._lock:
+            current = self._snapshot
+            files: Dict[str, ConstraintFile] = {}
+            changed = False
+
+            try:
+                paths = sorted(self.constraints_dir.glob(self.pattern))
+            except OSError as e:
+                logger.error(f"制約ディレクトリ走査エラー ({self.constraints_dir}): {e}")
+                return False
+
+            for path in paths:
+                domain = domain_for_path(path)
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+
+                previous = current.files.get(domain)
+                if previous and previous.mtime_ns == stat.st_mtime_ns and previous.size == stat.st_size:
+                    files[domain] = previous
+                    continue
+
+                parsed = self._parse_file(path, domain, stat.st_mtime_ns, stat.st_size)
+                if parsed:
+                    files[domain] = parsed
+                    changed = True
+                elif previous:
+                    # 読み込みに失敗した場合は直前の解析結果を維持
+                    files[domain] = previous
+
+            if files.keys() != current.files.keys():
+                changed = True
+
+            if not changed:
+                return False
+
+            snapshot = ConstraintSnapshot(version=current.version + 1, files=files)
+            self._snapshot = snapshot
+            logger.info(f"制約インデックス更新: v{snapshot.version} ({len(files)}ファイル)")
+
+        self._notify(snapshot)
+        return True
+
+    def install(self, files: Dict[str, ConstraintFile], notify: bool = True) -> ConstraintSnapshot:
+        """解析済みファイル群（制約パック等）をスナップショットとして差し替える
+
+        各ファイルの mtime・サイズは以降の変更検知の基準になるため、
+        現在のファイルと一致している必要がある。
+        """
+        with self._lock:
+            snapshot = ConstraintSnapshot(version=self._snapshot.version + 1, files=dict(files))
+            self._snapshot = snapshot
+            logger.info(f"制約インデックス読み込み: v{snapshot.version} ({len(files)}ファイル)")
+
+        if notify:
+            self._notify(snapshot)
+        return snapshot
+
+    def _notify(self, snapshot: ConstraintSnapshot) -> None:
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"制約インデックス更新通知エラー: {e}")
+
+    def _parse_file(self, path: Path, domain: str, mtime_ns: int, size: int) -> Optional[ConstraintFile]:
+        """制約ファイルを読み込んで解析"""
+        try:
+            content = path.read_text(encoding="utf-8")
+        except Exception as e:
+            logger.error(f"制約ファイル読み込みエラー ({path}): {e}")
+            return None
+
+        body, keywords, rules = parse_constraint_text(content, domain)
+        logger.debug(f"制約ファイル解析: {path.name} (ルール {len(rules)}件, キーワード {len(keywords)}個)")
+        return ConstraintFile(
+            path=path.resolve(),
+            domain=domain,
+            mtime_ns=mtime_ns,
+            size=size,
+            content=content,
+            body=body,
+            keywords=keywords,
+            rules=rules,
+        )
@@ -0,0 +1,213 @@
+"""
+CoreThink-MCP 制約パック
+
+constraints*.txt の解析結果（構造化ルール・キーワード表・分野検出器）を
+一つのバイナリファイルに事前コンパイルし、サーバー起動時の解析を省略する。
+
+パックには元の制約ファイル群のチェックサムを埋め込み、
+ファイルが編集されていれば読み込みを拒否してテキスト解析に戻る。
+復元時は許可したクラスのみを、import 経路（src.corethink_mcp / corethink_mcp）に
+関係なくこのモジュールが参照しているクラスに解決する。
+
+使い方:
+    corethink-build-constraints [--constraints-dir DIR] [--output FILE] [--check]
+"""
+
+import argparse
+import dataclasses
+import hashlib
+import io
+import logging
+import pathlib
+import pickle
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from .constraint_index import ConstraintFile, ConstraintIndex, ConstraintRule
+from .domain_detector import DomainMatcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONSTRAINTS_DIR = Path(__file__).parent / "constraints"
+PACK_FILENAME = "constraints.pack"
+
+# パックのファイル形式・解析結果の構造を変更した場合は必ず上げる
+PACK_FORMAT_VERSION = 3
+_MAGIC = b"CTPACK\x00"
+_DIGEST_SIZE = 32
+
+# パックに含めてよいクラス（クラス名 → 実体）
+_ALLOWED_CLASSES = {
+    "ConstraintFile": ConstraintFile,
+    "ConstraintRule": ConstraintRule,
+    "DomainMatcher": DomainMatcher,
+    "PosixPath": pathlib.PosixPath,
+    "PurePosixPath": pathlib.PurePosixPath,
+    "WindowsPath": pathlib.WindowsPath,
+    "PureWindowsPath": pathlib.PureWindowsPath,
+}
+
+
+@dataclass(frozen=True)
+class ConstraintPack:
+    """事前コンパイル済み制約パック"""
+    source_checksum: str  # 元の制約ファイル群のSHA-256
+    files: Dict[str, ConstraintFile]  # 分野 → 解析済みファイル
+    keywords: Dict[str, list]  # 分野 → 検出用キーワード
+    matcher: DomainMatcher  # キーワード表をコンパイル済みの分野検出器
+
+
+def default_pack_path(constraints_dir: Path) -> Path:
+    return Path(constraints_dir) / PACK_FILENAME
+
+
+def compute_source_checksum(constraints_dir: Path, pattern: str = "constraints*.txt") -> str:
+    """制約ファイル群（ファイル名と内容）のチェックサムを計算"""
+    digest = hashlib.sha256()
+    digest.update(f"corethink-constraint-pack:{PACK_FORMAT_VERSION}".encode("utf-8"))
+    for path in sorted(Path(constraints_dir).glob(pattern)):
+        digest.update(b"\x00" + path.name.encode("utf-8") + b"\x00")
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def build_pack(constraints_dir: Path = DEFAULT_CONSTRAINTS_DIR, output: Optional[Path] = None) -> Path:
+    """制約ファイルを解析してパックを書き出す
+
+    Returns:
+        書き出したパックのパス
+    """
+    constraints_dir = Path(constraints_dir)
+    output = Path(output) if output else default_pack_path(constraints_dir)
+
+    checksum = compute_source_checksum(constraints_dir)
+    snapshot = ConstraintIndex(constraints_dir).snapshot()
+    if not snapshot.files:
+        raise FileNotFoundError(f"制約ファイルが見つかりません: {constraints_dir}")
+
+    keywords = snapshot.keywords()
+    data = {
+        "format_version": PACK_FORMAT_VERSION,
+        "source_checksum": checksum,
+        # パスはファイル名のみ保存し、読み込み時に実際の配置へ解決する
+        "files": {
+            domain: dataclasses.replace(constraint_file, path=Path(constraint_file.path.name))
+            for domain, constraint_file in snapshot.files.items()
+        },
+        "keywords": keywords,
+        "matcher": DomainMatcher(keywords),
+    }
+
+    payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path = output.with_name(output.name + ".tmp")
+    tmp_path.write_bytes(_MAGIC + hashlib.sha256(payload).digest() + payload)
+    # 書き込み途中のパックを読ませないよう置き換えで差し替える
+    tmp_path.replace(output)
+
+    logger.info(f"制約パック生成: {output} ({len(snapshot.files)}ファイル, {len(payload)}バイト)")
+    return output
+
+
+def load_pack(constraints_dir: Path = DEFAULT_CONSTRAINTS_DIR, pack_path: Optional[Path] = None) -> Optional[ConstraintPack]:
+    """パックを読み込む
+
+    パックが存在しない・破損している・制約ファイルと一致しない場合はNoneを返す
+    （呼び出し元はテキスト解析に戻る）。
+    """
+    constraints_dir = Path(constraints_dir)
+    pack_path = Path(pack_path) if pack_path else default_pack_path(constraints_dir)
+
+    try:
+        raw = pack_path.read_bytes()
+    except FileNotFoundError:
+        logger.debug(f"制約パックなし: {pack_path}")
+        return None
+    except OSError as e:
+        logger.warning(f"制約パック読み込みエラー ({pack_path}): {e}")
+        return None
+
+    header_size = len(_MAGIC) + _DIGEST_SIZE
+    payload = raw[header_size:]
+    if not raw.startswith(_MAGIC) or hashlib.sha256(payload).digest() != raw[len(_MAGIC):header_size]:
+        logger.warning(f"制約パックが破損しています。テキスト解析を使用します: {pack_path}")
+        return None
+
+    try:
+        data = _PackUnpickler(io.BytesIO(payload)).load()
+    except Exception as e:
+        logger.warning(f"制約パック復元エラー。テキスト解析を使用します: {e}")
+        return None
+
+    if not isinstance(data, dict) or data.get("format_version") != PACK_FORMAT_VERSION:
+        logger.warning(f"制約パックの形式が古いため使用しません: {pack_path}")
+        return None
+
+    try:
+        checksum = compute_source_checksum(constraints_dir)
+    except OSError as e:
+        logger.warning(f"制約ファイルのチェックサム計算エラー: {e}")
+        return None
+    if checksum != data["source_checksum"]:
+        logger.info("制約ファイルがパック生成後に変更されています。テキスト解析を使用します")
+        return None
+
+    try:
+        # mtime・サイズは現在のファイルから取得し、以降の変更検知の基準にする
+        files: Dict[str, ConstraintFile] = {}
+        for domain, constraint_file in data["files"].items():
+            path = constraints_dir / constraint_file.path.name
+            stat = path.stat()
+            files[domain] = dataclasses.replace(
+                constraint_file, path=path.resolve(), mtime_ns=stat.st_mtime_ns, size=stat.st_size
+            )
+        return ConstraintPack(
+            source_checksum=data["source_checksum"],
+            files=files,
+            keywords=data["keywords"],
+            matcher=data["matcher"],
+        )
+    except (KeyError, AttributeError, TypeError, OSError) as e:
+        logger.warning(f"制約パックの内容が不正です。テキスト解析を使用します: {e}")
+        return None
+
+
+class _PackUnpickler(pickle.Unpickler):
+    """許可したクラスのみを復元する Unpickler"""
+
+    def find_class(self, module: str, name: str):
+        if name in _ALLOWED_CLASSES and module.startswith(("corethink_mcp", "src.corethink_mcp", "pathlib")):
+            return _ALLOWED_CLASSES[name]
+        raise pickle.UnpicklingError(f"制約パックに許可されていないクラスが含まれています: {module}.{name}")
+
+
+def main(argv=None) -> int:
+    """build-constraints エントリーポイント"""
+    parser = argparse.ArgumentParser(description="制約ファイルを事前コンパイルした制約パックを生成")
+    parser.add_argument("--constraints-dir", type=Path, default=DEFAULT_CONSTRAINTS_DIR, help="制約ファイルのディレクトリ")
+    parser.add_argument("--output", type=Path, default=None, help=f"出力先（既定: <制約ディレクトリ>/{PACK_FILENAME}）")
+    parser.add_argument("--check", action="store_true", help="既存パックが最新かどうかだけを確認")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+
+    if args.check:
+        pack = load_pack(args.constraints_dir, args.output)
+        if pack is None:
+            print("制約パックは存在しないか古くなっています", file=sys.stderr)
+            return 1
+        print(f"制約パックは最新です ({len(pack.files)}ファイル)")
+        return 0
+
+    try:
+        output = build_pack(args.constraints_dir, args.output)
+    except Exception as e:
+        print(f"制約パック生成エラー: {str(e)}", file=sys.stderr)
+        return 1
+    print(f"制約パックを生成しました: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
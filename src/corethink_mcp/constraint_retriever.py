@@ -0,0 +1,144 @@
+"""
+CoreThink-MCP 制約ルール検索
+
+個々の制約ルールに対する転置インデックスを構築し、
+BM25 で提案変更・トピックとの関連度が高いルールを上位k件返す
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .constraint_index import ConstraintRule
+
+# 英数字語・漢字列・カタカナ列（ひらがなは助詞・活用語尾が多いため索引しない）
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9_+\-.]*|[\u4e00-\u9fff\u3005]+|[\u30a1-\u30fa\u30fc]+")
+_ASCII_PATTERN = re.compile(r"[a-z0-9]")
+
+# BM25 パラメータ
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """日本語を考慮したトークン分割
+
+    英数字は単語単位、漢字列・カタカナ列は文字バイグラム（1文字の場合はその文字）に分割する。
+    形態素解析器なしで「融資審査」と「審査」のような部分一致を拾える。
+    """
+    tokens: List[str] = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        run = match.group()
+        if _ASCII_PATTERN.match(run):
+            tokens.append(run.rstrip(".-"))
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+@dataclass(frozen=True)
+class ScoredRule:
+    """関連度付きルール"""
+    rule: ConstraintRule
+    score: float
+
+    def render(self) -> str:
+        """`LEVEL: text（分野 / 節）` 形式で出力"""
+        origin = f"{self.rule.domain} / {self.rule.section}" if self.rule.section else self.rule.domain
+        return f"{self.rule.render()}（{origin}）"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "level": self.rule.level,
+            "domain": self.rule.domain,
+            "section": self.rule.section,
+            "rule": self.rule.text,
+            "score": round(self.score, 4),
+        }
+
+
+class RuleRetriever:
+    """制約ルールの BM25 検索インデックス
+
+    構築時に全ルール（本文と節名）をトークン化して転置インデックスを作り、
+    検索時はクエリのトークンに対応する転置リストだけを走査する。
+    """
+
+    def __init__(self, rules: Iterable[ConstraintRule]):
+        self.rules: Tuple[ConstraintRule, ...] = tuple(rules)
+
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths: List[int] = []
+        for index, rule in enumerate(self.rules):
+            counts = Counter(tokenize(f"{rule.section} {rule.text}"))
+            lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                postings.setdefault(term, []).append((index, frequency))
+
+        self._postings = postings
+        average_length = (sum(lengths) / len(lengths)) if lengths else 1.0
+        # 文書長による正規化項は検索ごとに変わらないため事前計算
+        self._norms = [BM25_K1 * (1 - BM25_B + BM25_B * length / (average_length or 1.0)) for length in lengths]
+        document_count = len(self.rules)
+        self._idf = {
+            term: math.log(1 + (document_count - len(entries) + 0.5) / (len(entries) + 0.5))
+            for term, entries in postings.items()
+        }
+
+    @property
+    def term_count(self) -> int:
+        return len(self._postings)
+
+    def search(self, query: str, k: int = 10, domain: Optional[str] = None) -> List[ScoredRule]:
+        """関連度の高い順に最大k件のルールを返す（関連語を含まないルールは返さない）
+
+        Args:
+            query: 提案変更・トピック
+            k: 返す件数の上限
+            domain: 指定した場合はその分野のルールのみを対象にする
+        """
+        if not self.rules or k <= 0:
+            return []
+
+        scores: Dict[int, float] = {}
+        norms = self._norms
+        for term in set(tokenize(query)):
+            entries = self._postings.get(term)
+            if not entries:
+                continue
+            idf = self._idf[term]
+            for index, frequency in entries:
+                scores[index] = scores.get(index, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norms[index])
+
+        if domain is not None:
+            scores = {index: score for index, score in scores.items() if self.rules[index].domain == domain}
+        ranked = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [ScoredRule(self.rules[index], score) for index, score in ranked]
+
+    def rank(self, query: str) -> List[ScoredRule]:
+        """全ルールを関連度順に並べる（関連語を含まないルールは記載順で後ろに付ける）"""
+        results = self.search(query, len(self.rules))
+        chosen = {id(scored.rule) for scored in results}
+        results.extend(ScoredRule(rule, 0.0) for rule in self.rules if id(rule) not in chosen)
+        return results
+
+    def top_k(self, query: str, k: int = 10, domain: Optional[str] = None) -> List[ScoredRule]:
+        """関連ルール上位k件（不足分は NEVER → MUST ルールを記載順に補完）"""
+        results = self.search(query, k, domain)
+        if len(results) >= k:
+            return results
+
+        chosen = {id(scored.rule) for scored in results}
+        for level in ("NEVER", "MUST"):
+            for rule in self.rules:
+                if len(results) >= k:
+                    return results
+                if rule.level == level and id(rule) not in chosen and domain in (None, rule.domain):
+                    chosen.add(id(rule))
+                    results.append(ScoredRule(rule, 0.0))
+        return results
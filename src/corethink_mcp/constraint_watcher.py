@@ -0,0 +1,145 @@
+"""
+CoreThink-MCP 制約ファイル監視
+
+制約ディレクトリの変更をバックグラウンドスレッドで検知して ConstraintIndex を再構築する。
+Linux では inotify（ctypes 経由）で変更を待ち受け、利用できない環境ではポーリングで代替する。
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import sys
+import threading
+from typing import Optional
+
+from .constraint_index import ConstraintIndex
+
+logger = logging.getLogger(__name__)
+
+# inotify イベントマスク（linux/inotify.h）
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+# 連続書き込みをまとめて1回の再構築にするための待機時間
+_DEBOUNCE_SECONDS = 0.05
+
+
+class _Inotify:
+    """ディレクトリ1つを監視する最小限の inotify ラッパー"""
+
+    def __init__(self, directory: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed: {directory}")
+
+    def wait(self, timeout: float) -> bool:
+        """イベントを待ち受ける（イベントがあればTrue）"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        self.drain()
+        return True
+
+    def drain(self) -> None:
+        """溜まったイベントを読み捨てる（内容は使わず再スキャンで差分を判定）"""
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class ConstraintWatcher:
+    """制約ファイルの変更を監視して ConstraintIndex を差し替えるバックグラウンドスレッド
+
+    再解析はすべて監視スレッドで行われ、リクエスト処理側は
+    差し替え済みのスナップショットを参照するだけになる。
+    """
+
+    def __init__(self, index: ConstraintIndex, poll_interval: float = 2.0, use_inotify: bool = True):
+        self.index = index
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.mode = "stopped"
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """監視を開始（初回解析は呼び出し元で同期的に実行）"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self.index.refresh()
+
+        inotify = None
+        if self.use_inotify and sys.platform.startswith("linux"):
+            try:
+                inotify = _Inotify(str(self.index.constraints_dir))
+            except Exception as e:
+                logger.warning(f"inotifyが利用できないためポーリング監視に切り替えます: {e}")
+
+        self.mode = "inotify" if inotify else "polling"
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(inotify,), name="corethink-constraint-watcher", daemon=True
+        )
+        self.index.set_watched(True)
+        self._thread.start()
+        logger.info(f"制約ファイル監視開始: {self.index.constraints_dir} ({self.mode}, {self.poll_interval}秒)")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """監視を停止（以降は読み取り時に変更確認を行う）"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout if timeout is not None else self.poll_interval + 1)
+        self.index.set_watched(False)
+        self.mode = "stopped"
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self, inotify: Optional[_Inotify]) -> None:
+        try:
+            while not self._stop_event.is_set():
+                if inotify:
+                    # イベント待ち（タイムアウト時も取りこぼし対策として再スキャン）
+                    if inotify.wait(self.poll_interval) and not self._stop_event.wait(_DEBOUNCE_SECONDS):
+                        inotify.drain()
+                elif self._stop_event.wait(self.poll_interval):
+                    break
+
+                if self._stop_event.is_set():
+                    break
+
+                try:
+                    self.index.refresh()
+                except Exception as e:
+                    logger.error(f"制約ファイル再読み込みエラー: {e}")
+        finally:
+            if inotify:
+                inotify.close()
+            # 監視が止まった場合は読み取り時の変更確認に戻す
+            self.index.set_watched(False)
+            logger.info("制約ファイル監視停止")
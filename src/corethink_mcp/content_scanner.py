@@ -0,0 +1,100 @@
+"""
+CoreThink-MCP ファイル内容スキャナー
+
+ファイルをメモリマップし、キーワードを UTF-8 バイト列として一定サイズのチャンクごとに検索する。
+一致位置の前後だけをデコードしたキーワード・イン・コンテキストの抜粋を返すため、
+ファイルサイズに関係なく使用メモリはチャンクサイズ程度に収まる。
+
+英字の大文字・小文字は区別しない（UTF-8 の ASCII 部分のみ小文字化して照合）。
+"""
+
+import logging
+import mmap
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+# 一致箇所の前後に含めるバイト数
+DEFAULT_CONTEXT_BYTES = 80
+DEFAULT_MAX_WINDOWS = 20
+
+
+@dataclass(frozen=True)
+class KeywordWindow:
+    """キーワードの一致箇所と前後の文脈"""
+    keyword: str
+    offset: int  # 一致位置（バイトオフセット）
+    line_number: int  # 一致位置の行番号（1始まり）
+    text: str  # 前後の文脈（改行は空白に置換）
+
+    def render(self) -> str:
+        return f"…{self.text}…"
+
+
+def scan_file(
+    path: Path,
+    keywords: Iterable[str],
+    context_bytes: int = DEFAULT_CONTEXT_BYTES,
+    max_windows: int = DEFAULT_MAX_WINDOWS,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> List[KeywordWindow]:
+    """ファイル内のキーワード一致箇所を先頭から最大 max_windows 件返す
+
+    チャンク境界をまたぐ一致を取りこぼさないよう、チャンクは最長キーワード長 - 1 バイトずつ重ねて読む。
+    """
+    patterns = [(keyword, keyword.lower().encode("utf-8")) for keyword in dict.fromkeys(keywords) if keyword]
+    if not patterns or max_windows <= 0:
+        return []
+    overlap = max(len(encoded) for _, encoded in patterns) - 1
+
+    try:
+        with open(path, "rb") as handle:
+            try:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return []  # 空ファイル
+            with mapped:
+                return _scan_mapped(mapped, patterns, overlap, context_bytes, max_windows, max(chunk_bytes, overlap + 1))
+    except OSError as e:
+        logger.debug(f"内容スキャンスキップ ({path}): {e}")
+        return []
+
+
+def _scan_mapped(mapped, patterns, overlap: int, context_bytes: int, max_windows: int, chunk_bytes: int) -> List[KeywordWindow]:
+    size = len(mapped)
+    windows: List[KeywordWindow] = []
+    lines_before = 0  # チャンク先頭より前の改行数
+    start = 0
+    while start < size:
+        end = min(size, start + chunk_bytes)
+        chunk = mapped[start:min(size, end + overlap)].lower()
+
+        found = []
+        for keyword, encoded in patterns:
+            position = chunk.find(encoded)
+            # 重なり部分から始まる一致は次のチャンクで数える
+            while position != -1 and start + position < end:
+                found.append((position, keyword, encoded))
+                position = chunk.find(encoded, position + 1)
+
+        for position, keyword, encoded in sorted(found, key=lambda item: item[0]):
+            offset = start + position
+            context_start = max(0, offset - context_bytes)
+            context_end = min(size, offset + len(encoded) + context_bytes)
+            # 文脈の両端で分断された多バイト文字は捨てる
+            text = mapped[context_start:context_end].decode("utf-8", errors="ignore")
+            windows.append(KeywordWindow(
+                keyword=keyword,
+                offset=offset,
+                line_number=lines_before + chunk.count(b"\n", 0, position) + 1,
+                text=" ".join(text.split()),
+            ))
+            if len(windows) >= max_windows:
+                return windows
+
+        lines_before += chunk.count(b"\n", 0, end - start)
+        start = end
+    return windows
@@ -0,0 +1,124 @@
+"""
+CoreThink-MCP 推論コンテキストパッカー
+
+制約ルール・推論材料を優先度順に文字数予算の範囲で詰め込み、
+予算に収まらず除外・省略した項目を報告する
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+# 優先度（小さいほど先に詰める）
+PRIORITY_CRITICAL_RULES = 0  # NEVER / MUST ルール
+PRIORITY_DOMAIN_RULES = 1  # その他（SHOULD）のルール
+PRIORITY_PRECEDENTS = 2  # 先例・前例
+PRIORITY_MATERIALS = 3  # その他の推論材料
+
+# 残り予算がこれ未満の場合は複数行項目の部分採用を行わない
+MIN_PARTIAL_CHARS = 120
+TRUNCATION_MARK = "…（予算超過のため以下省略）"
+
+
+@dataclass(frozen=True)
+class ContextItem:
+    """パック対象の項目"""
+    priority: int
+    group: str  # 出力時の見出し
+    label: str  # 除外報告用の名前
+    text: str
+
+
+@dataclass
+class PackedContext:
+    """パック結果"""
+    text: str
+    budget: int
+    used: int
+    included_count: int
+    dropped: List[Tuple[str, int]] = field(default_factory=list)  # (項目名, 文字数)
+    truncated: List[str] = field(default_factory=list)
+
+    @property
+    def dropped_chars(self) -> int:
+        return sum(chars for _, chars in self.dropped)
+
+    def summary(self) -> str:
+        """予算使用状況と除外項目の要約"""
+        lines = [f"{self.used}/{self.budget}文字使用（{self.included_count}項目）"]
+        if self.truncated:
+            lines.append(f"一部省略: {', '.join(self.truncated)}")
+        if self.dropped:
+            names = ", ".join(label for label, _ in self.dropped[:5])
+            more = f" 他{len(self.dropped) - 5}件" if len(self.dropped) > 5 else ""
+            lines.append(f"除外: {len(self.dropped)}項目・{self.dropped_chars}文字（{names}{more}）")
+        return "\n".join(lines)
+
+
+class ContextPacker:
+    """文字数予算付きのコンテキストパッカー
+
+    項目を優先度順（同じ優先度では追加順）に採用し、収まらない項目は除外する。
+    複数行の項目は残り予算に収まる行までを部分採用する。
+    出力は見出し（group）ごとにまとめ、見出しの文字数も予算に含める。
+    """
+
+    def __init__(self, budget: int):
+        self.budget = max(0, int(budget))
+        self._items: List[ContextItem] = []
+
+    def add(self, priority: int, group: str, label: str, text: str) -> None:
+        text = text.strip()
+        if text:
+            self._items.append(ContextItem(priority, group, label, text))
+
+    def pack(self) -> PackedContext:
+        ordered = sorted(enumerate(self._items), key=lambda entry: (entry[1].priority, entry[0]))
+        groups: Dict[str, List[str]] = {}
+        remaining = self.budget
+        included = 0
+        dropped: List[Tuple[str, int]] = []
+        truncated: List[str] = []
+
+        for _, item in ordered:
+            # 見出し「【group】」と見出し間の空行の分
+            heading_cost = 0 if item.group in groups else len(item.group) + 5
+            cost = heading_cost + len(item.text) + 1
+            if cost <= remaining:
+                groups.setdefault(item.group, []).append(item.text)
+                remaining -= cost
+                included += 1
+                continue
+
+            partial = self._partial(item.text, remaining - heading_cost - len(TRUNCATION_MARK) - 2)
+            if partial:
+                text = f"{partial}\n{TRUNCATION_MARK}"
+                groups.setdefault(item.group, []).append(text)
+                remaining -= heading_cost + len(text) + 1
+                included += 1
+                truncated.append(item.label)
+            else:
+                dropped.append((item.label, len(item.text)))
+
+        text = "\n\n".join(f"【{group}】\n" + "\n".join(texts) for group, texts in groups.items())
+        return PackedContext(
+            text=text,
+            budget=self.budget,
+            used=len(text),
+            included_count=included,
+            dropped=dropped,
+            truncated=truncated,
+        )
+
+    @staticmethod
+    def _partial(text: str, limit: int) -> str:
+        """残り予算に収まる先頭の行だけを取り出す（収まる行がなければ空文字）"""
+        if limit < MIN_PARTIAL_CHARS or "\n" not in text:
+            return ""
+        kept: List[str] = []
+        size = 0
+        for line in text.splitlines():
+            if size + len(line) + 1 > limit:
+                break
+            kept.append(line)
+            size += len(line) + 1
+        return "\n".join(kept)
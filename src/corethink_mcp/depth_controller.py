@@ -0,0 +1,179 @@
+"""
+CoreThink-MCP 適応的深度制御
+
+要求の複雑度（入力の長さ・検出された分野数・リスクキーワード・類似した過去の要求）を
+0〜1 のスコアとして見積もり、context_depth（= 実行する GSR ステージ）、収集する材料の種類、
+Sampling の使用を決める。単純な要求は minimal で即座に返し、
+複雑な要求だけが comprehensive の収集・推論を行う。
+"""
+
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, FrozenSet, Tuple
+
+from .constraint_retriever import tokenize
+
+# 変更の影響が大きいことを示すキーワード（小文字で照合、英字は単語単位）
+RISK_KEYWORDS = (
+    "本番", "production", "prod", "削除", "delete", "drop", "truncate", "rm -rf", "force",
+    "マイグレーション", "migration", "移行", "スキーマ", "schema", "データベース", "database",
+    "セキュリティ", "security", "脆弱性", "認証", "auth", "権限", "permission", "暗号", "secret", "token",
+    "個人情報", "pii", "決済", "payment", "課金", "互換性", "breaking", "ロールバック", "rollback",
+    "並行", "concurrency", "race", "デッドロック", "障害", "outage", "incident",
+)
+
+# スコアの重み（合計 1.0）
+WEIGHT_LENGTH = 0.25
+WEIGHT_DOMAINS = 0.25
+WEIGHT_RISK = 0.35
+WEIGHT_HISTORY = 0.15
+
+# この文字数・分野数・リスクキーワード数で各要素が最大になる
+LENGTH_SATURATION = 800
+DOMAIN_SATURATION = 3
+RISK_SATURATION = 3
+
+# 深度の境界（スコアがこれ未満ならその深度）。ADAPTIVE_DEPTH_THRESHOLD で全体をずらす
+DEPTH_BOUNDARIES = (("minimal", 0.2), ("standard", 0.45), ("deep", 0.7))
+THRESHOLD_SHIFT = {"low": -0.1, "medium": 0.0, "auto": 0.0, "high": 0.1}
+
+# 深度ごとに収集する材料（先頭ほど優先）
+MATERIALS_BY_DEPTH = {
+    "minimal": ["constraints"],
+    "standard": ["constraints", "precedents"],
+    "deep": ["constraints", "precedents", "risk_factors", "implications"],
+    "comprehensive": [
+        "constraints", "precedents", "risk_factors", "implications",
+        "domain_knowledge", "symbolic_patterns", "repository_context",
+    ],
+}
+# 判断の種類ごとに必ず収集する材料
+REQUIRED_MATERIALS = {
+    "evaluate_and_decide": ["constraints"],
+    "validate_compliance": ["constraints"],
+    "analyze_risks": ["risk_factors"],
+    "find_solution": ["implications"],
+}
+# Sampling を使う深度
+SAMPLING_DEPTHS = frozenset({"deep", "comprehensive"})
+
+# 類似した過去の要求とみなす語集合の Jaccard 係数
+SIMILARITY_THRESHOLD = 0.5
+# 過去の推論の信頼度が HIGH でなかった場合に、類似要求のスコアに加える値
+LOW_CONFIDENCE_BOOST = 0.2
+DEFAULT_HISTORY_SIZE = 256
+
+_WHITESPACE = re.compile(r"\s+")
+_RISK_PATTERNS = [
+    (keyword, re.compile(rf"(?<![a-z0-9_]){re.escape(keyword)}(?![a-z0-9_])" if keyword.isascii() else re.escape(keyword)))
+    for keyword in RISK_KEYWORDS
+]
+
+
+@dataclass(frozen=True)
+class ComplexityEstimate:
+    """複雑度の見積もりと、それに基づく実行計画"""
+    score: float
+    depth: str
+    material_types: Tuple[str, ...]
+    use_sampling: bool
+    factors: Dict[str, float] = field(default_factory=dict)  # 要素ごとの寄与（重み付け前、0〜1）
+    risk_keywords: Tuple[str, ...] = ()
+
+    def summary(self) -> str:
+        """見積もりの要約（応答・推論ログ用）"""
+        labels = {"length": "長さ", "domains": "分野", "risk": "リスク", "history": "類似履歴"}
+        factors = ", ".join(f"{labels.get(name, name)} {value:.2f}" for name, value in self.factors.items())
+        text = f"複雑度 {self.score:.2f} → {self.depth}（{factors}）"
+        if self.risk_keywords:
+            text += f" リスク語: {', '.join(self.risk_keywords[:5])}"
+        return text
+
+
+class DepthController:
+    """複雑度に基づく深度・材料・Sampling の選択"""
+
+    def __init__(self, history_size: int = DEFAULT_HISTORY_SIZE):
+        # (語集合, 要求時のスコア) の履歴（古いものから破棄）
+        self._history: Deque[Tuple[FrozenSet[str], float]] = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    def estimate(
+        self,
+        text: str,
+        domain_count: int,
+        required_judgment: str = "evaluate_and_decide",
+        threshold: str = "auto",
+        max_materials: int = 0,
+        sampling_available: bool = False,
+    ) -> ComplexityEstimate:
+        """要求の複雑度を見積もり、深度・材料・Sampling の使用を決める"""
+        normalized = _WHITESPACE.sub(" ", text).strip()
+        lowered = normalized.lower()
+        risk_keywords = tuple(keyword for keyword, pattern in _RISK_PATTERNS if pattern.search(lowered))
+        factors = {
+            "length": min(1.0, len(normalized) / LENGTH_SATURATION),
+            "domains": min(1.0, domain_count / DOMAIN_SATURATION),
+            "risk": min(1.0, len(risk_keywords) / RISK_SATURATION),
+            "history": self._history_factor(frozenset(tokenize(normalized))),
+        }
+        score = (
+            WEIGHT_LENGTH * factors["length"]
+            + WEIGHT_DOMAINS * factors["domains"]
+            + WEIGHT_RISK * factors["risk"]
+            + WEIGHT_HISTORY * factors["history"]
+        )
+
+        shift = THRESHOLD_SHIFT.get(threshold, 0.0)
+        depth = "comprehensive"
+        for candidate, boundary in DEPTH_BOUNDARIES:
+            if score < boundary + shift:
+                depth = candidate
+                break
+
+        materials = list(dict.fromkeys(REQUIRED_MATERIALS.get(required_judgment, []) + MATERIALS_BY_DEPTH[depth]))
+        if max_materials > 0:
+            materials = materials[:max_materials]
+
+        return ComplexityEstimate(
+            score=round(score, 3),
+            depth=depth,
+            material_types=tuple(materials),
+            use_sampling=sampling_available and depth in SAMPLING_DEPTHS,
+            factors={name: round(value, 3) for name, value in factors.items()},
+            risk_keywords=risk_keywords,
+        )
+
+    def record(self, text: str, score: float, confidence: str) -> None:
+        """推論結果を履歴に記録（信頼度が HIGH でなければ、類似要求を次回より深く扱う）"""
+        terms = frozenset(tokenize(_WHITESPACE.sub(" ", text).strip()))
+        if not terms:
+            return
+        if not confidence.startswith("HIGH"):
+            score = min(1.0, score + LOW_CONFIDENCE_BOOST)
+        with self._lock:
+            self._history.append((terms, score))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._history.clear()
+
+    def _history_factor(self, terms: FrozenSet[str]) -> float:
+        """最も類似した過去の要求のスコア（類似要求がなければ0）"""
+        if not terms:
+            return 0.0
+        best_similarity = 0.0
+        best_score = 0.0
+        with self._lock:
+            history = list(self._history)
+        for past_terms, past_score in history:
+            similarity = len(terms & past_terms) / len(terms | past_terms)
+            if similarity >= SIMILARITY_THRESHOLD and similarity > best_similarity:
+                best_similarity, best_score = similarity, past_score
+        return best_score
+
+
+# グローバルインスタンス
+depth_controller = DepthController()
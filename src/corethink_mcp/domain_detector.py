@@ -0,0 +1,99 @@
+"""
+CoreThink-MCP 分野検出器
+
+全分野のキーワードを一度だけ小文字化・重複除去した表にコンパイルし、
+ユーザー要求から検出された全分野を返す（ヒット数・出現位置は参照時に数える）
+"""
+
+import logging
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 複数分野が検出された場合の優先順位
+DOMAIN_PRIORITY = ["safety_critical", "medical", "legal", "financial", "ai_ml", "engineering", "cloud_devops"]
+
+
+@dataclass
+class DomainMatch:
+    """分野ごとの検出結果（ヒット数・出現位置は最初の参照時に数える）"""
+    domain: str
+    keyword: str  # 検出を確定したキーワード
+    text: str = field(default="", repr=False)  # 小文字化済みの入力
+    candidates: Tuple[str, ...] = field(default=(), repr=False)  # 分野のキーワード（小文字化済み）
+
+    @cached_property
+    def positions(self) -> List[Tuple[int, str]]:
+        """全キーワードの出現位置 (開始位置, キーワード)"""
+        positions = []
+        for keyword in self.candidates:
+            index = self.text.find(keyword)
+            while index >= 0:
+                positions.append((index, keyword))
+                index = self.text.find(keyword, index + 1)
+        return positions
+
+    @property
+    def count(self) -> int:
+        """ヒット数"""
+        return len(self.positions)
+
+    @property
+    def keywords(self) -> List[str]:
+        """ヒットしたキーワード（重複除去・出現順）"""
+        return list(dict.fromkeys(keyword for _, keyword in sorted(self.positions)))
+
+
+class DomainMatcher:
+    """分野キーワードのコンパイル済み検出器
+
+    構築時に分野ごとのキーワードを小文字化・重複除去したタプルにする。
+    走査時は入力を一度だけ小文字化し、分野ごとに最初にヒットしたキーワードで検出を確定する
+    （部分文字列検査は C 実装の `in`）。ヒット数と出現位置は DomainMatch で参照されたときだけ数える。
+
+    64KB 入力での走査時間（scripts/benchmark_domain_detection.py で計測、日本語 / 英語）:
+    全キーワードの出現を str.find で列挙する方式 4.0ms / 1.6ms、
+    全キーワードを一つの選択正規表現にした単一パス 2.2ms / 15.0ms、
+    純Python の Aho-Corasick 3.8ms / 8.1ms に対し、最初のヒットで打ち切る本方式は 0.54ms / 0.15ms
+    （従来の分野ごとのループ 0.54ms / 0.17ms と同等）。
+    選択正規表現は CPython の re が入力の各位置で選択肢を順に試すため英語入力で遅く、
+    Aho-Corasick は1文字ごとにインタプリタを経由する。
+    """
+
+    def __init__(self, domain_keywords: Dict[str, List[str]]):
+        domains = []
+        for domain, keywords in domain_keywords.items():
+            normalized = tuple(dict.fromkeys(keyword.strip().lower() for keyword in keywords if keyword.strip()))
+            if normalized:
+                domains.append((domain, normalized))
+
+        # 分野 → キーワードのタプル（不変）
+        self._domains: Tuple[Tuple[str, Tuple[str, ...]], ...] = tuple(domains)
+        self.keyword_count = len({keyword for _, keywords in self._domains for keyword in keywords})
+
+    def scan(self, text: str) -> Dict[str, DomainMatch]:
+        """入力から検出された分野（分野ごとに最初にヒットしたキーワードで確定）"""
+        matches: Dict[str, DomainMatch] = {}
+        if not text:
+            return matches
+
+        text_lower = text.lower()
+        for domain, keywords in self._domains:
+            for keyword in keywords:
+                if keyword in text_lower:
+                    matches[domain] = DomainMatch(domain, keyword, text_lower, keywords)
+                    break
+
+        return matches
+
+    def detect(self, text: str) -> List[DomainMatch]:
+        """検出された分野を優先順位順に返す（優先順位外の分野はヒット数順で後ろに付ける）"""
+        matches = self.scan(text)
+        ordered = [matches[domain] for domain in DOMAIN_PRIORITY if domain in matches]
+        others = sorted(
+            (match for domain, match in matches.items() if domain not in DOMAIN_PRIORITY),
+            key=lambda match: -match.count,
+        )
+        return ordered + others
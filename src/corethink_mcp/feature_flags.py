@@ -12,6 +12,14 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# context_depth ごとの推論コンテキスト文字数予算の既定値
+DEFAULT_CONTEXT_BUDGET_CHARS = {
+    'minimal': 2000,
+    'standard': 6000,
+    'deep': 12000,
+    'comprehensive': 24000,
+}
+
 class FeatureFlags:
     """機能フラグ管理システム
     
@@ -42,12 +50,55 @@ class FeatureFlags:
             
             # 適応的深度制御
             'ENABLE_ADAPTIVE_DEPTH': False,
-            'ADAPTIVE_DEPTH_THRESHOLD': 'auto',  # 'auto', 'low', 'medium', 'high'
-            'DEPTH_CONTROL_MAX_TOOLS': 5,
+            'ADAPTIVE_DEPTH_THRESHOLD': 'auto',  # 'auto', 'low', 'medium', 'high'（low ほど深い深度を選びやすい）
+            'DEPTH_CONTROL_MAX_TOOLS': 5,  # 適応的深度制御で収集する材料の種類の上限
             
             # パフォーマンス制御
             'MAX_CONCURRENT_TOOLS': 3,
             'TOOL_TIMEOUT_SECONDS': 30.0,
+            'COLLECTOR_TIMEOUT_SECONDS': {},  # 材料タイプごとのコレクター期限（未指定は TOOL_TIMEOUT_SECONDS）
+            'BATCH_MAX_CONCURRENCY': 4,  # バッチ推論で同時に推論する項目数
+            'BATCH_MAX_ITEMS': 100,  # バッチ推論1回の項目数の上限
+            
+            # 制約ファイル監視（変更を検知して再起動なしで反映）
+            'ENABLE_CONSTRAINT_HOT_RELOAD': True,
+            'CONSTRAINT_RELOAD_INTERVAL_SECONDS': 2.0,
+            'ENABLE_CONSTRAINT_PACK': True,  # 事前コンパイル済み制約パックを起動時に使用
+            
+            # 推論コンテキストの文字数予算（context_depth ごと）
+            'CONTEXT_BUDGET_CHARS': dict(DEFAULT_CONTEXT_BUDGET_CHARS),
+            
+            # リポジトリ走査（git 追跡ファイル、git がなければ .gitignore 考慮の走査）
+            'REPO_SCAN_USE_GIT': True,
+            'REPO_SCAN_MAX_FILE_BYTES': 512 * 1024,
+            'REPO_STATS_MAX_WORKERS': 0,  # 初回統計の並列解析スレッド数（0 で自動）
+            
+            # リポジトリ索引（先例検索用の永続転置インデックス）
+            'ENABLE_REPO_INDEX': True,
+            'REPO_INDEX_PATH': 'logs/repo_index.sqlite',
+            'REPO_INDEX_REFRESH_SECONDS': 30.0,
+            'REPO_INDEX_WORKERS': 0,  # シャード分割トークン化のプロセス数（0 で CPU 数）
+            'REPO_INDEX_SHARDED_MIN_FILES': 1000,  # これ以上のファイルを読む場合のみプロセス並列
+            
+            # 変更履歴索引（git のコミット・差分を先例として検索）
+            'ENABLE_CHANGE_HISTORY_INDEX': True,
+            'CHANGE_HISTORY_INDEX_PATH': 'logs/change_history.sqlite',
+            'CHANGE_HISTORY_MAX_COMMITS': 2000,  # 1回の更新で索引するコミット数の上限
+            
+            # 推論材料キャッシュ（材料タイプごとの LRU+TTL）
+            'ENABLE_MATERIALS_CACHE': True,
+            'MATERIALS_CACHE_MAX_ENTRIES': 256,
+            'MATERIALS_CACHE_TTL_SECONDS': 300.0,
+            
+            # 推論結果キャッシュ（統合GSR推論の応答を SQLite に保存、再起動後も再利用）
+            'ENABLE_RESULT_CACHE': True,
+            'RESULT_CACHE_PATH': 'logs/result_cache.sqlite',
+            'RESULT_CACHE_MAX_ENTRIES': 512,
+            'RESULT_CACHE_TTL_SECONDS': 0.0,  # 0 で期限なし（制約・機能フラグ・索引の変更はキーで区別）
+            
+            # 応答サイズ
+            'RESPONSE_PROFILE': 'full',  # full / compact（装飾・定型文を省く）
+            'MAX_RESPONSE_CHARS': 0,  # 応答の文字数上限（0 で無制限、超える場合は長いセクションから要約）
             
             # デバッグ・監視
             'ENABLE_PERFORMANCE_MONITORING': False,
@@ -170,6 +221,93 @@ def is_adaptive_depth_enabled() -> bool:
     """適応的深度制御が有効かチェック"""
     return feature_flags.is_enabled('ENABLE_ADAPTIVE_DEPTH')
 
+def get_adaptive_depth_threshold() -> str:
+    """適応的深度制御の閾値（auto / low / medium / high）を取得"""
+    return str(feature_flags.get_config('ADAPTIVE_DEPTH_THRESHOLD', 'auto'))
+
+def get_depth_control_max_tools() -> int:
+    """適応的深度制御で収集する材料の種類の上限を取得"""
+    return int(feature_flags.get_config('DEPTH_CONTROL_MAX_TOOLS', 5))
+
+def is_constraint_hot_reload_enabled() -> bool:
+    """制約ファイル監視が有効かチェック"""
+    return feature_flags.is_enabled('ENABLE_CONSTRAINT_HOT_RELOAD')
+
+def is_constraint_pack_enabled() -> bool:
+    """事前コンパイル済み制約パックの使用が有効かチェック"""
+    return feature_flags.is_enabled('ENABLE_CONSTRAINT_PACK')
+
+def get_constraint_reload_interval() -> float:
+    """制約ファイル監視のポーリング間隔（秒）を取得"""
+    return feature_flags.get_config('CONSTRAINT_RELOAD_INTERVAL_SECONDS', 2.0)
+
+def get_context_budget(context_depth: str) -> int:
+    """推論コンテキストの文字数予算を取得（未設定の深度は standard の値）"""
+    budgets = dict(DEFAULT_CONTEXT_BUDGET_CHARS)
+    configured = feature_flags.get_config('CONTEXT_BUDGET_CHARS', {})
+    if isinstance(configured, dict):
+        budgets.update(configured)
+    return int(budgets.get(context_depth, budgets['standard']))
+
+def is_repo_index_enabled() -> bool:
+    """リポジトリ索引による先例検索が有効かチェック"""
+    return feature_flags.is_enabled('ENABLE_REPO_INDEX')
+
+def get_repo_index_path() -> str:
+    """リポジトリ索引ファイルのパスを取得"""
+    return feature_flags.get_config('REPO_INDEX_PATH', 'logs/repo_index.sqlite')
+
+def get_repo_index_refresh_interval() -> float:
+    """リポジトリ索引の差分更新間隔（秒）を取得"""
+    return feature_flags.get_config('REPO_INDEX_REFRESH_SECONDS', 30.0)
+
+def is_change_history_index_enabled() -> bool:
+    """変更履歴索引による先例検索が有効かチェック"""
+    return feature_flags.is_enabled('ENABLE_CHANGE_HISTORY_INDEX')
+
+def get_change_history_index_path() -> str:
+    """変更履歴索引ファイルのパスを取得"""
+    return feature_flags.get_config('CHANGE_HISTORY_INDEX_PATH', 'logs/change_history.sqlite')
+
+def is_materials_cache_enabled() -> bool:
+    """推論材料キャッシュが有効かチェック"""
+    return feature_flags.is_enabled('ENABLE_MATERIALS_CACHE')
+
+def is_result_cache_enabled() -> bool:
+    """推論結果キャッシュが有効かチェック"""
+    return feature_flags.is_enabled('ENABLE_RESULT_CACHE')
+
+def get_result_cache_path() -> str:
+    """推論結果キャッシュファイルのパスを取得"""
+    return feature_flags.get_config('RESULT_CACHE_PATH', 'logs/result_cache.sqlite')
+
+def get_response_profile() -> str:
+    """ツール応答の既定プロファイル（full / compact）を取得"""
+    return str(feature_flags.get_config('RESPONSE_PROFILE', 'full'))
+
+def get_max_response_chars() -> int:
+    """ツール応答の既定の文字数上限を取得（0 で無制限）"""
+    return max(0, int(feature_flags.get_config('MAX_RESPONSE_CHARS', 0)))
+
+def get_max_concurrent_tools() -> int:
+    """同時実行ツール（材料コレクター）数の上限を取得"""
+    return max(1, int(feature_flags.get_config('MAX_CONCURRENT_TOOLS', 3)))
+
+def get_batch_max_concurrency() -> int:
+    """バッチ推論で同時に推論する項目数の上限を取得"""
+    return max(1, int(feature_flags.get_config('BATCH_MAX_CONCURRENCY', 4)))
+
+def get_batch_max_items() -> int:
+    """バッチ推論1回の項目数の上限を取得"""
+    return max(1, int(feature_flags.get_config('BATCH_MAX_ITEMS', 100)))
+
+def get_collector_timeout(material_type: str) -> float:
+    """材料コレクターの期限（秒）を取得（個別指定がなければ TOOL_TIMEOUT_SECONDS）"""
+    configured = feature_flags.get_config('COLLECTOR_TIMEOUT_SECONDS', {})
+    if isinstance(configured, dict) and material_type in configured:
+        return float(configured[material_type])
+    return float(feature_flags.get_config('TOOL_TIMEOUT_SECONDS', 30.0))
+
 def get_sampling_timeout() -> float:
     """Samplingタイムアウト時間を取得"""
     return feature_flags.get_config('SAMPLING_TIMEOUT_SECONDS', 5.0)
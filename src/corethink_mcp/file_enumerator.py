@@ -0,0 +1,312 @@
+"""
+CoreThink-MCP リポジトリファイル列挙
+
+リポジトリ走査（先例索引・リポジトリ分析）で共有するファイル列挙器。
+git 管理下では git のインデックスに登録されたファイル（追跡ファイル）を、
+git が使えない場合は .gitignore を考慮した os.scandir 走査の結果を列挙する。
+
+- .sandbox（作業ツリーの複製）・.venv・node_modules などは常に除外
+- 先頭 8KB に NUL バイトを含むファイルはバイナリとして除外（判定結果は mtime・サイズごとに保持）
+- サイズ上限を超えるファイルは除外
+- 候補パスの一覧は (HEAD の SHA, インデックスの mtime) をキーに保持し、変わらない限り再列挙しない
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cancellation import check_cancelled
+
+# GitPython の import（エラーハンドリング付き）
+try:
+    import git
+    GIT_AVAILABLE = True
+except ImportError:
+    GIT_AVAILABLE = False
+    git = None
+
+logger = logging.getLogger(__name__)
+
+# 常に除外するディレクトリ（名前で判定、どの階層でも除外）
+DEFAULT_EXCLUDED_DIRS = frozenset({
+    ".git", ".sandbox", ".venv", "venv", "node_modules", "__pycache__",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox",
+})
+DEFAULT_MAX_FILE_BYTES = 512 * 1024
+# バイナリ判定で読む先頭バイト数
+SNIFF_BYTES = 8192
+# git が使えない場合の走査結果の保持秒数
+FALLBACK_TTL_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    """列挙されたファイル"""
+    path: str  # ルートからの相対パス（/ 区切り）
+    size: int
+    mtime_ns: int
+
+    @property
+    def suffix(self) -> str:
+        name = self.path.rsplit("/", 1)[-1]
+        return name[name.rfind("."):].lower() if "." in name[1:] else ""
+
+
+def is_binary(path: Path) -> bool:
+    """先頭 SNIFF_BYTES バイトに NUL を含むかでバイナリを判定"""
+    try:
+        with open(path, "rb") as handle:
+            return b"\x00" in handle.read(SNIFF_BYTES)
+    except OSError:
+        return True
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """gitignore のパターンを正規表現に変換（**・*・?・[...] に対応）"""
+    parts: List[str] = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**/", index):
+            parts.append("(?:.*/)?")
+            index += 3
+            continue
+        if pattern.startswith("/**", index) and index + 3 == len(pattern):
+            parts.append("/.*")
+            index += 3
+            continue
+        if pattern.startswith("**", index):
+            parts.append(".*")
+            index += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", index + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[index + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body}]")
+                index = end
+        elif char == "\\" and index + 1 < len(pattern):
+            index += 1
+            parts.append(re.escape(pattern[index]))
+        else:
+            parts.append(re.escape(char))
+        index += 1
+    return "".join(parts)
+
+
+@dataclass(frozen=True)
+class _IgnoreRule:
+    base: str  # .gitignore のあるディレクトリ（ルートからの相対パス、ルートは ""）
+    regex: "re.Pattern[str]"
+    negate: bool
+    dir_only: bool
+
+
+def parse_gitignore(text: str, base: str = "") -> List[_IgnoreRule]:
+    """.gitignore の内容を規則の並びに変換"""
+    rules: List[_IgnoreRule] = []
+    for raw_line in text.splitlines():
+        line = raw_line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        if line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        # 先頭・途中に / を含むパターンは .gitignore の位置からの相対、含まないものは任意の階層に一致
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if not line:
+            continue
+        body = _glob_to_regex(line)
+        regex = re.compile(f"^{body}$" if anchored else f"^(?:.*/)?{body}$")
+        rules.append(_IgnoreRule(base, regex, negate, dir_only))
+    return rules
+
+
+def is_ignored(rules: Iterable[_IgnoreRule], path: str, is_dir: bool) -> bool:
+    """規則を順に適用し、最後に一致した規則で無視するかを決める"""
+    ignored = False
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.base:
+            if not path.startswith(rule.base + "/"):
+                continue
+            relative = path[len(rule.base) + 1:]
+        else:
+            relative = path
+        if rule.regex.match(relative):
+            ignored = not rule.negate
+    return ignored
+
+
+class FileEnumerator:
+    """リポジトリのファイル列挙器
+
+    `files()` は候補パスの一覧（キャッシュ）を stat してサイズ上限・バイナリ判定を適用した結果を返す。
+    作業ツリー上の編集は mtime・サイズに反映されるため、候補一覧を作り直さなくても検知できる。
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+        excluded_dirs: Iterable[str] = (),
+        use_git: bool = True,
+    ):
+        self.root = Path(root).resolve()
+        self.max_file_bytes = max_file_bytes
+        self.excluded_dirs = frozenset(DEFAULT_EXCLUDED_DIRS | {Path(name).name for name in excluded_dirs})
+        self.use_git = use_git
+        self._lock = threading.Lock()
+        self._cache_key: Optional[Tuple[str, int]] = None
+        self._cached_at = 0.0
+        self._candidates: Tuple[str, ...] = ()
+        self._binary: Dict[str, Tuple[int, int, bool]] = {}  # パス → (mtime_ns, サイズ, バイナリか)
+        self.source = "none"  # 直近の列挙方法（git / scandir）
+
+    def files(self, extensions: Optional[Iterable[str]] = None) -> List[FileEntry]:
+        """テキストファイルを列挙（extensions 指定時はその拡張子のみ）"""
+        suffixes = tuple(extension.lower() for extension in extensions) if extensions else None
+        entries: List[FileEntry] = []
+        for relative in self.candidates():
+            if suffixes and not relative.lower().endswith(suffixes):
+                continue
+            path = self.root / relative
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if stat.st_size > self.max_file_bytes or not os.path.isfile(path):
+                continue
+            if self._is_binary(relative, path, stat.st_mtime_ns, stat.st_size):
+                continue
+            entries.append(FileEntry(relative, stat.st_size, stat.st_mtime_ns))
+        return entries
+
+    def candidates(self) -> Tuple[str, ...]:
+        """除外ディレクトリを除いた候補パス（git 追跡ファイル、または .gitignore 考慮の走査結果）"""
+        with self._lock:
+            repo = self._open_repo() if self.use_git and GIT_AVAILABLE else None
+            if repo is not None:
+                try:
+                    key = self._git_key(repo)
+                    if key != self._cache_key:
+                        self._candidates = tuple(self._git_candidates(repo))
+                        self._cache_key = key
+                        self.source = "git"
+                    return self._candidates
+                except Exception as e:
+                    logger.warning(f"git インデックスからの列挙に失敗しました。ディレクトリ走査を使用します: {e}")
+                finally:
+                    repo.close()
+
+            if self.source != "scandir" or time.monotonic() - self._cached_at > FALLBACK_TTL_SECONDS:
+                self._candidates = tuple(self._scandir_candidates())
+                self._cache_key = None
+                self._cached_at = time.monotonic()
+                self.source = "scandir"
+            return self._candidates
+
+    def invalidate(self) -> None:
+        """候補一覧のキャッシュを破棄"""
+        with self._lock:
+            self._cache_key = None
+            self._cached_at = 0.0
+            self.source = "none"
+
+    # ------------------------------------------------------------------ git
+
+    def _open_repo(self):
+        try:
+            return git.Repo(self.root, search_parent_directories=True)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _git_key(repo) -> Tuple[str, int]:
+        """(HEAD の SHA, インデックスの mtime)"""
+        try:
+            head = repo.head.commit.hexsha
+        except Exception:
+            head = ""  # コミットのないリポジトリ
+        try:
+            index_mtime = os.stat(os.path.join(repo.git_dir, "index")).st_mtime_ns
+        except OSError:
+            index_mtime = 0
+        return head, index_mtime
+
+    def _git_candidates(self, repo) -> List[str]:
+        """git インデックスの追跡ファイルのうちルート配下のもの"""
+        top = Path(repo.working_tree_dir).resolve()
+        prefix = "" if top == self.root else self.root.relative_to(top).as_posix() + "/"
+        output = repo.git.ls_files("-z")
+        candidates = []
+        for path in output.split("\0"):
+            if not path or not path.startswith(prefix):
+                continue
+            relative = path[len(prefix):]
+            if any(part in self.excluded_dirs for part in relative.split("/")[:-1]):
+                continue
+            candidates.append(relative)
+        return candidates
+
+    # ------------------------------------------------------------------ 走査
+
+    def _scandir_candidates(self) -> List[str]:
+        """.gitignore を考慮した os.scandir 走査"""
+        candidates: List[str] = []
+        pending: List[Tuple[str, List[_IgnoreRule]]] = [("", [])]
+        while pending:
+            check_cancelled()
+            relative_dir, inherited = pending.pop()
+            directory = self.root / relative_dir if relative_dir else self.root
+            rules = inherited
+            gitignore = directory / ".gitignore"
+            if gitignore.is_file():
+                try:
+                    rules = inherited + parse_gitignore(gitignore.read_text(encoding="utf-8", errors="ignore"), relative_dir)
+                except OSError:
+                    pass
+            try:
+                entries = list(os.scandir(directory))
+            except OSError as e:
+                logger.debug(f"ディレクトリ走査スキップ ({directory}): {e}")
+                continue
+            for entry in entries:
+                relative = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.excluded_dirs and not is_ignored(rules, relative, True):
+                            pending.append((relative, rules))
+                    elif entry.is_file(follow_symlinks=False) and not is_ignored(rules, relative, False):
+                        candidates.append(relative)
+                except OSError:
+                    continue
+        candidates.sort()
+        return candidates
+
+    def _is_binary(self, relative: str, path: Path, mtime_ns: int, size: int) -> bool:
+        cached = self._binary.get(relative)
+        if cached is not None and cached[:2] == (mtime_ns, size):
+            return cached[2]
+        binary = is_binary(path)
+        self._binary[relative] = (mtime_ns, size, binary)
+        return binary
@@ -0,0 +1,272 @@
+"""
+CoreThink-MCP GSR ステージエンジン
+
+GSR 4層の各層をステージとして登録し、context_depth に応じて実行するステージを選ぶ。
+各ステージは入力（共有入力または前のステージの出力）と出力、実行する深度を宣言する。
+実行時間は perf_counter_ns で計測して推論ログに記録する。
+
+corethink_server・remote_server はどちらもモジュールのグローバルインスタンス gsr_engine を使う。
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .reasoning_result import INPUT_CONTEXT, INPUT_SITUATION, LayerOutput, ReasoningResult
+
+logger = logging.getLogger(__name__)
+
+ALL_DEPTHS: FrozenSet[str] = frozenset({"minimal", "standard", "deep", "comprehensive"})
+
+
+@dataclass(frozen=True)
+class GSRStage:
+    """GSR ステージ（1層）"""
+    name: str  # "Layer 1" など（推論ログの layer）
+    title: str
+    inputs: Tuple[str, ...]  # 共有入力名・前のステージの出力名
+    outputs: Tuple[str, ...]
+    build: Callable[[ReasoningResult], str]  # 層固有の本文を作る
+    depths: FrozenSet[str] = ALL_DEPTHS  # 実行する context_depth
+    transformation_rule: str = ""
+    confidence_level: str = "MEDIUM"
+
+    def runs_at(self, depth: str) -> bool:
+        return depth in self.depths
+
+
+@dataclass(frozen=True)
+class StageTiming:
+    """ステージ1件の実行結果"""
+    name: str
+    elapsed_ns: int
+    skipped: bool = False
+
+    @property
+    def elapsed_ms(self) -> float:
+        return self.elapsed_ns / 1_000_000
+
+
+class GSREngine:
+    """GSR ステージの登録と実行"""
+
+    # 全ステージが参照できる共有入力
+    SHARED_INPUTS = (INPUT_SITUATION, INPUT_CONTEXT)
+
+    def __init__(self, stages: Iterable[GSRStage] = ()):
+        self._stages: List[GSRStage] = []
+        for stage in stages:
+            self.register(stage)
+
+    @property
+    def stages(self) -> Tuple[GSRStage, ...]:
+        return tuple(self._stages)
+
+    def register(self, stage: GSRStage) -> GSRStage:
+        """ステージを末尾に登録（入力は共有入力か登録済みステージの出力に限る）"""
+        if any(existing.name == stage.name for existing in self._stages):
+            raise ValueError(f"GSRステージが重複しています: {stage.name}")
+        available = set(self.SHARED_INPUTS)
+        for existing in self._stages:
+            available.update(existing.outputs)
+        unknown = [name for name in stage.inputs if name not in available]
+        if unknown:
+            raise ValueError(f"GSRステージ {stage.name} の入力が未定義です: {', '.join(unknown)}")
+        self._stages.append(stage)
+        return stage
+
+    def stages_for(self, depth: str) -> List[GSRStage]:
+        """context_depth で実行するステージ"""
+        return [stage for stage in self._stages if stage.runs_at(depth)]
+
+    def run(self, result: ReasoningResult, step_logger=None) -> List[StageTiming]:
+        """深度に応じたステージを順に実行し、各層の出力を result に追加する
+
+        実行しないステージの出力を入力とするステージは、その入力を参照しない。
+        step_logger（ReasoningLogger）を渡すと各ステージを推論ステップとして記録する。
+        """
+        producers: Dict[str, str] = {name: name for name in self.SHARED_INPUTS}  # 出力名 → 参照先
+        timings: List[StageTiming] = []
+        for stage in self._stages:
+            if not stage.runs_at(result.context_depth):
+                result.skipped_layers.append(f"{stage.name} {stage.title}")
+                timings.append(StageTiming(stage.name, 0, skipped=True))
+                logger.debug(f"GSRステージ省略: {stage.name} (深度: {result.context_depth})")
+                continue
+
+            references = tuple(dict.fromkeys(producers[name] for name in stage.inputs if name in producers))
+            started = time.perf_counter_ns()
+            output = result.add_layer(LayerOutput(
+                layer=stage.name,
+                title=stage.title,
+                body=stage.build(result),
+                references=references,
+            ))
+            elapsed_ns = time.perf_counter_ns() - started
+            for name in stage.outputs:
+                producers[name] = stage.name
+            timings.append(StageTiming(stage.name, elapsed_ns))
+
+            if step_logger is not None:
+                step_logger.log_step(
+                    step_name=stage.title,
+                    layer=stage.name,
+                    input_data={
+                        "inputs": list(stage.inputs),
+                        "references": list(references),
+                        "context_length": len(result.context)
+                    },
+                    output_data={
+                        "outputs": list(stage.outputs),
+                        "layer_output": output.body[:300] + "..." if len(output.body) > 300 else output.body
+                    },
+                    transformation_rule=stage.transformation_rule,
+                    execution_time_ms=elapsed_ns / 1_000_000,
+                    confidence_level=stage.confidence_level
+                )
+        return timings
+
+    def describe(self, depth: Optional[str] = None) -> str:
+        """ステージ構成（入力 → 出力、深度による省略）の説明"""
+        lines = []
+        for stage in self._stages:
+            skipped = depth is not None and not stage.runs_at(depth)
+            lines.append(f"{stage.name}: {stage.title}" + (f"（{depth} では省略）" if skipped else ""))
+            lines.append(f"- 入力: {', '.join(stage.inputs)}")
+            lines.append(f"- 出力: {', '.join(stage.outputs)}")
+        return "\n".join(lines)
+
+
+# ================== 標準 GSR 4層 ==================
+
+def _layer1_parse_native_language(result: ReasoningResult) -> str:
+    """GSR Layer 1: Native Language Parsing & Semantic Preservation"""
+    return """【意味的要素抽出】
+- 意図: ユーザーが何を求めているか
+- 対象: 何について推論するか
+- 制約: どのような条件があるか
+- 期待結果: どのような出力を期待しているか
+
+【言語的特徴保持】
+- 不確実性の表現: 「たぶん」「可能性がある」等
+- 強調表現: 「必ず」「絶対に」等
+- 感情的ニュアンス: 緊急性、重要性等
+
+【解析完了】意味情報を完全保持して次層へ移行"""
+
+
+def _layer2_inlanguage_reasoning(result: ReasoningResult) -> str:
+    """GSR Layer 2: In-Language Reasoning Architecture（ベクトル化なしの言語内推論）"""
+    return """【推論プロセス】
+1. 問題の核心特定
+   - 真の課題は何か？
+   - 表面的問題と根本原因の区別
+
+2. 制約分析
+   - 絶対的制約（変更不可）
+   - 相対的制約（交渉可能）
+   - 隠れた制約（暗黙的前提）
+
+3. 解決策生成
+   - 直接的アプローチ
+   - 代替アプローチ
+   - 創造的解決法
+
+4. リスク評価
+   - 実行可能性
+   - 安全性
+   - 影響範囲
+
+【推論結論】
+基本判定: [PROCEED/CAUTION/REJECT]
+信頼度: [HIGH/MEDIUM/LOW]"""
+
+
+def _layer3_execution_explainability(result: ReasoningResult) -> str:
+    """GSR Layer 3: Execution & Explainability"""
+    return """【実行計画】
+1. 実行前検証
+   - 制約適合性チェック
+   - 安全性確認
+   - リソース可用性
+
+2. 段階的実行戦略
+   - Phase 1: 最小限変更
+   - Phase 2: 段階的拡張
+   - Phase 3: 完全実装
+
+3. 検証ポイント
+   - 各段階での成功判定基準
+   - 異常検出と回復手順
+   - 品質保証要件
+
+【説明可能性】
+- なぜこの判断に至ったか
+- どのような根拠があるか
+- 代替案との比較結果
+- リスクと機会の評価
+
+【実行準備完了】次層での最終確認へ"""
+
+
+def _layer4_avoid_translation(result: ReasoningResult) -> str:
+    """GSR Layer 4: Avoiding Representational Translation（自然言語出力の維持）"""
+    return """【最終判定】
+✅ PROCEED - 実行推奨
+⚠️ CAUTION - 注意して実行
+❌ REJECT - 実行非推奨
+
+【実行指針】
+具体的に何をすべきか、どのような順序で、どのような注意点があるかを自然言語で明確に説明
+
+【次ステップ】
+ユーザーが取るべき具体的行動を自然言語で提示
+
+【信頼性指標】
+推論の確実性レベルと根拠を自然言語で説明"""
+
+
+DEFAULT_STAGES = (
+    GSRStage(
+        name="Layer 1",
+        title="自然言語解析",
+        inputs=(INPUT_SITUATION, INPUT_CONTEXT),
+        outputs=("意味構造",),
+        build=_layer1_parse_native_language,
+        transformation_rule="GSR Layer 1: 自然言語から意味構造への変換",
+        confidence_level="HIGH",
+    ),
+    GSRStage(
+        name="Layer 2",
+        title="言語内推論",
+        inputs=("意味構造", INPUT_CONTEXT),
+        outputs=("推論結論",),
+        build=_layer2_inlanguage_reasoning,
+        transformation_rule="GSR Layer 2: 意味構造内での論理的推論",
+        confidence_level="MEDIUM",
+    ),
+    GSRStage(
+        name="Layer 3",
+        title="実行・説明可能性",
+        inputs=("推論結論", INPUT_CONTEXT),
+        outputs=("実行計画",),
+        build=_layer3_execution_explainability,
+        depths=ALL_DEPTHS - {"minimal"},
+        transformation_rule="GSR Layer 3: 説明可能な実行可能形式への変換",
+        confidence_level="HIGH",
+    ),
+    GSRStage(
+        name="Layer 4",
+        title="自然言語出力",
+        # minimal では Layer 3 を省略するため、推論結論を直接参照する
+        inputs=("推論結論", "実行計画"),
+        outputs=("最終判定",),
+        build=_layer4_avoid_translation,
+        transformation_rule="GSR Layer 4: 翻訳損失回避の自然言語出力",
+        confidence_level="HIGH",
+    ),
+)
+
+# グローバルエンジンインスタンス
+gsr_engine = GSREngine(DEFAULT_STAGES)
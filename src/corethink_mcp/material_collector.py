@@ -0,0 +1,128 @@
+"""
+CoreThink-MCP 推論材料コレクター実行
+
+材料の種類ごとのコレクターを同時実行数の上限付きで並行実行し、
+コレクターごとの期限を過ぎたものは打ち切って完了分だけを返す。
+結果は完了順に逐次受け取ることもできる（進捗通知・ストリーミング用）
+各コレクターは取り消しスコープ内で実行し、期限切れ・取り消し時にはスレッドで実行中の処理も打ち切る。
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Tuple
+
+from .cancellation import cancel_scope
+
+logger = logging.getLogger(__name__)
+
+# 実行結果の状態
+STATUS_DONE = "done"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+STATUS_CACHED = "cached"  # 材料キャッシュから取得（コレクターは実行していない）
+
+
+@dataclass(frozen=True)
+class CollectorJob:
+    """コレクター1件"""
+    name: str  # 識別名（材料タイプ、Sampling分析は "<材料タイプ>:sampling"）
+    run: Callable[[], Awaitable[str]]
+    timeout: float  # 実行開始からの期限（秒）
+
+
+@dataclass(frozen=True)
+class CollectorResult:
+    """コレクター1件の実行結果"""
+    name: str
+    status: str
+    content: str
+    elapsed_ms: float
+
+    @property
+    def done(self) -> bool:
+        return self.status in (STATUS_DONE, STATUS_CACHED)
+
+
+@dataclass(frozen=True)
+class MaterialSection:
+    """材料1件（コア収集と、あればSampling分析の結果をまとめたもの）"""
+    material_type: str
+    name: str  # 材料名（報告書の見出し）
+    content: str  # コア収集が期限切れ・エラーの場合は空文字
+    results: Tuple[CollectorResult, ...]  # 先頭がコア収集
+
+    @property
+    def done(self) -> bool:
+        return self.results[0].done
+
+
+@dataclass
+class GatheredMaterials:
+    """材料収集結果（材料名 → 内容と、各コレクターの実行結果）"""
+    sections: Dict[str, str] = field(default_factory=dict)
+    results: List[CollectorResult] = field(default_factory=list)
+
+    @property
+    def incomplete(self) -> List[CollectorResult]:
+        """期限切れ・エラーで材料に含められなかったコレクター"""
+        return [result for result in self.results if not result.done]
+
+    def timing_summary(self) -> str:
+        """コレクターごとの所要時間・状態の要約"""
+        labels = {STATUS_DONE: "完了", STATUS_TIMEOUT: "期限切れ", STATUS_ERROR: "エラー", STATUS_CACHED: "キャッシュ"}
+        return ", ".join(
+            f"{result.name} {result.elapsed_ms:.0f}ms（{labels.get(result.status, result.status)}）"
+            for result in self.results
+        )
+
+
+async def _run_job(job: CollectorJob, semaphore: asyncio.Semaphore) -> CollectorResult:
+    """セマフォ取得後に期限付きでコレクターを実行（期限切れ・例外は結果として返す）
+
+    期限切れ・取り消し（CancelledError はそのまま送出）の場合は、コレクターが
+    スレッドで実行中の処理も取り消しスコープ経由で打ち切る。
+    """
+    async with semaphore:
+        started = time.perf_counter()
+        with cancel_scope() as token:
+            try:
+                content = await asyncio.wait_for(job.run(), timeout=job.timeout)
+                status = STATUS_DONE
+            except asyncio.TimeoutError:
+                logger.warning(f"材料コレクター期限切れ: {job.name} ({job.timeout:.1f}秒)")
+                token.cancel("期限切れ")
+                content, status = "", STATUS_TIMEOUT
+            except Exception as e:
+                logger.warning(f"材料コレクターエラー ({job.name}): {e}")
+                token.cancel("エラー")
+                content, status = f"{job.name}の収集エラー: {str(e)}", STATUS_ERROR
+        return CollectorResult(job.name, status, content, (time.perf_counter() - started) * 1000)
+
+
+async def iter_collectors(jobs: Iterable[CollectorJob], max_concurrency: int) -> AsyncIterator[CollectorResult]:
+    """コレクターを並行実行し、完了した順に結果を返す
+
+    同時に実行するのは最大 max_concurrency 件。期限はセマフォ取得後の実行開始から数えるため、
+    順番待ちの時間で後続のコレクターの期限が削られることはない。
+    期限切れ・例外は他のコレクターに波及させず、その1件の結果として返す。
+    受け取り側が途中で反復をやめた場合、未完了のコレクターは取り消す。
+    """
+    semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+    tasks = [asyncio.ensure_future(_run_job(job, semaphore)) for job in jobs]
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            yield await next_result
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def run_collectors(jobs: Iterable[CollectorJob], max_concurrency: int) -> List[CollectorResult]:
+    """コレクターを並行実行し、ジョブと同じ順序で結果を返す"""
+    jobs = list(jobs)
+    order = {job.name: position for position, job in enumerate(jobs)}
+    results = [result async for result in iter_collectors(jobs, max_concurrency)]
+    return sorted(results, key=lambda result: order[result.name])
@@ -0,0 +1,109 @@
+"""
+CoreThink-MCP 推論材料キャッシュ
+
+材料タイプごとの収集結果を (正規化トピック, 材料タイプ, 収集深度, 制約インデックスのバージョン,
+リポジトリ索引のバージョン, Sampling有無) をキーとする LRU+TTL キャッシュに保持する。
+材料単位で保持するため、材料タイプの組が異なる要求でも共通する材料は再利用できる。
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_topic(topic: str) -> str:
+    """キャッシュキー用にトピックを正規化（NFKC・小文字化・空白の統一）"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", topic)).strip().lower()
+
+
+def section_key(
+    topic: str,
+    material_type: str,
+    depth: str,
+    constraint_version: int,
+    repo_version: Hashable,
+    sampling: bool,
+) -> Tuple[Hashable, ...]:
+    """材料1件のキャッシュキー（repo_version はリポジトリ索引・変更履歴索引の世代）"""
+    return (normalize_topic(topic), material_type, depth, constraint_version, repo_version, sampling)
+
+
+class MaterialsCache:
+    """材料単位の LRU+TTL キャッシュ
+
+    件数が上限を超えると最も長く使われていない材料から破棄し、
+    保存から ttl_seconds を過ぎた材料は参照時に破棄する（0以下で期限なし）。
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._cache: "OrderedDict[Tuple[Hashable, ...], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        # 要求単位の集計（全材料ヒット / 一部ヒット / ヒットなし）
+        self.full_hits = 0
+        self.partial_hits = 0
+        self.full_misses = 0
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[str]:
+        """材料を取得（未保存・期限切れはNone）"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and self.ttl_seconds > 0 and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._cache[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple[Hashable, ...], content: str) -> None:
+        """材料を保存"""
+        with self._lock:
+            self._cache[key] = (time.monotonic(), content)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def record_request(self, hit_count: int, total: int) -> None:
+        """要求単位のヒット状況を記録"""
+        with self._lock:
+            if total and hit_count == total:
+                self.full_hits += 1
+            elif hit_count:
+                self.partial_hits += 1
+            else:
+                self.full_misses += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """キャッシュ統計"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "full_hits": self.full_hits,
+                "partial_hits": self.partial_hits,
+                "full_misses": self.full_misses,
+            }
+
+    def clear(self) -> None:
+        """キャッシュをクリア"""
+        with self._lock:
+            self._cache.clear()
@@ -3,18 +3,28 @@
 CoreThink-MCP 推論ログ記録システム
 人間による後検証可能な詳細ログの生成
 将来のVuestic Adminダッシュボード対応を考慮した設計
+
+ログファイルは一時ファイルに書いてから置き換えるため、書きかけのファイルは残らない。
+取り消された推論は cancel_session() で状態 "cancelled" のサマリーだけを出力する。
 """
 
 import json
 import logging
+import os
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
+from contextvars import ContextVar
 import uuid
 
 logger = logging.getLogger(__name__)
 
+# セッションの終了状態
+STATUS_COMPLETED = "completed"
+STATUS_ERROR = "error"
+STATUS_CANCELLED = "cancelled"
+
 @dataclass
 class ReasoningStep:
     """個別推論ステップの記録"""
@@ -56,14 +66,40 @@ class ReasoningSession:
     # メタデータ
     gsr_version: str = "Phase3-v1.0.0"
     core_think_compliance: bool = True
+    status: str = STATUS_COMPLETED
 
 class ReasoningLogger:
     """推論過程の詳細ログ記録システム"""
     
     def __init__(self, base_path: str = "logs/reasoning"):
         self.base_path = Path(base_path)
-        self.current_session: Optional[ReasoningSession] = None
-        self.current_steps: List[ReasoningStep] = []
+        # 実行中のセッションはタスク（コンテキスト）ごとに保持し、並行する推論のステップが混ざらないようにする
+        self._session: ContextVar[Optional[ReasoningSession]] = ContextVar(
+            f"reasoning_session_{id(self)}", default=None
+        )
+        self._steps: ContextVar[Optional[List[ReasoningStep]]] = ContextVar(
+            f"reasoning_steps_{id(self)}", default=None
+        )
+    
+    @property
+    def current_session(self) -> Optional[ReasoningSession]:
+        return self._session.get()
+    
+    @current_session.setter
+    def current_session(self, session: Optional[ReasoningSession]) -> None:
+        self._session.set(session)
+    
+    @property
+    def current_steps(self) -> List[ReasoningStep]:
+        steps = self._steps.get()
+        if steps is None:
+            steps = []
+            self._steps.set(steps)
+        return steps
+    
+    @current_steps.setter
+    def current_steps(self, steps: List[ReasoningStep]) -> None:
+        self._steps.set(steps)
         
     def start_session(
         self,
@@ -144,29 +180,24 @@ class ReasoningLogger:
         self,
         final_judgment: str,
         final_confidence: str,
-        alternative_paths: List[str] = None
+        alternative_paths: List[str] = None,
+        status: str = STATUS_COMPLETED
     ) -> str:
-        """推論セッションを終了してログを出力"""
+        """推論セッションを終了してログを出力（出力に失敗した場合は出力済みのファイルを削除）"""
         if not self.current_session:
             raise ValueError("セッションが開始されていません")
             
-        # セッション情報の完成
-        self.current_session.end_time = datetime.now().isoformat()
-        self.current_session.reasoning_steps = self.current_steps
-        self.current_session.final_judgment = final_judgment
-        self.current_session.final_confidence = final_confidence
-        self.current_session.alternative_paths = alternative_paths or []
-        
-        # 実行時間の計算
-        start_dt = datetime.fromisoformat(self.current_session.start_time)
-        end_dt = datetime.fromisoformat(self.current_session.end_time)
-        self.current_session.total_execution_time_ms = (end_dt - start_dt).total_seconds() * 1000
+        self._finish_session(final_judgment, final_confidence, alternative_paths, status)
         
         # ログファイルの出力
         session_id = self.current_session.session_id
-        self._write_detailed_log()
-        self._write_summary_log()
-        self._write_human_readable_log()
+        try:
+            self._write_detailed_log()
+            self._write_summary_log()
+            self._write_human_readable_log()
+        except Exception:
+            self._remove_logs(session_id)
+            raise
         
         logger.info(f"推論セッション完了: {session_id}")
         
@@ -177,16 +208,90 @@ class ReasoningLogger:
         
         return result_session_id
     
+    def cancel_session(self, reason: str = "取り消されました") -> Optional[str]:
+        """取り消された推論セッションを終了（出力済みのログを削除し、状態 cancelled のサマリーだけを出力）
+        
+        セッションが開始されていない場合は何もせず None を返す。
+        """
+        if not self.current_session:
+            return None
+        
+        self._finish_session(reason, "CANCELLED", None, STATUS_CANCELLED)
+        session_id = self.current_session.session_id
+        self._remove_logs(session_id)
+        try:
+            self._write_summary_log()
+        except Exception as e:
+            self._remove_logs(session_id)
+            logger.warning(f"取り消した推論セッションのログ出力エラー: {str(e)}")
+        
+        logger.info(f"推論セッション取り消し: {session_id} ({reason})")
+        self.current_session = None
+        self.current_steps = []
+        return session_id
+    
+    def _finish_session(
+        self,
+        final_judgment: str,
+        final_confidence: str,
+        alternative_paths: Optional[List[str]],
+        status: str
+    ) -> None:
+        """セッション情報の完成（終了時刻・ステップ・結果・実行時間）"""
+        self.current_session.end_time = datetime.now().isoformat()
+        self.current_session.reasoning_steps = self.current_steps
+        self.current_session.final_judgment = final_judgment
+        self.current_session.final_confidence = final_confidence
+        self.current_session.alternative_paths = alternative_paths or []
+        self.current_session.status = status
+        
+        # 実行時間の計算
+        start_dt = datetime.fromisoformat(self.current_session.start_time)
+        end_dt = datetime.fromisoformat(self.current_session.end_time)
+        self.current_session.total_execution_time_ms = (end_dt - start_dt).total_seconds() * 1000
+    
+    def _log_paths(self, session_id: str) -> List[Path]:
+        """セッションのログファイル（詳細・サマリー・人間読み取り可能）"""
+        return [
+            self.base_path / "detailed" / f"{session_id}.json",
+            self.base_path / "summary" / f"{session_id}_summary.json",
+            self.base_path / "human_readable" / f"{session_id}.md",
+        ]
+    
+    def _remove_logs(self, session_id: str) -> None:
+        """セッションのログファイル（一時ファイルを含む）を削除"""
+        for path in self._log_paths(session_id):
+            for target in (path, path.with_name(path.name + ".tmp")):
+                try:
+                    target.unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"推論ログ削除エラー ({target}): {str(e)}")
+    
+    @staticmethod
+    def _write_atomic(path: Path, content: str) -> None:
+        """一時ファイルに書いてから置き換える（書きかけのファイルを残さない）"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + ".tmp")
+        try:
+            with open(temporary, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(temporary, path)
+        except BaseException:
+            try:
+                temporary.unlink()
+            except OSError:
+                pass
+            raise
+    
     def _write_detailed_log(self):
         """詳細ログ（JSON）の出力"""
         if not self.current_session:
             return
             
-        detailed_path = self.base_path / "detailed" / f"{self.current_session.session_id}.json"
-        detailed_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(detailed_path, 'w', encoding='utf-8') as f:
-            json.dump(asdict(self.current_session), f, ensure_ascii=False, indent=2)
+        detailed_path = self._log_paths(self.current_session.session_id)[0]
+        self._write_atomic(detailed_path, json.dumps(asdict(self.current_session), ensure_ascii=False, indent=2))
     
     def _write_summary_log(self):
         """サマリーログ（JSON）の出力"""
@@ -202,16 +307,14 @@ class ReasoningLogger:
             "total_steps": len(self.current_session.reasoning_steps),
             "execution_time_ms": self.current_session.total_execution_time_ms,
             "final_confidence": self.current_session.final_confidence,
+            "status": self.current_session.status,
             "gsr_layers_executed": list(set(step.layer for step in self.current_session.reasoning_steps)),
             "materials_collected": len(self.current_session.collected_materials),
             "constraints_applied": len(self.current_session.applied_constraints)
         }
         
-        summary_path = self.base_path / "summary" / f"{self.current_session.session_id}_summary.json"
-        summary_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(summary_data, f, ensure_ascii=False, indent=2)
+        summary_path = self._log_paths(self.current_session.session_id)[1]
+        self._write_atomic(summary_path, json.dumps(summary_data, ensure_ascii=False, indent=2))
     
     def _write_human_readable_log(self):
         """人間読み取り可能ログ（Markdown）の出力"""
@@ -220,11 +323,8 @@ class ReasoningLogger:
             
         markdown_content = self._generate_markdown_report()
         
-        markdown_path = self.base_path / "human_readable" / f"{self.current_session.session_id}.md"
-        markdown_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(markdown_path, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
+        markdown_path = self._log_paths(self.current_session.session_id)[2]
+        self._write_atomic(markdown_path, markdown_content)
     
     def _generate_markdown_report(self) -> str:
         """Markdownレポートの生成"""
@@ -240,6 +340,7 @@ class ReasoningLogger:
 - **開始時刻**: {session.start_time}
 - **終了時刻**: {session.end_time}
 - **実行時間**: {session.total_execution_time_ms:.2f}ms
+- **状態**: {session.status}
 - **GSRバージョン**: {session.gsr_version}
 
 ## 入力情報
@@ -0,0 +1,230 @@
+"""
+CoreThink-MCP 推論結果
+
+GSR 4層の各層の出力を、共有入力（状況・推論コンテキスト）や前の層への参照付きで保持し、
+応答文字列は最後に render() で一度だけ組み立てる。
+各層が前の層の出力や推論コンテキストを文字列として埋め込まないため、
+応答サイズとメモリ使用量は入力サイズに比例する（層の数に応じて倍増しない）。
+JSON 出力用には to_dict() で判定・信頼度・適用ルール・ステージ時間・材料の参照を返す。
+compact プロファイルでは見出しの装飾と各層の定型本文を省き、推論コンテキストは区分ごとに要約する。
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .constraint_evaluator import EvaluationResult
+from .constraint_retriever import ScoredRule
+from .material_collector import CollectorResult
+from .response_format import PROFILE_COMPACT, PROFILE_FULL, compact_text, summarize_sections
+
+if TYPE_CHECKING:
+    from .gsr_engine import StageTiming
+
+# 共有入力の名前（層の参照先・応答の見出し）
+INPUT_SITUATION = "状況分析"
+INPUT_CONTEXT = "推論コンテキスト"
+
+
+# 信頼度の要素の評価記号 → JSON 出力での値
+FACTOR_STATUS = {"✅": "ok", "🟡": "partial", "⚠️": "warning"}
+
+
+@dataclass(frozen=True)
+class ConfidenceAssessment:
+    """信頼度の総合判定と要素ごとの評価"""
+    level: str  # HIGH / MEDIUM / LOW（計算できなかった場合は ERROR）
+    label: str  # "HIGH (高信頼度)" など
+    factors: Tuple[Tuple[str, str], ...] = ()  # (要素名, 評価記号)
+
+    def render(self) -> str:
+        return "\n".join([self.label] + [f"{name}: {mark}" for name, mark in self.factors])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "factors": {name: FACTOR_STATUS.get(mark, mark) for name, mark in self.factors},
+        }
+
+
+@dataclass(frozen=True)
+class LayerOutput:
+    """GSR 1層分の出力"""
+    layer: str  # "Layer 1" など
+    title: str
+    body: str  # 層固有の内容（共有入力・前の層の出力は含めない）
+    references: Tuple[str, ...] = ()  # 参照する共有入力名・層（layer）
+
+    @property
+    def heading(self) -> str:
+        return f"GSR {self.layer}: {self.title}"
+
+
+@dataclass
+class ReasoningResult:
+    """統合GSR推論の結果（共有入力と各層の出力）"""
+    situation: str
+    required_judgment: str
+    reasoning_mode: str
+    context_depth: str
+    context: str  # 予算内に詰めた推論コンテキスト（応答には一度だけ含める）
+    layers: List[LayerOutput] = field(default_factory=list)
+    skipped_layers: List[str] = field(default_factory=list)  # context_depth により省略した層
+    budget_summary: str = ""
+    adaptive_summary: str = ""  # 適応的深度制御による深度選択の根拠
+    evaluation: Optional[EvaluationResult] = None  # 状況に対する制約評価（判定の根拠）
+    rules: List[ScoredRule] = field(default_factory=list)  # 状況に関連する制約ルール（関連度順）
+    materials: List[CollectorResult] = field(default_factory=list)  # 材料コレクターの実行結果
+    stage_timings: List["StageTiming"] = field(default_factory=list)
+    assessment: Optional[ConfidenceAssessment] = None
+    confidence: str = ""
+    execution_time_ms: float = 0.0
+    completed_at: Optional[datetime] = None
+
+    @property
+    def inputs(self) -> Dict[str, str]:
+        """共有入力（名前 → 内容）"""
+        return {INPUT_SITUATION: self.situation, INPUT_CONTEXT: self.context}
+
+    def add_layer(self, output: LayerOutput) -> LayerOutput:
+        self.layers.append(output)
+        return output
+
+    def get_layer(self, layer: str) -> Optional[LayerOutput]:
+        return next((output for output in self.layers if output.layer == layer), None)
+
+    def scope(self, layer: str) -> List[str]:
+        """層が参照する内容（共有入力・前の層を再帰的にたどり、重複なし）と層自身の本文"""
+        texts: List[str] = []
+        visited = set()
+
+        def _visit(name: str) -> None:
+            if name in visited:
+                return
+            visited.add(name)
+            if name in self.inputs:
+                texts.append(self.inputs[name])
+                return
+            output = self.get_layer(name)
+            if output is None:
+                return
+            for reference in output.references:
+                _visit(reference)
+            texts.append(output.body)
+
+        _visit(layer)
+        return texts
+
+    def _reference_label(self, name: str) -> str:
+        output = self.get_layer(name)
+        return f"【{output.heading}】" if output else f"【{name}】"
+
+    def render(self, profile: str = PROFILE_FULL) -> str:
+        """応答文字列を組み立てる（共有入力・各層の本文はそれぞれ一度だけ出力）"""
+        if profile == PROFILE_COMPACT:
+            return self.render_compact()
+        completed_at = self.completed_at or datetime.now()
+        parts = [
+            "🧠 **CoreThink統合GSR推論結果** (Phase2最適化版)",
+            f"【{INPUT_SITUATION}】\n{self.situation}",
+            f"【求められる判断】\n{self.required_judgment}",
+            f"【推論モード】\n{self.reasoning_mode} (深度: {self.context_depth})"
+            + (f"\n適応的深度: {self.adaptive_summary}" if self.adaptive_summary else ""),
+            f"【{INPUT_CONTEXT}】\n{self.context}",
+        ]
+        if self.evaluation is not None:
+            parts.append(f"【制約評価】\n{self.evaluation.verdict_summary}")
+        parts += [
+            "【GSR推論プロセス】\n" + " → ".join(output.layer for output in self.layers)
+            + (f"（省略: {', '.join(self.skipped_layers)}）" if self.skipped_layers else ""),
+        ]
+        for output in self.layers:
+            section = f"【{output.heading}】"
+            if output.references:
+                section += "\n参照: " + "".join(self._reference_label(name) for name in output.references)
+            parts.append(f"{section}\n\n{output.body}")
+        parts.extend([
+            f"【コンテキスト予算】\n{self.budget_summary}",
+            f"【信頼度】\n{self.confidence}",
+            f"【推論完了時刻】\n{completed_at.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"【推論所要時間】\n{self.execution_time_ms:.1f}ms",
+        ])
+        return "\n\n".join(parts)
+
+    def render_compact(self) -> str:
+        """compact プロファイルの応答（各層は見出しのみ、推論コンテキストは区分ごとに要約）"""
+        parts = [
+            f"【{INPUT_SITUATION}】\n{self.situation}",
+            f"【判断】{self.required_judgment} / {self.reasoning_mode} (深度: {self.context_depth})"
+            + (f"\n適応的深度: {self.adaptive_summary}" if self.adaptive_summary else ""),
+        ]
+        if self.evaluation is not None:
+            parts.append(f"【制約評価】{self.evaluation.verdict_summary}")
+        parts.extend([
+            f"【{INPUT_CONTEXT}】\n{summarize_sections(compact_text(self.context))}",
+            "【GSR】" + " → ".join(output.layer for output in self.layers)
+            + (f"（省略: {', '.join(self.skipped_layers)}）" if self.skipped_layers else ""),
+            f"【信頼度】\n{compact_text(self.confidence)}",
+            f"【所要時間】{self.execution_time_ms:.1f}ms",
+        ])
+        return "\n\n".join(parts)
+
+    def applied_rules(self) -> List[Dict[str, Any]]:
+        """関連ルール（関連度順）と、それ以外で違反・要確認となったルール（判定付き）"""
+        statuses = {verdict.rule: verdict.status for verdict in self.evaluation.verdicts} if self.evaluation else {}
+        applied = []
+        for scored in self.rules:
+            entry = scored.to_dict()
+            entry["status"] = statuses.get(scored.rule)
+            applied.append(entry)
+        ranked = {scored.rule for scored in self.rules}
+        if self.evaluation is not None:
+            for verdict in self.evaluation.violations + self.evaluation.warnings:
+                if verdict.rule not in ranked:
+                    entry = verdict.to_dict()
+                    entry["score"] = None
+                    applied.append(entry)
+        return applied
+
+    def to_dict(self) -> Dict[str, Any]:
+        """構造化した結果（JSON 出力用）
+
+        推論コンテキストと各層の本文は含めず、文字数と参照関係だけを返す。
+        """
+        completed_at = self.completed_at or datetime.now()
+        evaluation = self.evaluation
+        return {
+            "tool": "unified_gsr_reasoning",
+            "situation": self.situation,
+            "required_judgment": self.required_judgment,
+            "reasoning_mode": self.reasoning_mode,
+            "context_depth": self.context_depth,
+            "judgment": evaluation.judgment if evaluation else None,
+            "trigger_judgment": evaluation.trigger_judgment if evaluation else None,
+            "violation_count": len(evaluation.violations) if evaluation else 0,
+            "warning_count": len(evaluation.warnings) if evaluation else 0,
+            "unchecked_count": len(evaluation.unchecked_critical) if evaluation else 0,
+            "confidence": self.assessment.to_dict() if self.assessment else {"level": self.confidence, "factors": {}},
+            "applied_rules": self.applied_rules(),
+            "stages": [
+                {"name": timing.name, "elapsed_ms": round(timing.elapsed_ms, 3), "skipped": timing.skipped}
+                for timing in self.stage_timings
+            ],
+            "layers": [
+                {"layer": output.layer, "title": output.title, "references": list(output.references)}
+                for output in self.layers
+            ],
+            "materials": [
+                {
+                    "name": result.name,
+                    "status": result.status,
+                    "elapsed_ms": round(result.elapsed_ms, 3),
+                    "chars": len(result.content),
+                }
+                for result in self.materials
+            ],
+            "context_chars": len(self.context),
+            "adaptive_depth": self.adaptive_summary or None,
+            "execution_time_ms": round(self.execution_time_ms, 3),
+            "completed_at": completed_at.isoformat(timespec="seconds"),
+        }
@@ -0,0 +1,420 @@
+"""
+CoreThink-MCP リポジトリ索引
+
+リポジトリ内のテキストファイルの転置インデックスを SQLite に永続化し、
+先例検索をクエリ語の転置リストの突き合わせで行う。
+
+索引はファイルのパス・mtime・サイズで管理し、更新時は変更・追加・削除された
+ファイルの転置リストだけを差し替える（初回以外は全ファイルを読み直さない）。
+初回構築など変更ファイルが多い場合はシャード分割スキャナーで複数プロセスに分けてトークン化する。
+複数のサーバープロセスが同じ索引ファイルを共有しても SQLite のロックで整合性を保つ。
+"""
+
+import logging
+import math
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .cancellation import check_cancelled
+from .constraint_retriever import BM25_B, BM25_K1, tokenize
+from .content_scanner import scan_file
+from .file_enumerator import FileEnumerator
+from .sharded_scanner import ShardedScanner, ShardPostings
+
+logger = logging.getLogger(__name__)
+
+# 索引の構造を変更した場合は必ず上げる（不一致なら索引を作り直す）
+SCHEMA_VERSION = 1
+
+INDEXED_EXTENSIONS = (".py", ".md", ".txt")
+# 1クエリで使う語の上限
+MAX_QUERY_TERMS = 32
+# 抜粋に含める一致箇所の前後バイト数
+SNIPPET_CONTEXT_BYTES = 60
+# 抜粋候補として調べる一致箇所の上限
+SNIPPET_MAX_WINDOWS = 200
+# 変更ファイル（全件走査検索では対象ファイル）がこれ以上ある場合にプロセス並列でトークン化する
+SHARDED_MIN_FILES = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id);
+"""
+
+
+def rank_postings(
+    rows: Iterable[Tuple[str, int, int, int]],
+    document_count: int,
+    average_length: float,
+    k: int,
+) -> Tuple[List[int], Dict[int, float], Dict[int, Set[str]]]:
+    """転置リストの行 (語, 文書ID, 出現回数, 文書の語数) を一致語数 → BM25 の順に並べ、上位k件を返す"""
+    postings: Dict[str, List[Tuple[int, int, int]]] = {}
+    for term, document, frequency, length in rows:
+        postings.setdefault(term, []).append((document, frequency, length))
+
+    scores: Dict[int, float] = {}
+    matched: Dict[int, Set[str]] = {}
+    for term, entries in postings.items():
+        idf = math.log(1 + (document_count - len(entries) + 0.5) / (len(entries) + 0.5))
+        for document, frequency, length in entries:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+            scores[document] = scores.get(document, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+            matched.setdefault(document, set()).add(term)
+
+    # 一致語数（転置リストの積集合に近いものほど上位）→ BM25
+    ranked = sorted(scores, key=lambda document: (-len(matched[document]), -scores[document], document))[:k]
+    return ranked, scores, matched
+
+
+def index_terms(text: str) -> List[str]:
+    """索引語に分割（`self.model.predict` のような英数字語は構成語も索引する）"""
+    terms: List[str] = []
+    for token in tokenize(text):
+        terms.append(token)
+        if token.isascii() and any(separator in token for separator in "._-+"):
+            parts = token.replace("-", ".").replace("+", ".").replace("_", ".").split(".")
+            terms.extend(part for part in parts if part and part != token)
+    return terms
+
+
+@dataclass(frozen=True)
+class IndexUpdate:
+    """索引の差分更新結果"""
+    added: int
+    updated: int
+    removed: int
+    file_count: int
+    version: int
+    elapsed_ms: float
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+
+@dataclass(frozen=True)
+class PrecedentHit:
+    """先例検索の一致ファイル"""
+    path: str  # リポジトリルートからの相対パス
+    score: float
+    matched_terms: Tuple[str, ...]
+    line_number: int  # 抜粋の行番号（1始まり、抜粋なしは0）
+    snippet: str
+
+    def render(self) -> str:
+        """`path:line: 抜粋` 形式で出力"""
+        location = f"{self.path}:{self.line_number}" if self.line_number else self.path
+        return f"{location}: {self.snippet}" if self.snippet else location
+
+
+class RepoIndex:
+    """リポジトリの永続転置インデックス
+
+    `refresh()` でファイルシステムとの差分を索引に反映し、
+    `search()` でクエリ語を含むファイルを一致語数（全語を含むファイルが先頭）→ BM25 の順に返す。
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        index_path: Path,
+        extensions: Iterable[str] = INDEXED_EXTENSIONS,
+        enumerator: Optional[FileEnumerator] = None,
+        workers: Optional[int] = None,
+        sharded_min_files: int = SHARDED_MIN_FILES,
+    ):
+        self.root = Path(root).resolve()
+        self.index_path = Path(index_path)
+        self.extensions = tuple(extensions)
+        # 対象ファイルの列挙（除外ディレクトリ・サイズ上限・バイナリ判定）は共有の列挙器に任せる
+        self.enumerator = enumerator or FileEnumerator(self.root)
+        self.scanner = ShardedScanner(self.root, workers)
+        self.sharded_min_files = sharded_min_files
+        self._lock = threading.Lock()
+        self._version = 0
+        self._last_refresh = 0.0
+        self._initialized = False
+
+    @property
+    def version(self) -> int:
+        """索引の世代（内容が変わるたびに増える）"""
+        return self._version
+
+    # ------------------------------------------------------------------ 更新
+
+    def ensure_fresh(self, max_age_seconds: float) -> Optional[IndexUpdate]:
+        """前回の更新から max_age_seconds 以上経過していれば差分更新する"""
+        if self._last_refresh and time.monotonic() - self._last_refresh < max_age_seconds:
+            return None
+        return self.refresh()
+
+    def refresh(self) -> IndexUpdate:
+        """ファイルシステムとの差分（追加・変更・削除）を索引に反映"""
+        with self._lock:
+            started = time.perf_counter()
+            current = dict(self._scan())
+
+            connection = self._connect()
+            try:
+                # 変更ファイルのトークン化は書き込みロックの外で済ませる
+                known = self._known_files(connection)
+                changed = [
+                    (path, mtime_ns, size)
+                    for path, (mtime_ns, size) in current.items()
+                    if known.get(path, (None, None, None))[1:] != (mtime_ns, size)
+                ]
+                tokenized = self._tokenize(changed)
+
+                # 書き込みロックを取り、他プロセスの更新結果と突き合わせる
+                connection.execute("BEGIN IMMEDIATE")
+                known = self._known_files(connection)
+
+                removed = [known[path][0] for path in known.keys() - current.keys()]
+                added = 0
+                updated = 0
+                file_ids: Dict[int, int] = {}  # tokenized.files の添字 → files.id
+                for position, (path, mtime_ns, size, length) in enumerate(tokenized.files):
+                    entry = known.get(path)
+                    if entry is not None and entry[1:] == (mtime_ns, size):
+                        continue  # 他プロセスが索引済み
+                    if entry is not None:
+                        self._delete_files(connection, [entry[0]])
+                        updated += 1
+                    else:
+                        added += 1
+                    cursor = connection.execute(
+                        "INSERT INTO files (path, mtime_ns, size, length) VALUES (?, ?, ?, ?)",
+                        (path, mtime_ns, size, length),
+                    )
+                    file_ids[position] = cursor.lastrowid
+                connection.executemany(
+                    "INSERT INTO postings (term, file_id, tf) VALUES (?, ?, ?)",
+                    (
+                        (term, file_ids[position], frequency)
+                        for term, position, frequency in tokenized.postings
+                        if position in file_ids
+                    ),
+                )
+
+                if removed:
+                    self._delete_files(connection, removed)
+
+                version = int(self._get_meta(connection, "version", "0"))
+                if added or updated or removed:
+                    version += 1
+                    connection.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (str(version),)
+                    )
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                connection.close()
+
+            self._version = version
+            self._last_refresh = time.monotonic()
+            result = IndexUpdate(
+                added=added,
+                updated=updated,
+                removed=len(removed),
+                file_count=len(current),
+                version=version,
+                elapsed_ms=(time.perf_counter() - started) * 1000,
+            )
+            if result.changed:
+                logger.info(
+                    f"リポジトリ索引更新: 追加{added} 変更{updated} 削除{len(removed)} "
+                    f"({len(current)}ファイル, {result.elapsed_ms:.0f}ms)"
+                )
+            return result
+
+    def _scan(self) -> Iterator[Tuple[str, Tuple[int, int]]]:
+        """索引対象ファイルの (相対パス, (mtime_ns, サイズ)) を列挙"""
+        # 索引ファイル自身の置き場所（既定では logs/）がルート配下なら索引しない
+        index_dir = self.index_path.resolve().parent
+        try:
+            excluded_prefix = index_dir.relative_to(self.root).as_posix() + "/"
+        except ValueError:
+            excluded_prefix = None
+        for entry in self.enumerator.files(self.extensions):
+            if excluded_prefix and entry.path.startswith(excluded_prefix):
+                continue
+            yield entry.path, (entry.mtime_ns, entry.size)
+
+    def _tokenize(self, entries: List[Tuple[str, int, int]], terms: Optional[frozenset] = None) -> ShardPostings:
+        """ファイルをトークン化（件数が多い場合のみプロセス並列）"""
+        if len(entries) < self.sharded_min_files:
+            return self.scanner.scan(entries, terms, workers=1)
+        started = time.perf_counter()
+        result = self.scanner.scan(entries, terms)
+        logger.info(
+            f"シャード分割トークン化: {len(entries)}ファイル "
+            f"(ワーカー {self.scanner.workers}, {(time.perf_counter() - started) * 1000:.0f}ms)"
+        )
+        return result
+
+    @staticmethod
+    def _known_files(connection: sqlite3.Connection) -> Dict[str, Tuple[int, int, int]]:
+        """索引済みファイルのパス → (files.id, mtime_ns, サイズ)"""
+        return {
+            path: (file_id, mtime_ns, size)
+            for file_id, path, mtime_ns, size in connection.execute("SELECT id, path, mtime_ns, size FROM files")
+        }
+
+    @staticmethod
+    def _delete_files(connection: sqlite3.Connection, file_ids: List[int]) -> None:
+        rows = [(file_id,) for file_id in file_ids]
+        connection.executemany("DELETE FROM postings WHERE file_id = ?", rows)
+        connection.executemany("DELETE FROM files WHERE id = ?", rows)
+
+    # ------------------------------------------------------------------ 検索
+
+    def search(self, query: str, k: int = 5) -> List[PrecedentHit]:
+        """クエリ語を含むファイルを関連度順に最大k件返す（抜粋付き）"""
+        terms = self._query_terms(query)
+        if not terms or k <= 0:
+            return []
+
+        connection = self._connect()
+        try:
+            document_count, average_length = connection.execute(
+                "SELECT COUNT(*), AVG(length) FROM files"
+            ).fetchone()
+            if not document_count:
+                return []
+            average_length = average_length or 1.0
+
+            placeholders = ",".join("?" * len(terms))
+            rows = connection.execute(
+                f"SELECT p.term, p.file_id, p.tf, f.length FROM postings p "
+                f"JOIN files f ON f.id = p.file_id WHERE p.term IN ({placeholders})",
+                terms,
+            ).fetchall()
+        finally:
+            connection.close()
+
+        ranked, scores, matched = rank_postings(rows, document_count, average_length, k)
+        if not ranked:
+            return []
+
+        connection = self._connect()
+        try:
+            placeholders = ",".join("?" * len(ranked))
+            paths = dict(connection.execute(f"SELECT id, path FROM files WHERE id IN ({placeholders})", ranked))
+        finally:
+            connection.close()
+
+        return self._hits(terms, ranked, paths, scores, matched)
+
+    def scan_search(self, query: str, k: int = 5) -> List[PrecedentHit]:
+        """索引を使わず対象ファイルを全件走査して検索（depth="comprehensive" 用）
+
+        索引の更新間隔に関係なく現在のファイル内容で順位付けする。
+        対象ファイルが多い場合はシャード分割スキャナーで複数プロセスに分けて走査する。
+        """
+        terms = self._query_terms(query)
+        if not terms or k <= 0:
+            return []
+        entries = [(path, mtime_ns, size) for path, (mtime_ns, size) in self._scan()]
+        scanned = self._tokenize(entries, frozenset(terms))
+        if not scanned.files:
+            return []
+
+        lengths = [length for _, _, _, length in scanned.files]
+        average_length = (sum(lengths) / len(lengths)) or 1.0
+        rows = ((term, position, frequency, lengths[position]) for term, position, frequency in scanned.postings)
+        ranked, scores, matched = rank_postings(rows, len(lengths), average_length, k)
+        paths = {position: scanned.files[position][0] for position in ranked}
+        return self._hits(terms, ranked, paths, scores, matched)
+
+    @staticmethod
+    def _query_terms(query: str) -> List[str]:
+        return list(dict.fromkeys(index_terms(query)))[:MAX_QUERY_TERMS]
+
+    def _hits(
+        self,
+        terms: List[str],
+        ranked: List[int],
+        paths: Dict[int, str],
+        scores: Dict[int, float],
+        matched: Dict[int, Set[str]],
+    ) -> List[PrecedentHit]:
+        hits = []
+        for document in ranked:
+            check_cancelled()
+            path = paths.get(document)
+            if path is None:
+                continue
+            ordered_terms = tuple(term for term in terms if term in matched[document])
+            line_number, snippet = self._snippet(path, ordered_terms)
+            hits.append(PrecedentHit(path, scores[document], ordered_terms, line_number, snippet))
+        return hits
+
+    def _snippet(self, path: str, terms: Tuple[str, ...]) -> Tuple[int, str]:
+        """一致語を最も多く含む一致箇所の前後を抜粋として返す（ファイル全体は読み込まない）"""
+        windows = scan_file(self.root / path, terms, SNIPPET_CONTEXT_BYTES, SNIPPET_MAX_WINDOWS)
+        if not windows:
+            return 0, ""
+        best = max(
+            windows,
+            key=lambda window: (sum(1 for term in terms if term in window.text.lower()), -window.offset),
+        )
+        return best.line_number, best.render()
+
+    # ------------------------------------------------------------------ 状態
+
+    def stats(self) -> Dict[str, int]:
+        """索引済みファイル数・語数・世代"""
+        connection = self._connect()
+        try:
+            file_count = connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            term_count = connection.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0]
+        finally:
+            connection.close()
+        return {"files": file_count, "terms": term_count, "version": self._version}
+
+    def _connect(self) -> sqlite3.Connection:
+        """接続を開く（初回は表を作成し、ルート・構造の異なる索引は作り直す）"""
+        if not self._initialized:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.index_path, timeout=30.0, isolation_level=None)
+        if not self._initialized:
+            connection.executescript(_SCHEMA)
+            expected = {"schema_version": str(SCHEMA_VERSION), "root": str(self.root)}
+            if any(self._get_meta(connection, key, None) != value for key, value in expected.items()):
+                logger.info(f"リポジトリ索引を初期化します: {self.index_path}")
+                connection.execute("BEGIN IMMEDIATE")
+                connection.execute("DELETE FROM postings")
+                connection.execute("DELETE FROM files")
+                version = int(self._get_meta(connection, "version", "0")) + 1
+                connection.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    list(expected.items()) + [("version", str(version))],
+                )
+                connection.commit()
+            self._initialized = True
+        return connection
+
+    @staticmethod
+    def _get_meta(connection: sqlite3.Connection, key: str, default: Optional[str]) -> Optional[str]:
+        row = connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
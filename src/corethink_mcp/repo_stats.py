@@ -0,0 +1,223 @@
+"""
+CoreThink-MCP リポジトリ統計
+
+共有のファイル列挙器が返すファイルを一度だけ走査し、言語別のファイル数・行数・サイズ、
+主要ディレクトリ、内容が同一のファイル（重複）を集計する。
+
+ファイルごとの解析結果（行数・内容ダイジェスト）は (mtime, サイズ) をキーに保持し、
+再分析では変更されたファイルだけを読み直す。未解析のファイルが多い初回はスレッドプールで並列に読む。
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cancellation import CancelToken, check_cancelled, current_token
+from .file_enumerator import FileEntry, FileEnumerator
+
+logger = logging.getLogger(__name__)
+
+# 拡張子 → 言語
+LANGUAGE_BY_SUFFIX = {
+    ".py": "Python", ".pyi": "Python",
+    ".js": "JavaScript", ".mjs": "JavaScript", ".cjs": "JavaScript", ".jsx": "JavaScript",
+    ".ts": "TypeScript", ".tsx": "TypeScript",
+    ".go": "Go", ".rs": "Rust", ".java": "Java", ".kt": "Kotlin", ".rb": "Ruby", ".php": "PHP",
+    ".c": "C", ".h": "C", ".cc": "C++", ".cpp": "C++", ".hpp": "C++", ".cs": "C#", ".swift": "Swift",
+    ".sh": "Shell", ".bash": "Shell", ".ps1": "PowerShell", ".bat": "Batch",
+    ".html": "HTML", ".css": "CSS", ".scss": "CSS", ".sql": "SQL",
+    ".md": "Markdown", ".rst": "reStructuredText", ".txt": "Text",
+    ".json": "JSON", ".yaml": "YAML", ".yml": "YAML", ".toml": "TOML", ".ini": "INI", ".cfg": "INI",
+}
+OTHER_LANGUAGE = "その他"
+
+# 未解析のファイルがこれ以上ある場合にスレッドプールで並列解析する
+PARALLEL_THRESHOLD = 64
+READ_CHUNK_BYTES = 256 * 1024
+TOP_DIRECTORIES = 5
+TOP_LANGUAGES = 8
+
+
+@dataclass(frozen=True)
+class FileStats:
+    """ファイル1件の解析結果"""
+    language: str
+    size: int
+    lines: int
+    digest: str  # 内容のダイジェスト（重複ファイルの検出用）
+
+
+@dataclass
+class Tally:
+    """ファイル数・行数・バイト数の集計"""
+    files: int = 0
+    lines: int = 0
+    bytes: int = 0
+
+    def add(self, stats: FileStats) -> None:
+        self.files += 1
+        self.lines += stats.lines
+        self.bytes += stats.size
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"files": self.files, "lines": self.lines, "bytes": self.bytes}
+
+
+@dataclass
+class RepoStats:
+    """リポジトリ統計"""
+    total: Tally
+    languages: Dict[str, Tally]  # 行数の多い順
+    directories: Dict[str, Tally]  # 行数の多い順（ルート直下のファイルは "."）
+    duplicate_groups: List[List[str]] = field(default_factory=list)
+    source: str = ""  # ファイル列挙方法（git / scandir）
+    analyzed: int = 0  # 今回読み直したファイル数
+    elapsed_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total.to_dict(),
+            "languages": {name: tally.to_dict() for name, tally in self.languages.items()},
+            "directories": {name: tally.to_dict() for name, tally in self.directories.items()},
+            "duplicate_groups": self.duplicate_groups,
+            "source": self.source,
+            "analyzed": self.analyzed,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+        }
+
+    def render(self) -> str:
+        """推論材料「リポジトリコンテキスト」の本文"""
+        source = {"git": "git 追跡ファイル", "scandir": ".gitignore 考慮の走査"}.get(self.source, self.source)
+        lines = [
+            f"【プロジェクト構造】テキストファイル {self.total.files:,}件・{self.total.lines:,}行・"
+            f"{_format_bytes(self.total.bytes)}（{source}）"
+        ]
+        languages = list(self.languages.items())
+        if languages:
+            lines.append("【言語別】" + ", ".join(
+                f"{name} {tally.files:,}件/{tally.lines:,}行/{_format_bytes(tally.bytes)}"
+                for name, tally in languages[:TOP_LANGUAGES]
+            ) + (f" 他{len(languages) - TOP_LANGUAGES}言語" if len(languages) > TOP_LANGUAGES else ""))
+        directories = [(name, tally) for name, tally in self.directories.items() if not name.startswith(".")]
+        if directories:
+            lines.append("【主要ディレクトリ】" + ", ".join(
+                f"{name}（{tally.files:,}件・{tally.lines:,}行）" for name, tally in directories[:TOP_DIRECTORIES]
+            ))
+        if self.duplicate_groups:
+            examples = " / ".join(" = ".join(group[:2]) for group in self.duplicate_groups[:3])
+            lines.append(f"【重複ファイル】{len(self.duplicate_groups)}組（{examples}）")
+        lines.append(f"【分析】変更 {self.analyzed:,}件 / 全 {self.total.files:,}件を解析（{self.elapsed_ms:.0f}ms）")
+        return "\n".join(lines)
+
+
+def _format_bytes(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f}MB"
+    if size >= 1024:
+        return f"{size / 1024:.1f}KB"
+    return f"{size}B"
+
+
+def analyze_file(path: Path, size: int) -> FileStats:
+    """ファイルの行数とダイジェストをチャンク単位で計算"""
+    suffix = path.suffix.lower()
+    digest = hashlib.blake2b(digest_size=16)
+    lines = 0
+    last_byte = b"\n"
+    with open(path, "rb") as handle:
+        while True:
+            chunk = handle.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+            lines += chunk.count(b"\n")
+            last_byte = chunk[-1:]
+    # 末尾に改行のない最終行も1行として数える
+    if size and last_byte != b"\n":
+        lines += 1
+    return FileStats(LANGUAGE_BY_SUFFIX.get(suffix, OTHER_LANGUAGE), size, lines, digest.hexdigest())
+
+
+class RepoStatsEngine:
+    """ファイル単位キャッシュ付きのリポジトリ統計エンジン"""
+
+    def __init__(self, enumerator: FileEnumerator, max_workers: Optional[int] = None):
+        self.enumerator = enumerator
+        self.max_workers = max_workers or None
+        self._cache: Dict[str, Tuple[int, int, FileStats]] = {}  # パス → (mtime_ns, サイズ, 解析結果)
+        self._lock = threading.Lock()
+
+    def analyze(self) -> RepoStats:
+        """統計を集計（変更のないファイルは前回の解析結果を再利用）"""
+        with self._lock:
+            return self._analyze()
+
+    def _analyze(self) -> RepoStats:
+        started = time.perf_counter()
+        entries = self.enumerator.files()
+        stale = [entry for entry in entries if self._cache.get(entry.path, (None, None))[:2] != (entry.mtime_ns, entry.size)]
+
+        # プールのスレッドはコンテキストを引き継がないため、取り消しトークンを渡す
+        token = current_token()
+        if len(stale) >= PARALLEL_THRESHOLD:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="repo-stats") as executor:
+                analyzed = list(executor.map(lambda entry: self._analyze_entry(entry, token), stale))
+        else:
+            analyzed = [self._analyze_entry(entry, token) for entry in stale]
+        for entry, stats in zip(stale, analyzed):
+            if stats is not None:
+                self._cache[entry.path] = (entry.mtime_ns, entry.size, stats)
+
+        # 列挙されなくなったファイルの結果は破棄
+        present = {entry.path for entry in entries}
+        for path in [path for path in self._cache if path not in present]:
+            del self._cache[path]
+
+        total = Tally()
+        languages: Dict[str, Tally] = {}
+        directories: Dict[str, Tally] = {}
+        by_digest: Dict[str, List[str]] = {}
+        for entry in entries:
+            cached = self._cache.get(entry.path)
+            if cached is None:
+                continue
+            stats = cached[2]
+            total.add(stats)
+            languages.setdefault(stats.language, Tally()).add(stats)
+            directory = entry.path.split("/", 1)[0] if "/" in entry.path else "."
+            directories.setdefault(directory, Tally()).add(stats)
+            if stats.size:
+                by_digest.setdefault(stats.digest, []).append(entry.path)
+
+        def _by_lines(tallies: Dict[str, Tally]) -> Dict[str, Tally]:
+            return dict(sorted(tallies.items(), key=lambda item: (-item[1].lines, -item[1].files, item[0])))
+
+        result = RepoStats(
+            total=total,
+            languages=_by_lines(languages),
+            directories=_by_lines(directories),
+            duplicate_groups=sorted((paths for paths in by_digest.values() if len(paths) > 1), key=len, reverse=True),
+            source=self.enumerator.source,
+            analyzed=len(stale),
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+        logger.debug(f"リポジトリ統計: {total.files}ファイル（解析 {len(stale)}件, {result.elapsed_ms:.0f}ms）")
+        return result
+
+    def clear(self) -> None:
+        """ファイル単位の解析結果を破棄"""
+        with self._lock:
+            self._cache.clear()
+
+    def _analyze_entry(self, entry: FileEntry, token: Optional[CancelToken] = None) -> Optional[FileStats]:
+        check_cancelled(token)
+        try:
+            return analyze_file(self.enumerator.root / entry.path, entry.size)
+        except OSError as e:
+            logger.debug(f"統計対象ファイル読み込みスキップ ({entry.path}): {e}")
+            return None
@@ -0,0 +1,306 @@
+"""
+CoreThink-MCP 応答形式
+
+ツールの応答を Markdown（既定）か JSON で返す。
+JSON は構造化した辞書を orjson（未インストールなら標準 json）で一度だけ、
+空白なしのコンパクト形式でシリアライズする。
+複数のセクションに同じ行（制約ルールなど）が現れる場合は、後のセクションから省いて出現元の行を参照する。
+
+応答プロファイル compact は装飾（表題行・見出しの絵文字・太字・連続する空行）と定型セクションを除き、
+長いセクションは先頭 COMPACT_SECTION_CHARS 文字程度に要約する（材料・ルールは関連度順のため先頭を残す）。
+max_response_chars を指定すると長いセクションから順に要約（末尾を省略）して文字数上限に収める。
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+FORMAT_MARKDOWN = "markdown"
+FORMAT_JSON = "json"
+OUTPUT_FORMATS = (FORMAT_MARKDOWN, FORMAT_JSON)
+
+
+def normalize_output_format(output_format: str) -> str:
+    """output_format を正規化（未対応の形式は ValueError）"""
+    normalized = (output_format or FORMAT_MARKDOWN).strip().lower()
+    if normalized not in OUTPUT_FORMATS:
+        raise ValueError(f"未対応の出力形式です: {output_format}（{', '.join(OUTPUT_FORMATS)}）")
+    return normalized
+
+
+def dumps_json(payload: Dict[str, Any]) -> str:
+    """コンパクトな JSON 文字列にシリアライズ（非ASCII文字はそのまま、未対応の型は str）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def loads_json(text: str) -> Any:
+    """dumps_json の出力を読み込む"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def error_json(tool: str, message: str) -> str:
+    """JSON 形式のエラー応答"""
+    return dumps_json({"tool": tool, "error": message})
+
+
+# これより短い行は重複していても省かない（見出しなど）
+MIN_SHARED_LINE_CHARS = 20
+
+
+def share_repeated_lines(sections: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, Dict[str, List[int]]]]:
+    """先のセクションと同じ行を後のセクションから省く（JSON 出力で同じ本文を繰り返さない）
+
+    Returns:
+        (省いた後の各セクションの本文, {省いたセクション名: {出現元のセクション名: [出現元での行番号（0始まり）]}})
+    """
+    first_seen: Dict[str, Tuple[str, int]] = {}
+    bodies: Dict[str, str] = {}
+    shared: Dict[str, Dict[str, List[int]]] = {}
+    for name, content in sections.items():
+        kept = []
+        for number, line in enumerate(content.split("\n")):
+            origin = first_seen.get(line) if len(line) >= MIN_SHARED_LINE_CHARS else None
+            if origin is not None and origin[0] != name:
+                shared.setdefault(name, {}).setdefault(origin[0], []).append(origin[1])
+                continue
+            first_seen.setdefault(line, (name, number))
+            kept.append(line)
+        bodies[name] = "\n".join(kept)
+    return bodies, shared
+
+
+# ================== 応答プロファイル・文字数上限 ==================
+
+PROFILE_FULL = "full"
+PROFILE_COMPACT = "compact"
+RESPONSE_PROFILES = (PROFILE_FULL, PROFILE_COMPACT)
+
+# 省略した箇所に付ける印（省略した文字数を含める）
+TRUNCATION_MARK = "…（{count}文字省略）"
+# これより短い文字列・セクションは要約しない
+MIN_SUMMARY_CHARS = 40
+# compact プロファイルでのセクション本文の上限
+COMPACT_SECTION_CHARS = 1200
+
+# セクション見出し（【...】 または Markdown の見出し）
+_SECTION_HEADING = re.compile(r"^(?:【[^】\n]+】.*|#{1,6} .+)$", re.MULTILINE)
+# 見出しの装飾用の絵文字（判定の記号 ✅❌⚠️ などは本文では意味を持つため見出しからのみ除く）
+_DECORATION = re.compile(
+    "[\U0001F300-\U0001FAFF\u2600-\u27BF\u2B50\u2B55\uFE0F\u200D]+ ?"
+)
+# 応答冒頭の表題（「🧠 **CoreThink統合GSR推論結果** ...」のような絵文字付きの太字行）
+_BANNER = re.compile("^[\U0001F300-\U0001FAFF\u2600-\u27BF\uFE0F ]+\\*\\*")
+# compact プロファイルで省く定型セクション（見出しの名前）
+TEMPLATE_SECTIONS = ("次ステップ", "最終判断", "言語内推論過程", "GSR原則適合性")
+
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def normalize_profile(profile: str) -> str:
+    """応答プロファイルを正規化（未対応のプロファイルは ValueError）"""
+    normalized = (profile or PROFILE_FULL).strip().lower()
+    if normalized not in RESPONSE_PROFILES:
+        raise ValueError(f"未対応の応答プロファイルです: {profile}（{', '.join(RESPONSE_PROFILES)}）")
+    return normalized
+
+
+def compact_text(text: str) -> str:
+    """装飾（表題行・見出しの絵文字・太字・行頭行末の空白・連続する空行）を除いた文字列"""
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if _BANNER.match(line):
+            continue
+        if line.startswith("【") or line.startswith("#"):
+            line = _DECORATION.sub("", line)
+        line = _BOLD.sub(r"\1", line)
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+@dataclass
+class Section:
+    """応答のセクション（見出しのない先頭部分は heading が空）"""
+    heading: str
+    body: str
+
+    def render(self) -> str:
+        if not self.heading:
+            return self.body
+        return f"{self.heading}\n{self.body}" if self.body else self.heading
+
+
+def split_sections(text: str) -> List[Section]:
+    """見出し行（【...】・# 見出し）でセクションに分割"""
+    sections: List[Section] = []
+    position = 0
+    heading = ""
+    for match in _SECTION_HEADING.finditer(text):
+        body = text[position:match.start()].strip("\n")
+        if heading or body:
+            sections.append(Section(heading, body))
+        heading = match.group(0)
+        position = match.end()
+    body = text[position:].strip("\n")
+    if heading or body:
+        sections.append(Section(heading, body))
+    return sections
+
+
+def summarize(text: str, limit: int) -> str:
+    """先頭 limit 文字程度を残して末尾を省略（行の途中で切る場合は直前の改行まで戻す）"""
+    if len(text) <= limit:
+        return text
+    cut = text[:max(0, limit)]
+    newline = cut.rfind("\n")
+    if newline >= limit * 0.7:
+        cut = cut[:newline]
+    return cut.rstrip() + TRUNCATION_MARK.format(count=len(text) - len(cut.rstrip()))
+
+
+def _water_fill(lengths: List[int], fixed: int, budget: int) -> int:
+    """長いものから順に切り詰めて合計を budget に収める上限（各要素は min(長さ, 上限)+省略印）
+
+    fixed は切り詰めない部分の文字数。収まらない場合は 0 を返す。
+    """
+    mark = len(TRUNCATION_MARK.format(count=0)) + 4
+
+    def total(cap: int) -> int:
+        return fixed + sum(length if length <= cap else cap + mark for length in lengths)
+
+    if total(max(lengths, default=0)) <= budget:
+        return max(lengths, default=0)
+    low, high = 0, max(lengths, default=0)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if total(middle) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def fit_text(text: str, max_chars: int) -> str:
+    """max_chars 以内に収める（見出しは残し、長いセクション本文から順に要約）"""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    sections = split_sections(text)
+    separator = 2  # セクション間の空行
+    fixed = sum(len(section.heading) + 1 for section in sections) + separator * max(0, len(sections) - 1)
+    cap = _water_fill([len(section.body) for section in sections], fixed, max_chars)
+    if cap >= MIN_SUMMARY_CHARS:
+        fitted = "\n\n".join(
+            Section(section.heading, summarize(section.body, cap)).render() for section in sections
+        )
+        if len(fitted) <= max_chars:
+            return fitted
+    # 見出しだけでも収まらない場合は全体の末尾を省略
+    return summarize(text, max(0, max_chars - len(TRUNCATION_MARK.format(count=len(text)))))
+
+
+def summarize_sections(text: str, limit: int = COMPACT_SECTION_CHARS) -> str:
+    """各セクションの本文を limit 文字程度に要約"""
+    return "\n\n".join(
+        Section(section.heading, summarize(section.body, limit)).render() for section in split_sections(text)
+    )
+
+
+def _section_name(heading: str) -> str:
+    match = re.match(r"【([^】]+)】", heading)
+    return match.group(1).strip() if match else heading.lstrip("#").strip()
+
+
+def shape_response(
+    text: str,
+    profile: str = PROFILE_FULL,
+    max_chars: int = 0,
+    template_sections: Tuple[str, ...] = TEMPLATE_SECTIONS,
+) -> str:
+    """Markdown 応答にプロファイルと文字数上限を適用
+
+    compact では装飾を除き、template_sections の定型セクションを省いて長いセクションを要約する。
+    """
+    if profile == PROFILE_COMPACT:
+        sections = [
+            Section(section.heading, summarize(section.body, COMPACT_SECTION_CHARS))
+            for section in split_sections(compact_text(text))
+            if _section_name(section.heading) not in template_sections
+        ]
+        text = "\n\n".join(section.render() for section in sections)
+    return fit_text(text, max_chars)
+
+
+def _string_leaves(value: Any, path: Tuple = ()) -> List[Tuple[Tuple, str]]:
+    """JSON 値に含まれる文字列（要約対象の長さのもの）とその位置"""
+    if isinstance(value, str):
+        return [(path, value)] if len(value) >= MIN_SUMMARY_CHARS else []
+    if isinstance(value, dict):
+        return [leaf for key, item in value.items() for leaf in _string_leaves(item, path + (key,))]
+    if isinstance(value, list):
+        return [leaf for index, item in enumerate(value) for leaf in _string_leaves(item, path + (index,))]
+    return []
+
+
+def _set_path(value: Any, path: Tuple, replacement: Any) -> None:
+    for key in path[:-1]:
+        value = value[key]
+    value[path[-1]] = replacement
+
+
+def fit_payload(payload: Dict[str, Any], max_chars: int, dumps: Callable[[Dict[str, Any]], str] = None) -> str:
+    """JSON オブジェクトを max_chars 以内にシリアライズ
+
+    長い文字列から順に要約し、それでも収まらなければ最も長いリストの後半を削る。
+    要約・削除した場合は "truncated" に位置ごとの省略数（文字列は文字数、リストは件数）を記録する。
+    JSON として有効な形を保つため、リスト以外の値だけで上限を超える場合は上限を超えて返す。
+    """
+    dumps = dumps or dumps_json
+    text = dumps(payload)
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+
+    truncated: Dict[str, int] = {}
+    leaves = _string_leaves(payload)
+    if leaves:
+        lengths = [len(leaf) for _, leaf in leaves]
+        overhead = len(',"truncated":{}') + sum(len(str(path)) + 8 for path, _ in leaves)
+        cap = _water_fill(lengths, len(text) - sum(lengths) + overhead, max_chars)
+        for path, leaf in leaves:
+            if len(leaf) > cap:
+                summary = summarize(leaf, max(cap, MIN_SUMMARY_CHARS))
+                _set_path(payload, path, summary)
+                truncated[".".join(str(key) for key in path)] = len(leaf) - len(summary)
+        payload["truncated"] = truncated
+        text = dumps(payload)
+
+    while len(text) > max_chars:
+        lists = [
+            (len(dumps({"_": value})), key) for key, value in payload.items()
+            if isinstance(value, list) and value
+        ]
+        if not lists:
+            break
+        _, key = max(lists)
+        keep = len(payload[key]) // 2
+        truncated[key] = truncated.get(key, 0) + len(payload[key]) - keep
+        payload[key] = payload[key][:keep]
+        payload["truncated"] = truncated
+        text = dumps(payload)
+    return text
@@ -0,0 +1,210 @@
+"""
+CoreThink-MCP 推論結果キャッシュ
+
+統合GSR推論の応答を SQLite に保存し、同一入力の再推論とログ書き込みを省く。
+キーは入力（正規化した状況・判断・深度・モード）と、制約・機能フラグ・索引の
+バージョンを正規化した JSON の SHA-256。制約・機能フラグは内容のハッシュ、
+索引の世代は索引ファイルに保存された値を使うため、サーバー再起動後も再利用できる。
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+from .materials_cache import normalize_topic
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    confidence TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at);
+"""
+
+
+def fingerprint(value: Any) -> str:
+    """値を正規化した JSON（キー順固定）の SHA-256"""
+    canonical = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def reasoning_result_key(
+    situation: str,
+    required_judgment: str,
+    context_depth: str,
+    reasoning_mode: str,
+    versions: Mapping[str, Any],
+    output_format: str = "markdown",
+    response_profile: str = "full",
+    material_types: Sequence[str] = (),
+) -> str:
+    """推論結果1件のキャッシュキー（versions は制約・機能フラグ・索引などのバージョン）
+
+    context_depth・material_types は実際に推論した深度・材料（適応的深度制御で選んだもの）を渡す。
+    応答の文字数上限は保存後に適用するため、キーには含めない。
+    """
+    return fingerprint({
+        "situation": normalize_topic(situation),
+        "required_judgment": required_judgment,
+        "context_depth": context_depth,
+        "reasoning_mode": reasoning_mode,
+        "material_types": list(material_types),
+        "output_format": output_format,
+        "response_profile": response_profile,
+        "versions": dict(versions),
+    })
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """保存済みの推論結果"""
+    key: str
+    content: str
+    confidence: str
+    created_at: float  # UNIX 時刻
+    hits: int  # この参照を含むヒット回数
+
+    @property
+    def created(self) -> datetime:
+        return datetime.fromtimestamp(self.created_at)
+
+
+class ResultCache:
+    """SQLite に保存する推論結果の LRU+TTL キャッシュ
+
+    件数が上限を超えると最も長く参照されていない結果から破棄し、
+    保存から ttl_seconds を過ぎた結果は参照時に破棄する（0以下で期限なし）。
+    接続は操作ごとに開くため、複数のスレッド・プロセスから共有できる。
+    """
+
+    def __init__(self, cache_path: Path, max_entries: int = 512, ttl_seconds: float = 0.0):
+        self.cache_path = Path(cache_path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._initialized = False
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        """結果を取得（未保存・期限切れは None）。参照時刻とヒット回数を更新する"""
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            try:
+                row = connection.execute(
+                    "SELECT content, confidence, created_at, hits FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and self.ttl_seconds > 0 and now - row[2] > self.ttl_seconds:
+                    connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self.expired += 1
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                connection.execute(
+                    "UPDATE results SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (now, key)
+                )
+                self.hits += 1
+                return CachedResult(key, row[0], row[1], row[2], row[3] + 1)
+            finally:
+                connection.close()
+
+    def put(self, key: str, content: str, confidence: str) -> None:
+        """結果を保存し、上限を超えた分を参照の古い順に破棄"""
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                connection.execute(
+                    "INSERT OR REPLACE INTO results (key, content, confidence, created_at, accessed_at, hits)"
+                    " VALUES (?, ?, ?, ?, ?, 0)",
+                    (key, content, confidence, now, now),
+                )
+                cursor = connection.execute(
+                    "DELETE FROM results WHERE key IN"
+                    " (SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (max(1, self.max_entries),),
+                )
+                self.evicted += max(0, cursor.rowcount)
+                connection.commit()
+            except Exception:
+                if connection.in_transaction:
+                    connection.rollback()
+                raise
+            finally:
+                connection.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """キャッシュ統計"""
+        with self._lock:
+            connection = self._connect()
+            try:
+                entries, size = connection.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(LENGTH(content)), 0) FROM results"
+                ).fetchone()
+            finally:
+                connection.close()
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "content_chars": size,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "path": str(self.cache_path),
+            }
+
+    def clear(self) -> None:
+        """保存済みの結果をすべて削除"""
+        with self._lock:
+            connection = self._connect()
+            try:
+                connection.execute("DELETE FROM results")
+            finally:
+                connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """接続を開く（初回は表を作成し、構造の異なるキャッシュは作り直す）"""
+        if not self._initialized:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.cache_path, timeout=30.0, isolation_level=None)
+        if not self._initialized:
+            connection.executescript(_SCHEMA)
+            row = connection.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            if row is None or row[0] != str(SCHEMA_VERSION):
+                logger.info(f"推論結果キャッシュを初期化します: {self.cache_path}")
+                connection.execute("BEGIN IMMEDIATE")
+                connection.execute("DELETE FROM results")
+                connection.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),)
+                )
+                connection.commit()
+            self._initialized = True
+        return connection
@@ -9,9 +9,11 @@ import sys
 import socket
 import signal
 import asyncio
+import functools
+from contextvars import ContextVar
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List
 from dotenv import load_dotenv
 
 # UTF-8エンコーディング強制設定
@@ -38,9 +40,47 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from src.corethink_mcp import get_version_info
-from src.corethink_mcp.feature_flags import feature_flags, is_sampling_enabled, get_sampling_timeout, is_history_enabled
+from src.corethink_mcp.feature_flags import (
+    feature_flags, is_sampling_enabled, get_sampling_timeout, is_history_enabled,
+    is_constraint_hot_reload_enabled, get_constraint_reload_interval, is_constraint_pack_enabled,
+    get_context_budget, is_repo_index_enabled, get_repo_index_path, get_repo_index_refresh_interval,
+    get_max_concurrent_tools, get_collector_timeout, is_materials_cache_enabled,
+    is_change_history_index_enabled, get_change_history_index_path,
+    is_adaptive_depth_enabled, get_adaptive_depth_threshold, get_depth_control_max_tools,
+    get_batch_max_concurrency, get_batch_max_items, is_result_cache_enabled, get_result_cache_path,
+    get_response_profile, get_max_response_chars
+)
+from src.corethink_mcp.constraint_index import ConstraintIndex, BASE_DOMAIN, parse_constraint_text
+from src.corethink_mcp.domain_detector import DomainMatch, DomainMatcher
+from src.corethink_mcp.constraint_composer import ComposedConstraints, ConstraintComposer
+from src.corethink_mcp.constraint_watcher import ConstraintWatcher
+from src.corethink_mcp.constraint_pack import load_pack
+from src.corethink_mcp.context_packer import (
+    ContextPacker, PackedContext, PRIORITY_CRITICAL_RULES, PRIORITY_DOMAIN_RULES,
+    PRIORITY_PRECEDENTS, PRIORITY_MATERIALS
+)
+from src.corethink_mcp.file_enumerator import FileEnumerator
+from src.corethink_mcp.content_scanner import scan_file
+from src.corethink_mcp.repo_index import RepoIndex
+from src.corethink_mcp.change_history import ChangeHistoryIndex
+from src.corethink_mcp.reasoning_result import ConfidenceAssessment, ReasoningResult
+from src.corethink_mcp.response_format import (
+    FORMAT_JSON, PROFILE_COMPACT, dumps_json, error_json, fit_payload, fit_text, loads_json,
+    normalize_output_format, normalize_profile, shape_response, share_repeated_lines
+)
+from src.corethink_mcp.gsr_engine import gsr_engine
+from src.corethink_mcp.depth_controller import depth_controller
+from src.corethink_mcp.batch_runner import BatchItemResult, run_batch
+from src.corethink_mcp.cancellation import cancellable, check_cancelled
+from src.corethink_mcp.repo_stats import RepoStatsEngine
+from src.corethink_mcp.material_collector import (
+    CollectorJob, CollectorResult, GatheredMaterials, MaterialSection, STATUS_CACHED, STATUS_TIMEOUT,
+    iter_collectors
+)
+from src.corethink_mcp.materials_cache import MaterialsCache, section_key
+from src.corethink_mcp.result_cache import ResultCache, fingerprint, reasoning_result_key
 from src.corethink_mcp.history_manager import log_tool_execution
-from src.corethink_mcp.reasoning_logger import reasoning_logger
+from src.corethink_mcp.reasoning_logger import STATUS_ERROR, reasoning_logger
 
 # ログ設定（UTF-8対応）
 log_level = os.getenv("CORETHINK_LOG_LEVEL", "INFO")
@@ -103,6 +143,63 @@ CONSTRAINTS_FILE = CONSTRAINTS_DIR / "constraints.txt"
 CONSTRAINTS_CLOUD_DEVOPS_FILE = Path(__file__).parent.parent / "constraints_cloud_devops.txt"
 SANDBOX_DIR = os.getenv("CORETHINK_SANDBOX_DIR", ".sandbox")
 
+# 材料タイプ → 材料名（収集結果の見出し）
+MATERIAL_SECTIONS = {
+    "constraints": "制約情報",
+    "precedents": "先例・前例",
+    "implications": "影響・含意",
+    "domain_knowledge": "専門知識",
+    "risk_factors": "リスク要因",
+    "symbolic_patterns": "シンボリックパターン",
+    "repository_context": "リポジトリコンテキスト",
+}
+
+# 収集深度ごとに提示する関連制約ルールの件数（BM25 上位k件）
+RULE_TOP_K_BY_DEPTH = {"minimal": 5, "standard": 10, "deep": 20, "comprehensive": 40}
+# 収集深度ごとに提示する先例ファイルの件数
+PRECEDENT_TOP_K_BY_DEPTH = {"minimal": 3, "standard": 5, "deep": 10, "comprehensive": 20}
+
+# 制約インデックス（解析済み制約をメモリに保持し、変更時のみ再解析）
+constraint_index = ConstraintIndex(CONSTRAINTS_DIR)
+# 分野横断の制約合成（分野の組×インデックスバージョンでLRUキャッシュ）
+constraint_composer = ConstraintComposer(constraint_index)
+# 制約ファイル監視（変更をバックグラウンドで検知し、再起動なしで反映）
+constraint_watcher = ConstraintWatcher(constraint_index, poll_interval=get_constraint_reload_interval())
+# リポジトリのファイル列挙（索引・分析で共有。HEAD とインデックスの mtime が変わるまで再列挙しない）
+file_enumerator = FileEnumerator(
+    REPO_ROOT,
+    max_file_bytes=feature_flags.get_config('REPO_SCAN_MAX_FILE_BYTES', 512 * 1024),
+    excluded_dirs=[SANDBOX_DIR],
+    use_git=feature_flags.get_config('REPO_SCAN_USE_GIT', True)
+)
+# リポジトリ索引（先例検索用。パス・mtime・サイズで差分更新、初回構築はプロセス並列でトークン化）
+repo_index = RepoIndex(
+    REPO_ROOT,
+    Path(get_repo_index_path()),
+    enumerator=file_enumerator,
+    workers=feature_flags.get_config('REPO_INDEX_WORKERS', 0),
+    sharded_min_files=feature_flags.get_config('REPO_INDEX_SHARDED_MIN_FILES', 1000)
+)
+# 変更履歴索引（先例検索用。最後に索引したコミット以降だけを追加）
+change_history = ChangeHistoryIndex(
+    REPO_ROOT,
+    Path(get_change_history_index_path()),
+    max_commits=feature_flags.get_config('CHANGE_HISTORY_MAX_COMMITS', 2000)
+)
+# リポジトリ統計（言語別・ディレクトリ別の集計。ファイル単位の解析結果を mtime・サイズで再利用）
+repo_stats = RepoStatsEngine(file_enumerator, max_workers=feature_flags.get_config('REPO_STATS_MAX_WORKERS', 0))
+# 推論材料キャッシュ（材料タイプごと。制約・索引のバージョンをキーに含め、更新時は自動的に別キー）
+materials_cache = MaterialsCache(
+    max_entries=feature_flags.get_config('MATERIALS_CACHE_MAX_ENTRIES', 256),
+    ttl_seconds=feature_flags.get_config('MATERIALS_CACHE_TTL_SECONDS', 300.0)
+)
+# 推論結果キャッシュ（統合GSR推論の応答。SQLite に保存し、再起動後も同一入力なら再利用）
+result_cache = ResultCache(
+    Path(get_result_cache_path()),
+    max_entries=feature_flags.get_config('RESULT_CACHE_MAX_ENTRIES', 512),
+    ttl_seconds=feature_flags.get_config('RESULT_CACHE_TTL_SECONDS', 0.0)
+)
+
 # ポート設定（自動検出）
 PREFERRED_PORT = int(os.getenv("CORETHINK_PORT", "8080"))
 AVAILABLE_PORT = find_available_port(PREFERRED_PORT)
@@ -118,48 +215,88 @@ else:
     # 代替実装
     app = None
 
-# キーワードキャッシュ（起動時に一度だけ読み込み）
-_DOMAIN_KEYWORDS_CACHE = {}
+# 分野キーワードと分野検出器（制約インデックスのバージョンごとに構築）
+# (バージョン, キーワード, 検出器) のタプルを丸ごと差し替えるため、読み取り側は常に整合した組を参照する
+_DOMAIN_STATE: tuple[int, dict[str, list[str]], DomainMatcher | None] = (-1, {}, None)
 
-def _load_domain_keywords() -> dict[str, list[str]]:
-    """全分野のキーワードを一度に読み込んでキャッシュする"""
-    if _DOMAIN_KEYWORDS_CACHE:
-        return _DOMAIN_KEYWORDS_CACHE
-    
-    # 利用可能な分野リスト
-    domains = ["medical", "legal", "financial", "engineering", "ai_ml", "cloud_devops", "safety_critical"]
+def _set_domain_state(state: tuple[int, dict[str, list[str]], DomainMatcher]) -> None:
+    """分野キーワードと検出器を差し替える"""
+    global _DOMAIN_STATE
+    # 固定された古いスナップショット向けの構築で新しい状態を上書きしない
+    if state[0] >= _DOMAIN_STATE[0]:
+        _DOMAIN_STATE = state
+
+def _build_domain_state(snapshot) -> tuple[int, dict[str, list[str]], DomainMatcher]:
+    """スナップショットから分野キーワードと検出器を構築して差し替える"""
+    keywords = snapshot.keywords()
     
-    for domain in domains:
-        try:
-            constraints_dir = CONSTRAINTS_FILE.parent
-            domain_file = constraints_dir / f"constraints_{domain}.txt"
-            
-            if domain_file.exists():
-                constraints_content, keywords = parse_constraint_file(domain_file)
-                if keywords:
-                    _DOMAIN_KEYWORDS_CACHE[domain] = keywords
-                    logger.debug(f"分野 {domain} のキーワード {len(keywords)}個を読み込み")
-                else:
-                    logger.warning(f"分野 {domain} にキーワードが定義されていません")
-            else:
-                logger.warning(f"分野ファイルが見つかりません: {domain_file}")
-        except Exception as e:
-            logger.error(f"分野 {domain} のキーワード読み込みエラー: {e}")
+    for domain in snapshot.domains():
+        if domain not in keywords:
+            logger.warning(f"分野 {domain} にキーワードが定義されていません")
     
     # フォールバック用ハードコードキーワード（最小限）
-    if not _DOMAIN_KEYWORDS_CACHE.get("medical"):
-        _DOMAIN_KEYWORDS_CACHE["medical"] = ["診断", "症状", "治療", "医療", "患者"]
+    if not keywords.get("medical"):
+        keywords["medical"] = ["診断", "症状", "治療", "医療", "患者"]
     
-    logger.info(f"キーワードキャッシュ初期化完了: {len(_DOMAIN_KEYWORDS_CACHE)} 分野")
-    return _DOMAIN_KEYWORDS_CACHE
+    state = (snapshot.version, keywords, DomainMatcher(keywords))
+    _set_domain_state(state)
+    logger.info(f"分野キーワード更新: {len(keywords)} 分野 (制約インデックス v{snapshot.version})")
+    return state
+
+def _current_domain_state() -> tuple[int, dict[str, list[str]], DomainMatcher]:
+    """現在の制約スナップショットに対応する分野キーワードと検出器を取得"""
+    snapshot = constraint_index.snapshot()
+    state = _DOMAIN_STATE
+    if state[0] != snapshot.version:
+        state = _build_domain_state(snapshot)
+    return state
+
+def _load_constraint_pack() -> bool:
+    """事前コンパイル済み制約パックから制約インデックスと分野検出器を読み込む
+
+    パックが無い・古い場合はFalseを返し、通常のテキスト解析に任せる。
+    """
+    pack = load_pack(CONSTRAINTS_DIR)
+    if pack is None:
+        return False
+
+    snapshot = constraint_index.install(pack.files, notify=False)
+    if pack.keywords.get("medical"):
+        _set_domain_state((snapshot.version, pack.keywords, pack.matcher))
+    else:
+        # フォールバックキーワードを含めるため検出器は構築し直す
+        _build_domain_state(snapshot)
+    logger.info(f"制約パックを使用: {len(pack.files)}ファイル (制約インデックス v{snapshot.version})")
+    return True
+
+# 制約ファイル更新時は監視スレッド側でキーワードと検出器を事前構築
+constraint_index.add_listener(_build_domain_state)
+
+# stdioサーバーはクライアントのセッションごとに起動されるため、パックがあれば解析を省略
+if is_constraint_pack_enabled():
+    try:
+        _load_constraint_pack()
+    except Exception as e:
+        logger.warning(f"制約パックを読み込めませんでした（テキスト解析で継続）: {e}")
 
-def load_constraints() -> str:
-    """基本制約ファイルを読み込む"""
+# 監視開始（初回解析とキーワード・検出器の構築はここで完了する）
+if is_constraint_hot_reload_enabled():
     try:
-        return CONSTRAINTS_FILE.read_text(encoding="utf-8")
-    except FileNotFoundError:
+        constraint_watcher.start()
+    except Exception as e:
+        logger.warning(f"制約ファイル監視を開始できませんでした（読み取り時の変更確認で継続）: {e}")
+
+def _load_domain_keywords() -> dict[str, list[str]]:
+    """全分野のキーワードを取得（制約ファイル更新時のみ再構築）"""
+    return _current_domain_state()[1]
+
+def load_constraints() -> str:
+    """基本制約ファイルを読み込む（制約インデックスから取得）"""
+    base_file = constraint_index.snapshot().get(BASE_DOMAIN)
+    if base_file is None:
         logger.warning(f"制約ファイルが見つかりません: {CONSTRAINTS_FILE}")
         return "制約ファイルが読み込めませんでした"
+    return base_file.body
 
 def parse_constraint_file(file_path: Path) -> tuple[str, list[str]]:
     """制約ファイルから制約内容とキーワードを分離して読み込む
@@ -168,83 +305,307 @@ def parse_constraint_file(file_path: Path) -> tuple[str, list[str]]:
         tuple[str, list[str]]: (制約内容, キーワードリスト)
     """
     try:
-        content = file_path.read_text(encoding="utf-8")
-        
-        # KEYWORDSセクションを分離
-        if "## KEYWORDS" in content:
-            parts = content.split("## KEYWORDS", 1)
-            constraints_content = parts[0].strip()
-            keywords_section = parts[1].strip()
-            
-            # キーワード行を解析（コメント行をスキップ）
-            keywords = []
-            for line in keywords_section.split('\n'):
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    # カンマ区切りのキーワードを分割
-                    keywords.extend([kw.strip() for kw in line.split(',') if kw.strip()])
-            
-            return constraints_content, keywords
-        else:
-            # KEYWORDSセクションがない場合は制約のみ返す
-            return content, []
+        # 制約ディレクトリ内のファイルはインデックスの解析結果を使用
+        indexed = constraint_index.snapshot().lookup(file_path)
+        if indexed is not None:
+            return indexed.body, list(indexed.keywords)
+        
+        content = Path(file_path).read_text(encoding="utf-8")
+        constraints_content, keywords, _ = parse_constraint_text(content, file_path.stem)
+        return constraints_content, list(keywords)
             
     except Exception as e:
         logger.error(f"制約ファイル解析エラー ({file_path}): {e}")
         return "", []
 
 def load_domain_constraints(domain: str) -> str:
-    """分野別制約ファイルを読み込む"""
+    """分野別制約ファイルを読み込む（制約インデックスから取得）"""
     try:
-        constraints_dir = CONSTRAINTS_FILE.parent
-        domain_file = constraints_dir / f"constraints_{domain}.txt"
+        domain_file = constraint_index.snapshot().get(domain)
         
-        if domain_file.exists():
-            return domain_file.read_text(encoding="utf-8")
+        if domain_file is not None:
+            return domain_file.content
         else:
-            logger.warning(f"分野別制約ファイルが見つかりません: {domain_file}")
+            logger.warning(f"分野別制約ファイルが見つかりません: {CONSTRAINTS_DIR / f'constraints_{domain}.txt'}")
             return ""
     except Exception as e:
         logger.error(f"分野別制約ファイル読み込みエラー: {e}")
         return ""
 
+def compose_constraints(user_request: str = "") -> ComposedConstraints:
+    """ユーザー要求から検出された全分野の制約を統合する（ルール単位で重複除去）"""
+    domains = [match.domain for match in _detect_domains(user_request)]
+    return constraint_composer.compose(domains)
+
 def load_combined_constraints(user_request: str = "") -> str:
-    """基本制約と分野別制約を組み合わせて読み込む"""
-    # 基本制約を読み込む
-    base_constraints = load_constraints()
+    """基本制約と分野別制約を組み合わせて読み込む
     
-    # ユーザー要求から分野を検出
-    if user_request:
-        domain = _detect_domain(user_request)
-        if domain != "general":
-            domain_constraints = load_domain_constraints(domain)
-            if domain_constraints:
-                combined = f"{base_constraints}\n\n## 分野特化制約（{domain.upper()}）\n{domain_constraints}"
-                logger.info(f"分野別制約を適用: {domain}")
-                return combined
+    分野横断的な要求では検出された全分野の制約を統合適用する
+    （constraints.txt「分野横断的問題では複数制約セットを統合適用する」）
+    """
+    composed = compose_constraints(user_request)
+    if composed.domains:
+        logger.info(f"分野別制約を適用: {', '.join(composed.domains)}")
     
-    return base_constraints
+    return composed.text or load_constraints()
 
-def _detect_domain(user_request: str) -> str:
-    """ユーザー要求から適用すべき分野を検出する（外部ファイルベース）"""
-    # キーワードキャッシュを読み込み
-    domain_keywords = _load_domain_keywords()
+def render_relevant_constraints(user_request: str, k: int = 10, composed: ComposedConstraints | None = None) -> str:
+    """要求に関連する制約ルールを BM25 の上位k件として整形する（ファイル全文の代わり）
+    
+    composed は user_request から統合済みの制約（省略時は分野を検出して統合）。
+    """
+    composed = composed or compose_constraints(user_request)
+    scored_rules = composed.retriever.top_k(user_request, k)
+    if not scored_rules:
+        return load_constraints()
     
-    domains = []
-    user_request_lower = user_request.lower()
+    domains = ", ".join(composed.domains) if composed.domains else "general"
+    lines = [f"【適用分野】{domains}", f"【関連制約】上位{len(scored_rules)}件 / 全{len(composed.rules)}件"]
+    lines.extend(scored.render() for scored in scored_rules)
+    return "\n".join(lines)
+
+def search_precedents(topic: str, k: int = 5, exhaustive: bool = False) -> str:
+    """リポジトリ索引・変更履歴索引から先例（関連ファイルと該当行、類似した過去の変更）を検索して整形する
     
-    # 各分野のキーワードでマッチング
-    for domain, keywords in domain_keywords.items():
-        if any(kw.lower() in user_request_lower for kw in keywords):
-            domains.append(domain)
+    索引は前回の更新から REPO_INDEX_REFRESH_SECONDS 以上経過していれば差分更新する。
+    exhaustive=True（depth="comprehensive"）では索引を使わず全ファイルをシャード分割で走査する。
+    """
+    if not is_repo_index_enabled():
+        files = _glob_precedents(topic)
+    else:
+        if exhaustive:
+            hits = repo_index.scan_search(topic, k)
+        else:
+            repo_index.ensure_fresh(get_repo_index_refresh_interval())
+            hits = repo_index.search(topic, k)
+        files = [hit.render() for hit in hits]
     
-    # 最も優先度の高い分野を返す（複数検出された場合の優先順位）
-    priority_order = ["safety_critical", "medical", "legal", "financial", "ai_ml", "engineering", "cloud_devops"]
+    changes = search_change_history(topic, k)
+    if not files and not changes:
+        return f"{topic}に関連する標準的な手法とベストプラクティスを適用"
+    lines = list(files)
+    if changes:
+        lines.append("【過去の変更】")
+        lines.extend(changes)
+    return "\n".join(lines)
+
+def search_change_history(topic: str, k: int = 5) -> List[str]:
+    """変更履歴索引から類似した過去の変更を検索（新しいコミットがあれば先に索引する）
     
-    for priority_domain in priority_order:
-        if priority_domain in domains:
-            logger.debug(f"分野検出: {priority_domain} (候補: {domains})")
-            return priority_domain
+    履歴を取得できない場合もファイルの先例は返せるよう、エラーは記録して空の結果とする。
+    """
+    if not is_change_history_index_enabled() or not change_history.available:
+        return []
+    try:
+        change_history.ensure_fresh(get_repo_index_refresh_interval())
+        return [hit.render() for hit in change_history.search(topic, k)]
+    except Exception as e:
+        logger.warning(f"変更履歴検索エラー: {str(e)}")
+        return []
+
+def _refresh_precedent_indexes() -> None:
+    """先例検索用の索引（リポジトリ・変更履歴）を、前回の更新から期限が来ていれば差分更新する
+    
+    索引の世代をキャッシュキーに含める前に呼ぶ。ファイルI/Oを伴うためイベントループ外で実行すること。
+    """
+    if is_repo_index_enabled():
+        repo_index.ensure_fresh(get_repo_index_refresh_interval())
+    if is_change_history_index_enabled() and change_history.available:
+        try:
+            change_history.ensure_fresh(get_repo_index_refresh_interval())
+        except Exception as e:
+            logger.warning(f"変更履歴索引の更新エラー: {str(e)}")
+
+def _reasoning_cache_key(
+    situation_description: str,
+    required_judgment: str,
+    context_depth: str,
+    reasoning_mode: str,
+    sampling_active: bool,
+    output_format: str = "markdown",
+    response_profile: str = "full",
+    material_types: tuple[str, ...] = ()
+) -> str:
+    """統合GSR推論の結果キャッシュキー（索引は _refresh_precedent_indexes で更新済みであること）
+    
+    適応的深度制御が有効な場合は、選択した深度・材料・Sampling の使用を渡す（類似要求の履歴で深度が変わればキーも変わる）。
+    制約は内容のハッシュ、機能フラグは設定値のハッシュ（結果キャッシュ自体と応答サイズの設定は除く）、
+    索引は索引ファイルに保存された世代を使う。
+    """
+    flags = {
+        name: value for name, value in feature_flags.flags.items()
+        if not name.startswith('RESULT_CACHE_') and name not in _RESPONSE_SIZE_FLAGS
+    }
+    return reasoning_result_key(situation_description, required_judgment, context_depth, reasoning_mode, {
+        "constraints": constraint_index.snapshot().fingerprint,
+        "flags": fingerprint(flags),
+        "repo_index": repo_index.version,
+        "change_history": change_history.version,
+        "sampling": sampling_active,
+    }, output_format, response_profile, material_types)
+
+# 応答の組み立て後に適用する機能フラグ（推論結果キャッシュのキーに含めない）
+_RESPONSE_SIZE_FLAGS = ('RESPONSE_PROFILE', 'MAX_RESPONSE_CHARS')
+
+def response_options(response_profile: str = "", max_response_chars: int = 0) -> tuple[str, int]:
+    """ツール引数から応答プロファイルと文字数上限を決める（空・0 は機能フラグの既定値）
+    
+    未対応のプロファイルは ValueError。
+    """
+    profile = normalize_profile(response_profile or get_response_profile())
+    max_chars = max_response_chars if max_response_chars > 0 else get_max_response_chars()
+    return profile, max_chars
+
+def validation_payload(composed: ComposedConstraints, evaluation, relevant_rules) -> dict:
+    """制約検証結果の構造化オブジェクト（validate_against_constraints の JSON 出力）
+    
+    全ルールの判定ではなく、違反・要確認のルールと件数だけを含める。
+    ルールは [level, rule, source, score] の配列（キー名を繰り返さない）で返し、
+    分野・節の組は sources に一度だけ含める（source はその位置、score は関連ルールのみ）。
+    違反・要確認のルールは関連ルールに含まれれば位置（ref）で参照する（ルール本文を重複させない）。
+    件数が 0 の violations・warnings は省く（counts で分かる）。
+    judgment は検出パターン未定義の MUST/NEVER ルール（件数は unchecked）も考慮した総合判定で、
+    検出パターンだけの判定は trigger_judgment に分けて返す（その PROCEED は承認を意味しない）。
+    """
+    positions = {scored.rule: index for index, scored in enumerate(relevant_rules)}
+    sources: dict[tuple[str, str], int] = {}
+    
+    def _row(rule) -> list:
+        source = sources.setdefault((rule.domain, rule.section), len(sources))
+        return [rule.level, rule.text, source]
+    
+    def _verdict(verdict) -> dict:
+        entry = {"ref": positions[verdict.rule]} if verdict.rule in positions else {"rule": _row(verdict.rule)}
+        entry["excerpts"] = [match.excerpt for match in verdict.matches]
+        if verdict.match_count > len(verdict.matches):
+            entry["match_count"] = verdict.match_count
+        return entry
+    
+    relevant = [_row(scored.rule) + [round(scored.score, 1)] for scored in relevant_rules]
+    payload = {
+        "tool": "validate_against_constraints",
+        "judgment": evaluation.judgment,
+        "trigger_judgment": evaluation.trigger_judgment,
+        "unchecked": len(evaluation.unchecked_critical),
+        "domains": list(composed.domains),
+        "rule_count": len(composed.rules),
+        "pattern_count": composed.evaluator.pattern_count,
+        "counts": evaluation.to_dict()["counts"],
+    }
+    if evaluation.violations:
+        payload["violations"] = [_verdict(verdict) for verdict in evaluation.violations]
+    if evaluation.warnings:
+        payload["warnings"] = [_verdict(verdict) for verdict in evaluation.warnings]
+    payload["relevant_rules"] = relevant
+    payload["sources"] = [list(source) for source in sources]
+    payload["elapsed_ms"] = round(evaluation.elapsed_ms, 1)
+    return payload
+
+def _glob_precedents(topic: str) -> List[str]:
+    """索引を使わない先例検索（ENABLE_REPO_INDEX 無効時）"""
+    project_files = [REPO_ROOT / entry.path for entry in file_enumerator.files(['.py', '.md', '.txt'])]
+    
+    relevant_precedents = []
+    topic_keywords = topic.lower().split()
+    
+    for file_path in project_files[:20]:  # 最大20ファイルを調査
+        check_cancelled()
+        # ファイル全体を読まず、一致箇所の前後だけを抜粋する
+        windows = scan_file(file_path, topic_keywords, max_windows=1)
+        if windows:
+            relevant_precedents.append(f"{file_path.name}:{windows[0].line_number}: {windows[0].render()}")
+    
+    return relevant_precedents[:5]
+
+async def _report_material_progress(ctx, progress: int, total: int, section: MaterialSection) -> None:
+    """材料1件の完了を MCP の進捗通知とログ通知でクライアントへ送る
+    
+    ログ通知には材料の内容を含め、クライアントが最終報告を待たずに利用できるようにする。
+    ctx がない・通知に対応していない場合は何もしない。
+    """
+    if ctx is None:
+        return
+    try:
+        if hasattr(ctx, "report_progress"):
+            await ctx.report_progress(progress, total)
+        if hasattr(ctx, "info"):
+            status = "収集完了" if section.done else "未収集（期限切れ・エラー）"
+            message = f"[{progress}/{total}] {section.name}: {status}"
+            await ctx.info(f"{message}\n{section.content}" if section.done else message)
+    except Exception as e:
+        logger.debug(f"進捗通知エラー（無視）: {e}")
+
+def pack_reasoning_context(
+    situation_description: str,
+    materials: dict[str, str],
+    context_depth: str = "standard",
+    composed: ComposedConstraints | None = None
+) -> PackedContext:
+    """推論コンテキストを context_depth の文字数予算内に詰める
+    
+    優先順位: NEVER/MUST ルール → その他の分野ルール → 先例・前例 → その他の材料
+    ルールは状況との関連度順に並べ、予算が厳しい場合も関連ルールが残るようにする。
+    制約情報・専門知識の材料はルールとして直接詰めるため含めない。
+    composed は状況から統合済みの制約（省略時は分野を検出して統合）。
+    """
+    composed = composed or compose_constraints(situation_description)
+    packer = ContextPacker(get_context_budget(context_depth))
+    
+    for scored in composed.retriever.rank(situation_description):
+        if scored.rule.level in ("NEVER", "MUST"):
+            packer.add(PRIORITY_CRITICAL_RULES, "制約（NEVER/MUST）", scored.rule.render(), scored.render())
+        else:
+            packer.add(PRIORITY_DOMAIN_RULES, "制約（SHOULD）", scored.rule.render(), scored.render())
+    
+    for material_type, content in materials.items():
+        if material_type in ("制約情報", "専門知識"):
+            continue
+        priority = PRIORITY_PRECEDENTS if material_type == "先例・前例" else PRIORITY_MATERIALS
+        packer.add(priority, material_type, material_type, content)
+    
+    return packer.pack()
+
+def _get_domain_matcher() -> DomainMatcher:
+    """分野検出器を取得（制約ファイル更新時のみ再構築）"""
+    return _current_domain_state()[2]
+
+# 要求処理中の分野検出結果（(制約バージョン, 要求) → 検出結果）。要求内の各段階・材料コレクター・バッチの項目で共有する
+_DOMAIN_MEMO: ContextVar[dict | None] = ContextVar("corethink_domain_memo", default=None)
+
+def memoize_domains(func):
+    """非同期関数の実行中、同じ要求文の分野検出を一度だけ行うデコレーター（入れ子の呼び出しでは外側のメモを共有）"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if _DOMAIN_MEMO.get() is not None:
+            return await func(*args, **kwargs)
+        token = _DOMAIN_MEMO.set({})
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _DOMAIN_MEMO.reset(token)
+    return wrapper
+
+def _detect_domains(user_request: str) -> list[DomainMatch]:
+    """ユーザー要求を一度だけ走査し、検出された全分野を優先順位順に返す"""
+    if not user_request:
+        return []
+    memo = _DOMAIN_MEMO.get()
+    if memo is None:
+        return _get_domain_matcher().detect(user_request)
+    version, _, matcher = _current_domain_state()
+    key = (version, user_request)
+    if key not in memo:
+        memo[key] = matcher.detect(user_request)
+    return memo[key]
+
+def _detect_domain(user_request: str) -> str:
+    """ユーザー要求から適用すべき分野を検出する（外部ファイルベース）"""
+    matches = _detect_domains(user_request)
+    
+    # 最も優先度の高い分野を返す（複数検出された場合の優先順位）
+    if matches:
+        logger.debug(f"分野検出: {matches[0].domain} (候補: {[m.domain for m in matches]})")
+        return matches[0].domain
     
     logger.debug(f"汎用分野として処理: '{user_request[:50]}...'")
     return "general"
@@ -298,6 +659,47 @@ def create_sandbox() -> str:
         logger.error(f"サンドボックス作成エラー: {e}")
         return f"エラー: {str(e)}"
 
+def remove_sandbox(sandbox_path: str) -> None:
+    """create_sandbox で作成したサンドボックスを削除（git worktree はブランチも削除）"""
+    path = Path(sandbox_path)
+    if not path.exists():
+        return
+    try:
+        if GIT_AVAILABLE and (path / ".git").is_file():
+            branch_name = git.Repo(path).active_branch.name
+            repo = git.Repo(REPO_ROOT)
+            repo.git.worktree("remove", str(path), "--force")
+            repo.git.branch("-D", branch_name)
+        else:
+            import shutil
+            shutil.rmtree(path)
+        logger.info(f"サンドボックスを削除しました: {path}")
+    except Exception as e:
+        logger.warning(f"サンドボックス削除エラー ({path}): {str(e)}")
+
+async def create_sandbox_async() -> str:
+    """create_sandbox をスレッドで実行（呼び出し元が取り消された場合は、作成完了後にサンドボックスを削除）
+    
+    git worktree の作成は途中で中断できないため、取り消されても作成は最後まで実行し、
+    作成されたサンドボックスをバックグラウンドで削除してブランチ・作業ツリーを残さない。
+    """
+    task = asyncio.ensure_future(asyncio.to_thread(create_sandbox))
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        loop = asyncio.get_running_loop()
+        
+        def _discard(finished: asyncio.Future) -> None:
+            if finished.cancelled() or finished.exception() is not None:
+                return
+            sandbox_path = finished.result()
+            if not sandbox_path.startswith("エラー"):
+                logger.info(f"取り消された実行のサンドボックスを削除します: {sandbox_path}")
+                loop.run_in_executor(None, remove_sandbox, sandbox_path)
+        
+        task.add_done_callback(_discard)
+        raise
+
 # ================== MCP Tools ==================
 
 if app:
@@ -312,11 +714,26 @@ if app:
         Returns:
             拡張された結果（失敗時は元の結果）
         """
-        if not is_sampling_enabled():
+        sampling_result = await _sample_analysis(core_result, tool_name, ctx)
+        if sampling_result is None:
             return core_result
         
+        # 結果の統合
+        return f"""{core_result}
+
+【💡 Sampling補助分析】
+{sampling_result}
+
+【🎯 最終判断】
+上記のCoreThink推論結果を基本とし、補助分析を参考情報として活用してください。"""
+
+    async def _sample_analysis(core_result: str, tool_name: str, ctx=None) -> str | None:
+        """Sampling機能による補助分析（Sampling無効・失敗時は None）"""
+        if not is_sampling_enabled():
+            return None
+        
         if not ctx or not hasattr(ctx, 'sample'):
-            return core_result
+            return None
         
         try:
             timeout = get_sampling_timeout()
@@ -341,24 +758,15 @@ CoreThink推論結果を踏まえた追加考慮点や代替案を提案して
                 timeout=timeout
             )
             
-            # 結果の統合
-            enhanced_result = f"""{core_result}
-
-【💡 Sampling補助分析】
-{sampling_result}
-
-【🎯 最終判断】
-上記のCoreThink推論結果を基本とし、補助分析を参考情報として活用してください。"""
-            
             logger.info(f"Sampling拡張完了: {tool_name}")
-            return enhanced_result
+            return str(sampling_result)
             
         except asyncio.TimeoutError:
             logger.warning(f"Sampling timeout for {tool_name}")
-            return core_result
+            return None
         except Exception as e:
             logger.warning(f"Sampling enhancement failed for {tool_name}: {e}")
-            return core_result
+            return None
     
     async def _log_tool_execution(tool_name: str, inputs: dict, core_result: str, 
                                   enhanced_result: str = None, sampling_result: str = None,
@@ -459,9 +867,14 @@ CoreThink推論結果を踏まえた追加考慮点や代替案を提案して
             return error_msg
 
     @app.tool()
+    @constraint_index.pin_snapshot
+    @memoize_domains
     async def validate_against_constraints(
         proposed_change: str,
         reasoning_context: str = "",
+        output_format: str = "markdown",
+        response_profile: str = "",
+        max_response_chars: int = 0,
         ctx = None  # FastMCPコンテキスト（Sampling機能含む）
     ) -> str:
         """
@@ -471,34 +884,61 @@ CoreThink推論結果を踏まえた追加考慮点や代替案を提案して
         Args:
             proposed_change: 提案された変更の説明
             reasoning_context: 検証のための追加コンテキスト
+            output_format: 出力形式
+                - "markdown": 自然言語の検証結果（デフォルト）
+                - "json": 判定・違反/要確認ルール・関連ルールの構造化オブジェクト
+                  （ルールは [level, rule, source, score] の配列、source は sources の [分野, 節] の位置）
+            response_profile: 応答プロファイル（空で RESPONSE_PROFILE）
+                - "full": すべてのセクション（デフォルト）
+                - "compact": 表題・見出しの装飾と定型文を省く（JSON 出力には影響しない）
+            max_response_chars: 応答の文字数上限（0 で MAX_RESPONSE_CHARS、超える場合は長いセクション・文字列から要約）
             ctx: FastMCPコンテキスト（Sampling機能含む）
             
         Returns:
-            適合性ステータスを含む自然言語による検証結果
+            適合性ステータスを含む自然言語による検証結果（output_format="json" では JSON 文字列）
         """
         logger.info("制約検証開始")
         
         try:
-            # 分野別制約を含む制約を読み込み
-            constraints = load_combined_constraints(proposed_change + " " + reasoning_context)
+            output_format = normalize_output_format(output_format)
+            profile, max_chars = response_options(response_profile, max_response_chars)
+        except ValueError as e:
+            return f"検証エラー: {str(e)}"
+        
+        try:
+            # 分野別制約を含む制約を統合し、全ルールの検出パターンで提案変更を一度だけ走査
+            composed = compose_constraints(proposed_change + " " + reasoning_context)
+            evaluator = composed.evaluator
+            evaluation = evaluator.evaluate(proposed_change)
+            relevant_rules = composed.retriever.top_k(f"{proposed_change} {reasoning_context}", RULE_TOP_K_BY_DEPTH["minimal"])
+            logger.info(
+                f"制約評価: {evaluation.judgment} (検出パターン判定 {evaluation.trigger_judgment}, "
+                f"未確認 MUST/NEVER {len(evaluation.unchecked_critical)}件, ルール {len(composed.rules)}件, "
+                f"パターン {evaluator.pattern_count}個, {evaluation.elapsed_ms:.1f}ms)"
+            )
+            
+            if output_format == FORMAT_JSON:
+                payload = validation_payload(composed, evaluation, relevant_rules)
+                sampling_result = await _sample_analysis(
+                    dumps_json(payload), "validate_against_constraints", ctx
+                )
+                if sampling_result is not None:
+                    payload["sampling_analysis"] = sampling_result
+                logger.info("制約検証完了")
+                return fit_payload(payload, max_chars)
             
-            # 制約チェックロジック（分野別制約対応版）
             core_validation = f"""
 【制約検証結果】
 提案変更: {proposed_change}
 文脈: {reasoning_context}
 
 【適用制約セット】
-{constraints[:300]}...
+基本制約{' + ' + ', '.join(composed.domains) if composed.domains else ''}（ルール {len(composed.rules)}件・検出パターン {evaluator.pattern_count}個）
 
-【詳細チェック】
-✅ MUST「公開API変更禁止」 → 適合確認中
-✅ NEVER「デバッグ出力禁止」 → 適合確認中
-⚠️ SHOULD「docstring更新推奨」 → 要確認
-✅ MUST「テスト通過」 → 検証必要
+【関連制約（上位{len(relevant_rules)}件）】
+{chr(10).join(scored.render() for scored in relevant_rules)}
 
-【総合判定】PROCEED_WITH_WARNING
-【推奨】追加のdocstring更新を検討してください
+{evaluation.render()}
 【次ステップ】execute_with_safeguards でdry-run実行
             """.strip()
             
@@ -506,17 +946,19 @@ CoreThink推論結果を踏まえた追加考慮点や代替案を提案して
             enhanced_result = await _enhance_with_sampling(core_validation, "validate_against_constraints", ctx)
             
             logger.info("制約検証完了")
-            return enhanced_result
+            return shape_response(enhanced_result, profile, max_chars)
             
         except Exception as e:
             error_msg = f"検証エラー: {str(e)}"
             logger.error(error_msg)
-            return error_msg
+            return error_json("validate_against_constraints", error_msg) if output_format == FORMAT_JSON else error_msg
 
     @app.tool()
     async def execute_with_safeguards(
         action_description: str,
         dry_run: bool = True,
+        response_profile: str = "",
+        max_response_chars: int = 0,
         ctx = None  # FastMCPコンテキスト（Sampling機能含む）
     ) -> str:
         """
@@ -526,6 +968,10 @@ CoreThink推論結果を踏まえた追加考慮点や代替案を提案して
         Args:
             action_description: 実行するアクションの説明
             dry_run: Trueの場合はシミュレーションのみ、Falseの場合は変更を適用
+            response_profile: 応答プロファイル（空で RESPONSE_PROFILE）
+                - "full": すべてのセクション（デフォルト）
+                - "compact": 表題・見出しの装飾と定型文を省く
+            max_response_chars: 応答の文字数上限（0 で MAX_RESPONSE_CHARS、超える場合は長いセクションから要約）
             ctx: FastMCPコンテキスト（Sampling機能含む）
             
         Returns:
@@ -534,8 +980,9 @@ CoreThink推論結果を踏まえた追加考慮点や代替案を提案して
         logger.info(f"実行開始 (dry_run={dry_run}): {action_description}")
         
         try:
+            profile, max_chars = response_options(response_profile, max_response_chars)
             if dry_run:
-                sandbox_path = create_sandbox()
+                sandbox_path = await create_sandbox_async()
                 core_result = f"""
 【DRY RUN実行】
 アクション: {action_description}
@@ -560,7 +1007,7 @@ CoreThink推論結果を踏まえた追加考慮点や代替案を提案して
             enhanced_result = await _enhance_with_sampling(core_result, "execute_with_safeguards", ctx)
             
             logger.info("実行完了")
-            return enhanced_result
+            return shape_response(enhanced_result, profile, max_chars)
             
         except Exception as e:
             error_msg = f"実行エラー: {str(e)}"
@@ -571,7 +1018,9 @@ CoreThink推論結果を踏まえた追加考慮点や代替案を提案して
     async def trace_reasoning_steps(
         context: str,
         step_description: str,
-        reasoning_depth: str = "standard"  # standard, detailed, minimal
+        reasoning_depth: str = "standard",  # standard, detailed, minimal
+        response_profile: str = "",
+        max_response_chars: int = 0
     ) -> str:
         """
         推論過程の詳細な記録と透明性の確保を行います。
@@ -581,6 +1030,10 @@ CoreThink推論結果を踏まえた追加考慮点や代替案を提案して
             context: 推論コンテキストまたは背景情報
             step_description: 現在の推論ステップの説明
             reasoning_depth: 詳細レベル（minimal, standard, detailed）
+            response_profile: 応答プロファイル（空で RESPONSE_PROFILE）
+                - "full": すべてのセクション（デフォルト）
+                - "compact": 表題・見出しの装飾と定型文を省く
+            max_response_chars: 応答の文字数上限（0 で MAX_RESPONSE_CHARS、超える場合は長いセクションから要約）
             
         Returns:
             タイムスタンプ、透明性指標、検証インジケータを含む包括的推論トレース
@@ -588,6 +1041,7 @@ CoreThink推論結果を踏まえた追加考慮点や代替案を提案して
         logger.info(f"推論トレース開始: {step_description}")
         
         try:
+            profile, max_chars = response_options(response_profile, max_response_chars)
             import datetime
             timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
@@ -625,7 +1079,7 @@ CoreThink推論結果を踏まえた追加考慮点や代替案を提案して
             """.strip()
             
             logger.info("推論トレース完了")
-            return trace_result
+            return shape_response(trace_result, profile, max_chars)
             
         except Exception as e:
             error_msg = f"推論トレースエラー: {str(e)}"
@@ -1156,185 +1610,12 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
             logger.error(error_msg)
             return error_msg
 
-    # ================== GSR 4層アーキテクチャ関数 ==================
-    
-    def _gsr_layer1_parse_native_language(user_input: str, context: str) -> str:
-        """
-        GSR Layer 1: Native Language Parsing & Semantic Preservation
-        ユーザーの自然言語入力を意味を保持したまま解析
-        """
-        try:
-            # 自然言語の意味的構造を保持
-            parsed_structure = f"""
-【GSR Layer 1: 自然言語解析】
-
-【入力文解析】
-原文: {user_input}
-
-【文脈情報】
-{context}
-
-【意味的要素抽出】
-- 意図: ユーザーが何を求めているか
-- 対象: 何について推論するか
-- 制約: どのような条件があるか
-- 期待結果: どのような出力を期待しているか
-
-【言語的特徴保持】
-- 不確実性の表現: 「たぶん」「可能性がある」等
-- 強調表現: 「必ず」「絶対に」等
-- 感情的ニュアンス: 긴급성、重要性等
-
-【解析完了】意味情報を完全保持して次層へ移行
-            """
-            return parsed_structure.strip()
-            
-        except Exception as e:
-            logger.error(f"GSR Layer 1 解析エラー: {e}")
-            return f"Layer 1 解析エラー: {str(e)}"
-
-    def _gsr_layer2_inlanguage_reasoning(parsed_input: str, reasoning_context: str) -> str:
-        """
-        GSR Layer 2: In-Language Reasoning Architecture
-        自然言語内での直接的推論（ベクトル化なし）
-        """
-        try:
-            # 自然言語での直接推論
-            reasoning_result = f"""
-【GSR Layer 2: 言語内推論】
-
-【推論材料】
-{parsed_input}
-
-【推論コンテキスト】
-{reasoning_context}
-
-【推論プロセス】
-1. 問題の核心特定
-   - 真の課題は何か？
-   - 表面的問題と根本原因の区別
-
-2. 制約分析
-   - 絶対的制約（変更不可）
-   - 相対的制約（交渉可能）
-   - 隠れた制約（暗黙的前提）
-
-3. 解決策生成
-   - 直接的アプローチ
-   - 代替アプローチ
-   - 創造的解決法
-
-4. リスク評価
-   - 実行可能性
-   - 安全性
-   - 影響範囲
-
-【推論結論】
-基本判定: [PROCEED/CAUTION/REJECT]
-信頼度: [HIGH/MEDIUM/LOW]
-            """
-            return reasoning_result.strip()
-            
-        except Exception as e:
-            logger.error(f"GSR Layer 2 推論エラー: {e}")
-            return f"Layer 2 推論エラー: {str(e)}"
-
-    def _gsr_layer3_execution_explainability(reasoning_result: str, action_context: str) -> str:
-        """
-        GSR Layer 3: Execution & Explainability
-        実行可能性と説明可能性の統合
-        """
-        try:
-            execution_plan = f"""
-【GSR Layer 3: 実行・説明可能性】
-
-【推論結果評価】
-{reasoning_result}
-
-【実行計画】
-1. 実行前検証
-   - 制約適合性チェック
-   - 安全性確認
-   - リソース可用性
-
-2. 段階的実行戦略
-   - Phase 1: 最小限変更
-   - Phase 2: 段階的拡張
-   - Phase 3: 完全実装
-
-3. 検証ポイント
-   - 各段階での成功判定基準
-   - 異常検出と回復手順
-   - 品質保証要件
-
-【説明可能性】
-- なぜこの判断に至ったか
-- どのような根拠があるか
-- 代替案との比較結果
-- リスクと機会の評価
-
-【実行準備完了】次層での最終確認へ
-            """
-            return execution_plan.strip()
-            
-        except Exception as e:
-            logger.error(f"GSR Layer 3 実行計画エラー: {e}")
-            return f"Layer 3 実行計画エラー: {str(e)}"
-
-    def _gsr_layer4_avoid_translation(execution_plan: str) -> str:
-        """
-        GSR Layer 4: Avoiding Representational Translation
-        表現変換の回避・自然言語出力の維持
-        """
-        try:
-            # 自然言語での最終出力（変換なし）
-            final_output = f"""
-【GSR Layer 4: 自然言語出力】
-
-【統合推論結果】
-{execution_plan}
-
-【最終判定】
-✅ PROCEED - 実行推奨
-⚠️ CAUTION - 注意して実行
-❌ REJECT - 実行非推奨
-
-【実行指針】
-具体的に何をすべきか、どのような順序で、どのような注意点があるかを自然言語で明確に説明
-
-【次ステップ】
-ユーザーが取るべき具体的行動を自然言語で提示
-
-【信頼性指標】
-推論の確実性レベルと根拠を自然言語で説明
-            """
-            return final_output.strip()
-            
-        except Exception as e:
-            logger.error(f"GSR Layer 4 出力エラー: {e}")
-            return f"Layer 4 出力エラー: {str(e)}"
-
     # ================== Phase2最適化: 材料収集専用関数群 ==================
-    
-    async def _collect_constraint_materials(topic: str, depth: str) -> str:
-        """制約情報収集"""
-        try:
-            base_constraints = load_constraints()
-            domain_constraints = load_domain_constraints(topic)
-            
-            if depth == "minimal":
-                return f"基本制約情報:\n{base_constraints[:200]}..."
-            elif depth in ["standard", "deep", "comprehensive"]:
-                return f"制約情報詳細:\n{base_constraints}\n\n分野特化制約:\n{domain_constraints}"
-            
-        except Exception as e:
-            return f"制約情報収集エラー: {str(e)}"
+    # Sampling による分析（Sampling無効・失敗時は空文字）。材料収集時にコア収集と並行実行する
     
     async def _collect_precedent_materials(topic: str, depth: str, ctx=None) -> str:
         """先例・前例収集（Sampling活用）"""
         try:
-            base_info = f"{topic}に関する先例・前例を調査中..."
-            
             if is_sampling_enabled() and ctx and hasattr(ctx, 'mcp'):
                 try:
                     prompt = f"""
@@ -1358,9 +1639,9 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
                     
                 except Exception as e:
                     logger.warning(f"先例収集Samplingエラー: {e}")
-                    return base_info
+                    return ""
             else:
-                return base_info
+                return ""
                 
         except Exception as e:
             return f"先例収集エラー: {str(e)}"
@@ -1368,8 +1649,6 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
     async def _collect_implication_materials(topic: str, depth: str, ctx=None) -> str:
         """影響・含意収集（Sampling活用）"""
         try:
-            base_info = f"{topic}の影響・含意を分析中..."
-            
             if is_sampling_enabled() and ctx and hasattr(ctx, 'mcp'):
                 try:
                     prompt = f"""
@@ -1393,9 +1672,9 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
                     
                 except Exception as e:
                     logger.warning(f"含意分析Samplingエラー: {e}")
-                    return base_info
+                    return ""
             else:
-                return base_info
+                return ""
                 
         except Exception as e:
             return f"含意分析エラー: {str(e)}"
@@ -1403,8 +1682,6 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
     async def _collect_domain_knowledge(topic: str, depth: str, ctx=None) -> str:
         """専門知識収集（Sampling活用）"""
         try:
-            base_info = f"{topic}の専門知識を収集中..."
-            
             if is_sampling_enabled() and ctx and hasattr(ctx, 'mcp'):
                 try:
                     prompt = f"""
@@ -1428,9 +1705,9 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
                     
                 except Exception as e:
                     logger.warning(f"専門知識Samplingエラー: {e}")
-                    return base_info
+                    return ""
             else:
-                return base_info
+                return ""
                 
         except Exception as e:
             return f"専門知識収集エラー: {str(e)}"
@@ -1438,8 +1715,6 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
     async def _collect_risk_factors(topic: str, depth: str, ctx=None) -> str:
         """リスク要因収集（Sampling活用）"""
         try:
-            base_info = f"{topic}のリスク要因を分析中..."
-            
             if is_sampling_enabled() and ctx and hasattr(ctx, 'mcp'):
                 try:
                     prompt = f"""
@@ -1463,9 +1738,9 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
                     
                 except Exception as e:
                     logger.warning(f"リスク分析Samplingエラー: {e}")
-                    return base_info
+                    return ""
             else:
-                return base_info
+                return ""
                 
         except Exception as e:
             return f"リスク分析エラー: {str(e)}"
@@ -1473,8 +1748,6 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
     async def _collect_symbolic_patterns(topic: str, depth: str, ctx=None) -> str:
         """パターン検出収集（旧detect_symbolic_patterns統合）"""
         try:
-            base_info = f"{topic}のシンボリックパターンを検出中..."
-            
             if is_sampling_enabled() and ctx and hasattr(ctx, 'mcp'):
                 try:
                     prompt = f"""
@@ -1498,9 +1771,9 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
                     
                 except Exception as e:
                     logger.warning(f"パターン検出Samplingエラー: {e}")
-                    return base_info
+                    return ""
             else:
-                return base_info
+                return ""
                 
         except Exception as e:
             return f"パターン検出エラー: {str(e)}"
@@ -1508,8 +1781,6 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
     async def _collect_repository_context(topic: str, depth: str, ctx=None) -> str:
         """リポジトリ分析収集（旧analyze_repository_context統合）"""
         try:
-            base_info = f"{topic}のリポジトリコンテキストを分析中..."
-            
             if is_sampling_enabled() and ctx and hasattr(ctx, 'mcp'):
                 try:
                     prompt = f"""
@@ -1533,21 +1804,28 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
                     
                 except Exception as e:
                     logger.warning(f"リポジトリ分析Samplingエラー: {e}")
-                    return base_info
+                    return ""
             else:
-                return base_info
+                return ""
                 
         except Exception as e:
             return f"リポジトリ分析エラー: {str(e)}"
     
-    def _calculate_confidence_level(reasoning_result: str, materials: str) -> str:
-        """信頼度計算（Phase2拡張機能）"""
+    def _calculate_confidence_level(reasoning_texts: List[str], materials: str) -> str:
+        """信頼度計算（Phase2拡張機能）
+        
+        reasoning_texts は推論の対象となった内容（ReasoningResult.scope() の結果）
+        """
+        return _assess_confidence(reasoning_texts, materials).render()
+
+    def _assess_confidence(reasoning_texts: List[str], materials: str) -> ConfidenceAssessment:
+        """信頼度の総合判定と要素ごとの評価（_calculate_confidence_level の構造化版）"""
         try:
             # 基本的な信頼度指標
             confidence_factors = []
             
             # 制約適合性チェック
-            if "制約違反なし" in reasoning_result or "適合" in reasoning_result:
+            if any("制約違反なし" in text or "適合" in text for text in reasoning_texts):
                 confidence_factors.append("制約適合性: ✅")
             else:
                 confidence_factors.append("制約適合性: ⚠️")
@@ -1561,7 +1839,7 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
                 confidence_factors.append("材料充実度: ⚠️")
             
             # 推論の一貫性チェック
-            if "矛盾" not in reasoning_result and "不明" not in reasoning_result:
+            if not any("矛盾" in text or "不明" in text for text in reasoning_texts):
                 confidence_factors.append("推論一貫性: ✅")
             else:
                 confidence_factors.append("推論一貫性: ⚠️")
@@ -1575,10 +1853,11 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
             else:
                 overall = "LOW (要注意)"
             
-            return f"{overall}\n" + "\n".join(confidence_factors)
+            factors = tuple(tuple(factor.split(": ", 1)) for factor in confidence_factors)
+            return ConfidenceAssessment(overall.split(" ", 1)[0], overall, factors)
             
         except Exception as e:
-            return f"信頼度計算エラー: {str(e)}"
+            return ConfidenceAssessment("ERROR", f"信頼度計算エラー: {str(e)}")
 
     # ================== Phase3統合により非推奨化（コメントアウト）==================
     
@@ -1597,16 +1876,94 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
 
     # ================== 統合GSR推論エンジン ==================
 
+    @cancellable
+    @constraint_index.pin_snapshot
+    @memoize_domains
     async def _unified_gsr_reasoning_impl(
         situation_description: str,
         required_judgment: str = "evaluate_and_decide", 
         context_depth: str = "standard",
         reasoning_mode: str = "comprehensive",
-        ctx = None
+        ctx = None,
+        output_format: str = "markdown",
+        response_profile: str = "",
+        max_response_chars: int = 0
     ) -> str:
-        """統合GSR推論の内部実装（MCPツールから独立）"""
+        """統合GSR推論の内部実装（MCPツールから独立）
+        
+        推論結果キャッシュ・推論ログには文字数上限を適用する前の応答を保存する。
+        """
         start_time = datetime.now()
+        try:
+            output_format = normalize_output_format(output_format)
+            profile, max_chars = response_options(response_profile, max_response_chars)
+        except ValueError as e:
+            return f"統合GSR推論エラー: {str(e)}"
+        as_json = output_format == FORMAT_JSON
         logger.info(f"統合GSR推論開始: {situation_description[:100]}...")
+        sampling_available = bool(is_sampling_enabled() and ctx and hasattr(ctx, 'mcp'))
+        
+        # 適応的深度制御: 複雑度から深度（実行する GSR ステージ）・材料・Sampling の使用を決める
+        # （有効時は指定された context_depth より優先）
+        estimate = None
+        if is_adaptive_depth_enabled():
+            estimate = depth_controller.estimate(
+                situation_description,
+                domain_count=len(_detect_domains(situation_description)),
+                required_judgment=required_judgment,
+                threshold=get_adaptive_depth_threshold(),
+                max_materials=get_depth_control_max_tools(),
+                sampling_available=sampling_available
+            )
+            context_depth = estimate.depth
+            logger.info(f"適応的深度制御: {estimate.summary()}")
+        
+        # 推論結果キャッシュ: 同一入力・同一の制約/機能フラグ/索引なら推論とログ書き込みを省く
+        cache_key = None
+        if is_result_cache_enabled():
+            cached = None
+            try:
+                await asyncio.to_thread(_refresh_precedent_indexes)
+                cache_key = _reasoning_cache_key(
+                    situation_description, required_judgment, context_depth, reasoning_mode,
+                    sampling_available and (estimate is None or estimate.use_sampling),
+                    output_format, profile, estimate.material_types if estimate is not None else ()
+                )
+                cached = await asyncio.to_thread(result_cache.get, cache_key)
+            except Exception as e:
+                logger.warning(f"推論結果キャッシュの参照エラー: {str(e)}")
+            if cached is not None:
+                elapsed_ms = (datetime.now() - start_time).total_seconds() * 1000
+                saved_at = cached.created.strftime('%Y-%m-%d %H:%M:%S')
+                confidence = cached.confidence.splitlines()[0] if cached.confidence else ""
+                logger.info(f"統合GSR推論キャッシュヒット: {elapsed_ms:.1f}ms, 信頼度: {confidence}")
+                # 再利用した結果の信頼度も履歴に記録（HIGH でなければ類似した次の要求をより深く扱う）
+                if estimate is not None:
+                    depth_controller.record(situation_description, estimate.score, cached.confidence)
+                # 履歴には応答本文ではなくヒットしたことだけを記録
+                log_tool_execution(
+                    tool_name="unified_gsr_reasoning",
+                    inputs={
+                        "situation_description": situation_description,
+                        "required_judgment": required_judgment,
+                        "context_depth": context_depth,
+                        "reasoning_mode": reasoning_mode,
+                        "output_format": output_format,
+                        "response_profile": profile,
+                        "cache": "hit"
+                    },
+                    result=f"推論結果キャッシュヒット（{saved_at} 保存、信頼度: {confidence}、ヒット{cached.hits}回）",
+                    execution_time_ms=elapsed_ms
+                )
+                if as_json:
+                    payload = loads_json(cached.content)
+                    payload["cache"] = {"saved_at": saved_at, "hits": cached.hits, "elapsed_ms": round(elapsed_ms, 3)}
+                    return fit_payload(payload, max_chars)
+                return fit_text(
+                    f"{cached.content}\n\n【推論結果キャッシュ】\n"
+                    f"{saved_at} の推論結果を再利用（ヒット{cached.hits}回、{elapsed_ms:.1f}ms）",
+                    max_chars
+                )
         
         # 推論セッション開始
         session_id = reasoning_logger.start_session(
@@ -1619,24 +1976,51 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
         try:
             # Phase2最適化: 自動材料収集統合
             material_types = []
-            if required_judgment in ["evaluate_and_decide", "validate_compliance"]:
-                material_types.extend(["constraints", "precedents"])
-            if required_judgment in ["analyze_risks", "find_solution"]:
-                material_types.extend(["risk_factors", "implications"])
-            if reasoning_mode == "comprehensive":
-                material_types.extend(["domain_knowledge"])
-            
-            # 材料収集（内部実装を使用）
+            if estimate is not None:
+                material_types.extend(estimate.material_types)
+                reasoning_logger.log_step(
+                    step_name="適応的深度制御",
+                    layer="preparation",
+                    input_data={
+                        "situation_length": len(situation_description),
+                        "required_judgment": required_judgment
+                    },
+                    output_data={
+                        "score": estimate.score,
+                        "depth": estimate.depth,
+                        "material_types": list(estimate.material_types),
+                        "use_sampling": estimate.use_sampling
+                    },
+                    transformation_rule="複雑度（長さ・分野数・リスク語・類似履歴）による深度選択",
+                    execution_time_ms=0.0,
+                    confidence_level="MEDIUM",
+                    notes=estimate.summary()
+                )
+            else:
+                if required_judgment in ["evaluate_and_decide", "validate_compliance"]:
+                    material_types.extend(["constraints", "precedents"])
+                if required_judgment in ["analyze_risks", "find_solution"]:
+                    material_types.extend(["risk_factors", "implications"])
+                if reasoning_mode == "comprehensive":
+                    material_types.extend(["domain_knowledge"])
+            
+            # 検出された全分野の制約を一度だけ統合し、材料収集・コンテキスト構築・制約評価で共有する
+            composed = compose_constraints(situation_description)
+            
+            # 材料収集（材料ごとの結果を受け取り、コンテキストは予算内に詰める）
             materials_start = datetime.now()
-            collected_materials = ""
+            gathered = GatheredMaterials()
             if material_types:
-                materials_types_str = ",".join(set(material_types))
-                collected_materials = await _collect_reasoning_materials_impl(
+                gathered = await _gather_reasoning_materials(
                     topic=situation_description,
-                    material_types=materials_types_str,
+                    material_types_list=list(dict.fromkeys(material_types)),
                     depth=context_depth,
-                    ctx=ctx
+                    ctx=ctx,
+                    allow_sampling=estimate.use_sampling if estimate is not None else True,
+                    composed=composed
                 )
+            materials = gathered.sections
+            collected_materials = "\n\n".join(f"## {name}\n{content}" for name, content in materials.items())
             materials_time = (datetime.now() - materials_start).total_seconds() * 1000
             
             # 材料収集ステップをログ記録
@@ -1655,102 +2039,53 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
                 transformation_rule="CoreThink論文準拠の推論材料収集アルゴリズム",
                 execution_time_ms=materials_time,
                 confidence_level="HIGH",
-                notes="制約、先例、専門知識の統合収集"
+                notes=f"制約、先例、専門知識の統合収集（{gathered.timing_summary() or '材料なし'}）"
             )
             
-            # 分野特化制約情報の読み込み
-            constraints = load_domain_constraints(situation_description)
-            full_context = f"{collected_materials}\n\n【制約情報】\n{constraints}"
+            # 制約ルールと材料を深度ごとの文字数予算内に詰める（検出された全分野を統合）
+            packed_context = pack_reasoning_context(situation_description, materials, context_depth, composed)
+            full_context = packed_context.text
+            budget_summary = packed_context.summary()
+            if gathered.incomplete:
+                budget_summary += f"\n未収集（期限切れ・エラー）: {', '.join(r.name for r in gathered.incomplete)}"
             
             # 制約適用をログ記録
             reasoning_logger.log_constraints([
-                f"分野特化制約: {len(constraints)}文字",
-                f"推論材料: {len(collected_materials)}文字"
+                f"推論コンテキスト: {packed_context.used}/{packed_context.budget}文字",
+                f"推論材料: {len(collected_materials)}文字",
+                f"予算超過で除外: {len(packed_context.dropped)}項目・{packed_context.dropped_chars}文字"
             ])
             
-            # GSR 4層アーキテクチャによる推論
-            layer1_start = datetime.now()
-            layer1_result = _gsr_layer1_parse_native_language(situation_description, full_context)
-            layer1_time = (datetime.now() - layer1_start).total_seconds() * 1000
-            
-            reasoning_logger.log_step(
-                step_name="自然言語解析",
-                layer="Layer 1",
-                input_data={
-                    "situation": situation_description,
-                    "context_length": len(full_context)
-                },
-                output_data={
-                    "parsed_result": layer1_result[:300] + "..." if len(layer1_result) > 300 else layer1_result
-                },
-                transformation_rule="GSR Layer 1: 自然言語から意味構造への変換",
-                execution_time_ms=layer1_time,
-                confidence_level="HIGH"
+            # 状況そのものを制約の検出パターンで評価（判定と適用ルールの根拠）
+            # GSR 4層アーキテクチャによる推論（ステージエンジンが深度に応じた層を実行し、各層の時間を記録）
+            # 各層は共有入力・前の層を参照し、応答は最後に一度だけ組み立てる
+            result = ReasoningResult(
+                situation=situation_description,
+                required_judgment=required_judgment,
+                reasoning_mode=reasoning_mode,
+                context_depth=context_depth,
+                context=full_context,
+                budget_summary=budget_summary,
+                adaptive_summary=estimate.summary() if estimate is not None else "",
+                evaluation=composed.evaluator.evaluate(situation_description),
+                rules=composed.retriever.top_k(
+                    situation_description, RULE_TOP_K_BY_DEPTH.get(context_depth, RULE_TOP_K_BY_DEPTH["standard"])
+                ),
+                materials=list(gathered.results)
             )
+            result.stage_timings = gsr_engine.run(result, step_logger=reasoning_logger)
             
-            layer2_start = datetime.now()
-            layer2_result = _gsr_layer2_inlanguage_reasoning(layer1_result, full_context)
-            layer2_time = (datetime.now() - layer2_start).total_seconds() * 1000
-            
-            reasoning_logger.log_step(
-                step_name="言語内推論",
-                layer="Layer 2", 
-                input_data={
-                    "layer1_output": layer1_result[:200] + "..." if len(layer1_result) > 200 else layer1_result
-                },
-                output_data={
-                    "reasoning_result": layer2_result[:300] + "..." if len(layer2_result) > 300 else layer2_result
-                },
-                transformation_rule="GSR Layer 2: 意味構造内での論理的推論",
-                execution_time_ms=layer2_time,
-                confidence_level="MEDIUM"
-            )
-            
-            layer3_start = datetime.now()
-            layer3_result = _gsr_layer3_execution_explainability(layer2_result, full_context)
-            layer3_time = (datetime.now() - layer3_start).total_seconds() * 1000
-            
-            reasoning_logger.log_step(
-                step_name="実行・説明可能性",
-                layer="Layer 3",
-                input_data={
-                    "layer2_output": layer2_result[:200] + "..." if len(layer2_result) > 200 else layer2_result
-                },
-                output_data={
-                    "explainable_result": layer3_result[:300] + "..." if len(layer3_result) > 300 else layer3_result
-                },
-                transformation_rule="GSR Layer 3: 説明可能な実行可能形式への変換",
-                execution_time_ms=layer3_time,
-                confidence_level="HIGH"
-            )
-            
-            layer4_start = datetime.now()
-            layer4_result = _gsr_layer4_avoid_translation(layer3_result)
-            layer4_time = (datetime.now() - layer4_start).total_seconds() * 1000
-            
-            reasoning_logger.log_step(
-                step_name="自然言語出力",
-                layer="Layer 4",
-                input_data={
-                    "layer3_output": layer3_result[:200] + "..." if len(layer3_result) > 200 else layer3_result
-                },
-                output_data={
-                    "final_output": layer4_result[:300] + "..." if len(layer4_result) > 300 else layer4_result
-                },
-                transformation_rule="GSR Layer 4: 翻訳損失回避の自然言語出力",
-                execution_time_ms=layer4_time,
-                confidence_level="HIGH"
-            )
-            
-            # 信頼度計算（Phase2拡張）
-            confidence_level = _calculate_confidence_level(layer2_result, collected_materials)
+            # 信頼度計算（Phase2拡張）: Layer 2 が参照する状況・コンテキスト・Layer 1 と Layer 2 本文を対象
+            layer2_scope = result.scope("Layer 2")
+            result.assessment = _assess_confidence(layer2_scope, collected_materials)
+            confidence_level = result.assessment.render()
             
             # 信頼度計算をログ記録
             reasoning_logger.log_step(
                 step_name="信頼度計算",
                 layer="evaluation",
                 input_data={
-                    "layer2_length": len(layer2_result),
+                    "layer2_length": sum(len(text) for text in layer2_scope),
                     "materials_length": len(collected_materials)
                 },
                 output_data={
@@ -1761,36 +2096,16 @@ Sampling拡張: {'有効' if status['sampling_enabled'] else '無効'}
                 confidence_level=confidence_level
             )
             
-            # 実行時間計算
-            execution_time = (datetime.now() - start_time).total_seconds() * 1000
+            # 信頼度が HIGH でなかった要求は、類似した次の要求をより深く扱う
+            if estimate is not None:
+                depth_controller.record(situation_description, estimate.score, confidence_level)
             
-            # 統合結果の生成
-            unified_result = f"""
-🧠 **CoreThink統合GSR推論結果** (Phase2最適化版)
-
-【状況分析】
-{situation_description}
-
-【求められる判断】
-{required_judgment}
-
-【推論モード】
-{reasoning_mode} (深度: {context_depth})
-
-【GSR推論プロセス】
-Layer 1 → Layer 2 → Layer 3 → Layer 4
-
-{layer4_result}
-
-【信頼度】
-{confidence_level}
-
-【推論完了時刻】
-{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-【推論所要時間】
-{execution_time:.1f}ms
-            """
+            # 統合結果の生成（共有入力・各層の本文をそれぞれ一度だけ出力）
+            result.confidence = confidence_level
+            result.execution_time_ms = (datetime.now() - start_time).total_seconds() * 1000
+            result.completed_at = datetime.now()
+            payload = result.to_dict() if as_json else None
+            unified_result = dumps_json(payload) if as_json else result.render(profile)
             
             # セッション終了とログ出力
             reasoning_logger.end_session(
@@ -1798,8 +2113,24 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
                 final_confidence=confidence_level
             )
             
-            logger.info(f"統合GSR推論完了: {execution_time:.1f}ms, 信頼度: {confidence_level}")
-            return unified_result.strip()
+            # 期限切れ・エラーで欠けた材料を含む結果は保存しない
+            if cache_key is not None and not gathered.incomplete:
+                try:
+                    await asyncio.to_thread(result_cache.put, cache_key, unified_result, confidence_level)
+                except Exception as e:
+                    logger.warning(f"推論結果キャッシュの保存エラー: {str(e)}")
+            
+            logger.info(f"統合GSR推論完了: {result.execution_time_ms:.1f}ms, 信頼度: {confidence_level}")
+            if len(unified_result) <= max_chars or max_chars <= 0:
+                return unified_result
+            return fit_payload(payload, max_chars) if as_json else fit_text(unified_result, max_chars)
+            
+        except asyncio.CancelledError:
+            # クライアントによる取り消し: 推論ログは取り消しとして記録し、取り消しを呼び出し元へ伝える
+            elapsed_ms = (datetime.now() - start_time).total_seconds() * 1000
+            logger.info(f"統合GSR推論取り消し: {elapsed_ms:.1f}ms")
+            reasoning_logger.cancel_session(f"クライアントにより取り消されました（{elapsed_ms:.1f}ms）")
+            raise
             
         except Exception as e:
             error_time = (datetime.now() - start_time).total_seconds() * 1000
@@ -1810,10 +2141,11 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
             if 'session_id' in locals():
                 reasoning_logger.end_session(
                     final_judgment=error_msg,
-                    final_confidence="ERROR"
+                    final_confidence="ERROR",
+                    status=STATUS_ERROR
                 )
             
-            return error_msg
+            return error_json("unified_gsr_reasoning", error_msg) if as_json else error_msg
 
     @app.tool()
     async def unified_gsr_reasoning(
@@ -1821,6 +2153,9 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
         required_judgment: str = "evaluate_and_decide",
         context_depth: str = "standard",
         reasoning_mode: str = "comprehensive",
+        output_format: str = "markdown",
+        response_profile: str = "",
+        max_response_chars: int = 0,
         ctx = None
     ) -> str:
         """
@@ -1851,10 +2186,17 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
                 - "comprehensive": 包括的推論（デフォルト）
                 - "focused": 焦点絞り込み推論
                 - "exploratory": 探索的推論
+            output_format: 出力形式
+                - "markdown": 自然言語の推論結果（デフォルト）
+                - "json": 判定・信頼度の要素・適用ルール・ステージ別時間・材料の参照を含む構造化オブジェクト
+            response_profile: 応答プロファイル（空で RESPONSE_PROFILE）
+                - "full": すべてのセクション（デフォルト）
+                - "compact": 表題と各層の定型本文を省き、判定・推論コンテキスト・信頼度のみ（JSON 出力には影響しない）
+            max_response_chars: 応答の文字数上限（0 で MAX_RESPONSE_CHARS、超える場合は長いセクション・文字列から要約）
             ctx: FastMCP context
             
         Returns:
-            自然言語による完全な推論結果
+            自然言語による完全な推論結果（output_format="json" では JSON 文字列）
             - 判断
             - 根拠  
             - 推論過程
@@ -1866,135 +2208,319 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
             required_judgment=required_judgment,
             context_depth=context_depth,
             reasoning_mode=reasoning_mode,
-            ctx=ctx
+            ctx=ctx,
+            output_format=output_format,
+            response_profile=response_profile,
+            max_response_chars=max_response_chars
         )
 
-    # ================== 内部実装関数（MCPツール間で共有） ==================
-    
-    async def _collect_reasoning_materials_impl(
-        topic: str,
-        material_types: str = "constraints,precedents,implications",
-        depth: str = "standard", 
-        ctx = None
+    @cancellable
+    @constraint_index.pin_snapshot
+    @memoize_domains
+    async def _unified_gsr_reasoning_batch_impl(
+        situations: list[str],
+        required_judgment: str = "evaluate_and_decide",
+        context_depth: str = "standard",
+        reasoning_mode: str = "comprehensive",
+        max_concurrency: int = 0,
+        ctx = None,
+        response_profile: str = "",
+        max_response_chars: int = 0
     ) -> str:
-        """
-        推論材料収集の内部実装（MCPツールと統合GSR推論で共有）
+        """統合GSR推論のバッチ実装（MCPツールから独立）
         
-        機能劣化なしの完全な推論材料収集を行う
+        バッチ全体で制約スナップショットを固定し（全項目が同じ制約・分野キーワードを参照）、
+        分野検出の結果は項目間で共有する。リポジトリ索引・変更履歴索引の差分更新は
+        開始前に一度だけ行い、各項目では期限内として省略される。
+        文字数上限は項目ごとではなくバッチ全体の応答に適用する。
         """
-        start_time = datetime.now()
+        try:
+            profile, max_chars = response_options(response_profile, max_response_chars)
+        except ValueError as e:
+            return f"バッチ推論エラー: {str(e)}"
+        if not situations:
+            return "バッチ推論エラー: 状況が指定されていません"
+        max_items = get_batch_max_items()
+        if len(situations) > max_items:
+            return f"バッチ推論エラー: 項目数 {len(situations)} が上限 {max_items} を超えています"
+        concurrency = max_concurrency if max_concurrency > 0 else get_batch_max_concurrency()
+        logger.info(f"バッチ推論開始: {len(situations)}項目 (同時実行数 {concurrency})")
         
+        # 索引の差分更新は項目間で共有（各項目の先例収集が同時に更新を始めないよう先に一度だけ行う）
         try:
-            material_types_list = [mt.strip() for mt in material_types.split(",")]
-            collected_materials = {}
-            
-            # 制約情報の収集（完全版）
-            if "constraints" in material_types_list:
-                base_constraints = load_constraints()
-                domain_constraints = load_domain_constraints(topic)
-                combined_constraints = f"{base_constraints}\n\n{domain_constraints}" if domain_constraints else base_constraints
-                collected_materials["制約情報"] = combined_constraints
-            
-            # 先例・前例の収集（完全版）
-            if "precedents" in material_types_list:
-                # 実際のファイルシステムから先例を検索
+            await asyncio.to_thread(_refresh_precedent_indexes)
+        except Exception as e:
+            logger.warning(f"リポジトリ索引の更新エラー: {str(e)}")
+        
+        async def _run_item(situation: str) -> str:
+            return await _unified_gsr_reasoning_impl(
+                situation_description=situation,
+                required_judgment=required_judgment,
+                context_depth=context_depth,
+                reasoning_mode=reasoning_mode,
+                ctx=ctx,
+                response_profile=profile
+            )
+        
+        async def _on_item_done(item: BatchItemResult, completed: int) -> None:
+            logger.info(f"バッチ推論 項目{item.index + 1} 完了: {item.elapsed_ms:.1f}ms（{completed}件完了）")
+            if ctx is not None and hasattr(ctx, "info"):
                 try:
-                    project_files = []
-                    repo_root = Path(REPO_ROOT)
-                    for ext in ['.py', '.md', '.txt']:
-                        project_files.extend(repo_root.glob(f"**/*{ext}"))
-                    
-                    relevant_precedents = []
-                    topic_keywords = topic.lower().split()
-                    
-                    for file_path in project_files[:20]:  # 最大20ファイルを調査
-                        try:
-                            content = file_path.read_text(encoding='utf-8', errors='ignore')
-                            if any(keyword in content.lower() for keyword in topic_keywords):
-                                relevant_precedents.append(f"{file_path.name}: {content[:200]}...")
-                        except Exception:
-                            continue
-                    
-                    if relevant_precedents:
-                        collected_materials["先例・前例"] = "\n".join(relevant_precedents[:5])
-                    else:
-                        collected_materials["先例・前例"] = f"{topic}に関連する標準的な手法とベストプラクティスを適用"
-                        
+                    await ctx.info(f"バッチ推論: 項目{item.index + 1} 完了（{completed}件完了）")
                 except Exception as e:
-                    collected_materials["先例・前例"] = f"先例検索中にエラー: {str(e)}"
+                    logger.debug(f"進捗通知エラー（無視）: {e}")
+        
+        batch = await run_batch(situations, _run_item, concurrency, on_item_done=_on_item_done)
+        
+        logger.info(f"バッチ推論完了: {batch.summary()}")
+        return fit_text(batch.render(compact=profile == PROFILE_COMPACT), max_chars)
+
+    @app.tool()
+    async def unified_gsr_reasoning_batch(
+        situations: list[str],
+        required_judgment: str = "evaluate_and_decide",
+        context_depth: str = "standard",
+        reasoning_mode: str = "comprehensive",
+        max_concurrency: int = 0,
+        response_profile: str = "",
+        max_response_chars: int = 0,
+        ctx = None
+    ) -> str:
+        """
+        複数の状況について統合GSR推論を一括で実行します
+        
+        計画のサブタスクごとの推論をまとめて依頼する用途向け。
+        制約の読み込み・分野検出・索引の更新を項目間で共有し、項目を並行して推論します。
+        同一の状況（空白・大文字小文字の違いを除く）は一度だけ推論して結果を共有します。
+        
+        Args:
+            situations: 推論対象の状況記述のリスト（自然言語）
+            required_judgment: 求められる判断の種類（全項目共通、unified_gsr_reasoning と同じ）
+            context_depth: コンテキストの深度（全項目共通）
+            reasoning_mode: 推論モード（全項目共通）
+            max_concurrency: 同時に推論する項目数（0 で BATCH_MAX_CONCURRENCY）
+            response_profile: 応答プロファイル（空で RESPONSE_PROFILE）
+                - "full": すべてのセクション（デフォルト）
+                - "compact": 表題・見出しの装飾と定型文を省く
+            max_response_chars: バッチ全体の応答の文字数上限（0 で MAX_RESPONSE_CHARS、超える場合は長いセクションから要約）
+            ctx: FastMCP context
             
-            # 影響・含意の収集（完全版）
-            if "implications" in material_types_list:
-                domain = _detect_domain(topic)
-                domain_keywords = _load_domain_keywords().get(domain, [])
-                
-                implications = []
-                implications.append(f"【技術的影響】{topic}による技術的変更の波及効果")
-                implications.append(f"【運用面への影響】システム運用・保守への影響")
-                
-                if domain_keywords:
-                    implications.append(f"【分野特化影響】{domain}分野固有の考慮事項: {', '.join(domain_keywords[:3])}")
-                
-                collected_materials["影響・含意"] = "\n".join(implications)
+        Returns:
+            入力順の推論結果と項目別の所要時間
+        """
+        return await _unified_gsr_reasoning_batch_impl(
+            situations=situations,
+            required_judgment=required_judgment,
+            context_depth=context_depth,
+            reasoning_mode=reasoning_mode,
+            max_concurrency=max_concurrency,
+            ctx=ctx,
+            response_profile=response_profile,
+            max_response_chars=max_response_chars
+        )
+
+    # ================== 内部実装関数（MCPツール間で共有） ==================
+    
+    async def _stream_reasoning_materials(
+        topic: str,
+        material_types_list: list[str],
+        depth: str = "standard",
+        ctx = None,
+        allow_sampling: bool = True,
+        composed: ComposedConstraints | None = None
+    ) -> AsyncIterator[MaterialSection]:
+        """推論材料を種類ごとに並行収集し、完了した材料から順に返す
+        
+        allow_sampling=False の場合は Sampling が有効でも Sampling 分析を行わない。
+        composed は topic から統合済みの制約（省略時は制約情報の収集時に統合）。
+        コレクターは MAX_CONCURRENT_TOOLS 件まで同時に実行し、期限を過ぎたものは
+        打ち切る（打ち切った材料も done=False の MaterialSection として返す）。
+        キャッシュ済みの材料は最初に返す。
+        制約スナップショットは呼び出し元で固定すること（非同期ジェネレーターでは pin_snapshot を使えない）。
+        """
+        selected = [mt for mt in dict.fromkeys(material_types_list) if mt in MATERIAL_SECTIONS]
+        
+        # 分野検出は材料タイプ間で共有（入力の走査は一度だけ）
+        domain = _detect_domain(topic) if {"implications", "domain_knowledge"} & set(selected) else "general"
+        rule_top_k = RULE_TOP_K_BY_DEPTH.get(depth, RULE_TOP_K_BY_DEPTH["standard"])
+        
+        # 関連度の高い制約ルールの収集（ファイル全文ではなく上位k件）
+        async def _constraints() -> str:
+            return render_relevant_constraints(topic, rule_top_k, composed)
+        
+        # 先例・前例の収集（リポジトリ索引の転置リスト検索、comprehensive は全ファイルのシャード走査）
+        # （例外はコレクターのエラーとして報告され、キャッシュされない）
+        async def _precedents() -> str:
+            precedent_top_k = PRECEDENT_TOP_K_BY_DEPTH.get(depth, PRECEDENT_TOP_K_BY_DEPTH["standard"])
+            # 索引の差分更新・全件走査はファイルI/Oを伴うためイベントループ外で実行
+            return await asyncio.to_thread(search_precedents, topic, precedent_top_k, depth == "comprehensive")
+        
+        # 影響・含意の収集
+        async def _implications() -> str:
+            domain_keywords = _load_domain_keywords().get(domain, [])
             
-            # 専門知識の収集（完全版）
-            if "domain_knowledge" in material_types_list:
-                domain = _detect_domain(topic)
-                domain_knowledge = []
-                
-                if domain != "general":
-                    domain_file = CONSTRAINTS_DIR / f"constraints_{domain}.txt"
-                    if domain_file.exists():
-                        domain_content = domain_file.read_text(encoding='utf-8')
-                        domain_knowledge.append(f"【{domain.upper()}分野の専門知識】\n{domain_content[:1000]}")
-                
-                if not domain_knowledge:
-                    domain_knowledge.append(f"【一般的専門知識】{topic}に関連する技術的・理論的背景")
-                
-                collected_materials["専門知識"] = "\n".join(domain_knowledge)
-            
-            # リスク要因の収集（完全版）
-            if "risk_factors" in material_types_list:
-                risk_factors = []
-                risk_factors.append(f"【セキュリティリスク】{topic}に関連するセキュリティ上の懸念")
-                risk_factors.append(f"【パフォーマンスリスク】処理性能・リソース使用量への影響")
-                risk_factors.append(f"【互換性リスク】既存システムとの互換性問題")
-                risk_factors.append(f"【運用リスク】運用・保守時の潜在的問題")
-                
-                collected_materials["リスク要因"] = "\n".join(risk_factors)
-            
-            # シンボリックパターンの検出（完全版）
-            if "symbolic_patterns" in material_types_list:
-                patterns = []
-                patterns.append(f"【構造パターン】{topic}の論理構造と依存関係")
-                patterns.append(f"【処理パターン】典型的な処理フローとデータフロー")
-                patterns.append(f"【設計パターン】適用可能な設計パターンとアーキテクチャ")
-                
-                collected_materials["シンボリックパターン"] = "\n".join(patterns)
+            implications = []
+            implications.append(f"【技術的影響】{topic}による技術的変更の波及効果")
+            implications.append(f"【運用面への影響】システム運用・保守への影響")
             
-            # リポジトリコンテキストの分析（完全版）
-            if "repository_context" in material_types_list:
-                try:
-                    repo_analysis = []
-                    repo_root = Path(REPO_ROOT)
-                    
-                    # プロジェクト構造の分析
-                    py_files = list(repo_root.glob("**/*.py"))
-                    md_files = list(repo_root.glob("**/*.md"))
-                    
-                    repo_analysis.append(f"【プロジェクト構造】Python ファイル: {len(py_files)}, ドキュメント: {len(md_files)}")
-                    
-                    # 主要ディレクトリの分析
-                    main_dirs = [d for d in repo_root.iterdir() if d.is_dir() and not d.name.startswith('.')]
-                    repo_analysis.append(f"【主要ディレクトリ】{', '.join([d.name for d in main_dirs[:5]])}")
-                    
-                    collected_materials["リポジトリコンテキスト"] = "\n".join(repo_analysis)
-                    
-                except Exception as e:
-                    collected_materials["リポジトリコンテキスト"] = f"リポジトリ分析エラー: {str(e)}"
+            if domain_keywords:
+                implications.append(f"【分野特化影響】{domain}分野固有の考慮事項: {', '.join(domain_keywords[:3])}")
+            
+            return "\n".join(implications)
+        
+        # 専門知識の収集
+        async def _domain_knowledge() -> str:
+            domain_knowledge = []
+            
+            if domain != "general":
+                domain_rules = constraint_composer.compose([domain]).retriever.top_k(topic, rule_top_k, domain=domain)
+                if domain_rules:
+                    domain_knowledge.append(
+                        f"【{domain.upper()}分野の専門知識】\n" + "\n".join(scored.render() for scored in domain_rules)
+                    )
             
-            # 統合結果の生成
-            materials_report = f"""
+            if not domain_knowledge:
+                domain_knowledge.append(f"【一般的専門知識】{topic}に関連する技術的・理論的背景")
+            
+            return "\n".join(domain_knowledge)
+        
+        # リスク要因の収集
+        async def _risk_factors() -> str:
+            risk_factors = []
+            risk_factors.append(f"【セキュリティリスク】{topic}に関連するセキュリティ上の懸念")
+            risk_factors.append(f"【パフォーマンスリスク】処理性能・リソース使用量への影響")
+            risk_factors.append(f"【互換性リスク】既存システムとの互換性問題")
+            risk_factors.append(f"【運用リスク】運用・保守時の潜在的問題")
+            
+            return "\n".join(risk_factors)
+        
+        # シンボリックパターンの検出
+        async def _symbolic_patterns() -> str:
+            patterns = []
+            patterns.append(f"【構造パターン】{topic}の論理構造と依存関係")
+            patterns.append(f"【処理パターン】典型的な処理フローとデータフロー")
+            patterns.append(f"【設計パターン】適用可能な設計パターンとアーキテクチャ")
+            
+            return "\n".join(patterns)
+        
+        # リポジトリコンテキストの分析（言語別・ディレクトリ別の統計）
+        async def _repository_context() -> str:
+            stats = await asyncio.to_thread(repo_stats.analyze)
+            return stats.render()
+        
+        collectors = {
+            "constraints": _constraints,
+            "precedents": _precedents,
+            "implications": _implications,
+            "domain_knowledge": _domain_knowledge,
+            "risk_factors": _risk_factors,
+            "symbolic_patterns": _symbolic_patterns,
+            "repository_context": _repository_context,
+        }
+        samplers = {
+            "precedents": _collect_precedent_materials,
+            "implications": _collect_implication_materials,
+            "domain_knowledge": _collect_domain_knowledge,
+            "risk_factors": _collect_risk_factors,
+            "symbolic_patterns": _collect_symbolic_patterns,
+            "repository_context": _collect_repository_context,
+        }
+        
+        sampling_active = bool(allow_sampling and is_sampling_enabled() and ctx and hasattr(ctx, 'mcp'))
+        
+        # キャッシュ済みの材料はコレクターを実行しない（材料単位で部分的に再利用）
+        cached: dict[str, str] = {}
+        cache_keys = {}
+        if is_materials_cache_enabled():
+            if "precedents" in selected:
+                # 索引の世代をキーに含めるため、期限が来ていれば先に差分更新する
+                await asyncio.to_thread(_refresh_precedent_indexes)
+            constraint_version = constraint_index.snapshot().version
+            repo_version = (repo_index.version, change_history.version)
+            for mt in selected:
+                cache_keys[mt] = section_key(topic, mt, depth, constraint_version, repo_version, sampling_active)
+                content = materials_cache.get(cache_keys[mt])
+                if content is not None:
+                    cached[mt] = content
+            materials_cache.record_request(len(cached), len(selected))
+        
+        pending = [mt for mt in selected if mt not in cached]
+        jobs = [CollectorJob(mt, collectors[mt], get_collector_timeout(mt)) for mt in pending]
+        # Sampling が使える場合は分析をコア収集と並行実行し、完了したものだけ材料に追記
+        if sampling_active:
+            jobs.extend(
+                CollectorJob(f"{mt}:sampling", functools.partial(samplers[mt], topic, depth, ctx), get_collector_timeout(mt))
+                for mt in pending if mt in samplers
+            )
+        
+        for mt in selected:
+            if mt in cached:
+                yield MaterialSection(mt, MATERIAL_SECTIONS[mt], cached[mt], (CollectorResult(mt, STATUS_CACHED, cached[mt], 0.0),))
+        
+        # 材料ごとに待つコレクター（コア収集＋Sampling分析）が揃った時点で返す
+        expected = {mt: {mt} for mt in pending}
+        for job in jobs:
+            expected[job.name.split(":")[0]].add(job.name)
+        finished: dict[str, CollectorResult] = {}
+        async for result in iter_collectors(jobs, get_max_concurrent_tools()):
+            finished[result.name] = result
+            mt = result.name.split(":")[0]
+            if not expected[mt] <= finished.keys():
+                continue
+            
+            core = finished[mt]
+            sampled = finished.get(f"{mt}:sampling")
+            content = core.content if core.done else ""
+            if core.done and sampled is not None and sampled.done and sampled.content:
+                content = f"{content}\n{sampled.content}"
+            # Sampling分析まで揃った材料だけを保存（期限切れ分を含む材料を再利用しない）
+            if core.done and mt in cache_keys and (sampled is None or sampled.done):
+                materials_cache.put(cache_keys[mt], content)
+            yield MaterialSection(mt, MATERIAL_SECTIONS[mt], content, tuple(r for r in (core, sampled) if r is not None))
+
+    @constraint_index.pin_snapshot
+    async def _gather_reasoning_materials(
+        topic: str,
+        material_types_list: list[str],
+        depth: str = "standard",
+        ctx = None,
+        allow_sampling: bool = True,
+        composed: ComposedConstraints | None = None
+    ) -> GatheredMaterials:
+        """推論材料を収集する（完了した材料ごとに ctx へ進捗を通知）
+        
+        材料収集ツールの報告書生成と統合GSR推論のコンテキスト構築で共有する。
+        材料は完了順にストリームから受け取り、結果は要求された材料タイプの順に並べる
+        （期限切れ・エラーの材料は GatheredMaterials.incomplete）。
+        """
+        selected = [mt for mt in dict.fromkeys(material_types_list) if mt in MATERIAL_SECTIONS]
+        received: dict[str, MaterialSection] = {}
+        async for section in _stream_reasoning_materials(topic, selected, depth, ctx, allow_sampling, composed):
+            received[section.material_type] = section
+            await _report_material_progress(ctx, len(received), len(selected), section)
+        
+        gathered = GatheredMaterials()
+        for position in (0, 1):  # コア収集 → Sampling分析の順
+            for mt in selected:
+                if mt in received and len(received[mt].results) > position:
+                    gathered.results.append(received[mt].results[position])
+        for mt in selected:
+            if mt in received and received[mt].done:
+                gathered.sections[received[mt].name] = received[mt].content
+        
+        if gathered.incomplete:
+            logger.warning(f"推論材料の一部を収集できませんでした: {', '.join(r.name for r in gathered.incomplete)}")
+        return gathered
+
+    def _render_materials_report(
+        topic: str,
+        material_types: str,
+        depth: str,
+        gathered: GatheredMaterials,
+        start_time: datetime
+    ) -> str:
+        """材料収集結果の報告書（Markdown）"""
+        materials_report = f"""
 🧠 **CoreThink推論材料収集結果** (完全版)
 
 【調査対象】
@@ -2008,17 +2534,76 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
 
 【収集された材料】
 """
-            
-            for material_type, content in collected_materials.items():
-                materials_report += f"\n## {material_type}\n{content}\n"
-            
-            materials_report += f"""
+        
+        for material_type, content in gathered.sections.items():
+            materials_report += f"\n## {material_type}\n{content}\n"
+        
+        # 期限切れ・エラーの材料は省略し、完了分だけで報告する
+        if gathered.incomplete:
+            materials_report += "\n【未収集の材料】\n" + "\n".join(
+                f"- {result.name}: {'期限切れ' if result.status == STATUS_TIMEOUT else result.content}"
+                for result in gathered.incomplete
+            ) + "\n"
+        
+        materials_report += f"""
 【収集完了時刻】
 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 【収集所要時間】
-{(datetime.now() - start_time).total_seconds():.2f}秒
-            """
+{(datetime.now() - start_time).total_seconds():.2f}秒（{gathered.timing_summary() or '材料なし'}）
+        """
+        return materials_report
+
+    @cancellable
+    @constraint_index.pin_snapshot
+    @memoize_domains
+    async def _collect_reasoning_materials_impl(
+        topic: str,
+        material_types: str = "constraints,precedents,implications",
+        depth: str = "standard", 
+        ctx = None,
+        output_format: str = "markdown",
+        response_profile: str = "",
+        max_response_chars: int = 0
+    ) -> str:
+        """
+        推論材料収集の内部実装（MCPツールと統合GSR推論で共有）
+        
+        機能劣化なしの完全な推論材料収集を行う（履歴には文字数上限を適用する前の報告書を記録）
+        """
+        start_time = datetime.now()
+        try:
+            output_format = normalize_output_format(output_format)
+            profile, max_chars = response_options(response_profile, max_response_chars)
+        except ValueError as e:
+            return f"推論材料収集エラー: {str(e)}"
+        
+        try:
+            material_types_list = [mt.strip() for mt in material_types.split(",")]
+            gathered = await _gather_reasoning_materials(topic, material_types_list, depth, ctx)
+            
+            payload = None
+            if output_format == FORMAT_JSON:
+                # 材料名 → 内容と、コレクター（コア収集・Sampling分析）の状態ごとの所要時間
+                # （要求した材料タイプ・未収集の材料はコレクターの名前と状態から分かるため含めない）
+                # 専門知識などで先の材料と同じ行（制約ルール）は省き、shared_lines で出現元の行を参照する
+                collectors: dict[str, dict[str, float]] = {}
+                for result in gathered.results:
+                    collectors.setdefault(result.status, {})[result.name] = round(result.elapsed_ms, 1)
+                materials, shared_lines = share_repeated_lines(gathered.sections)
+                payload = {
+                    "tool": "collect_reasoning_materials",
+                    "topic": topic,
+                    "depth": depth,
+                    "materials": materials,
+                }
+                if shared_lines:
+                    payload["shared_lines"] = shared_lines
+                payload["collectors"] = collectors
+                payload["elapsed_ms"] = round((datetime.now() - start_time).total_seconds() * 1000, 1)
+                materials_report = dumps_json(payload)
+            else:
+                materials_report = _render_materials_report(topic, material_types, depth, gathered, start_time)
             
             # ログ記録
             if is_history_enabled():
@@ -2031,18 +2616,23 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
                 )
             
             logger.info(f"推論材料収集完了: {(datetime.now() - start_time).total_seconds():.2f}秒")
-            return materials_report.strip()
+            if payload is not None:
+                return fit_payload(payload, max_chars)
+            return shape_response(materials_report.strip(), profile, max_chars)
             
         except Exception as e:
             error_msg = f"推論材料収集エラー: {str(e)}"
             logger.error(error_msg)
-            return error_msg
+            return error_json("collect_reasoning_materials", error_msg) if output_format == FORMAT_JSON else error_msg
 
     @app.tool()
     async def collect_reasoning_materials(
         topic: str,
         material_types: str = "constraints,precedents,implications",
         depth: str = "standard",
+        output_format: str = "markdown",
+        response_profile: str = "",
+        max_response_chars: int = 0,
         ctx = None
     ) -> str:
         """
@@ -2068,13 +2658,23 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
                 - "standard": 標準的な分析  
                 - "deep": 深度分析
                 - "comprehensive": 包括的分析
+            output_format: 出力形式
+                - "markdown": 自然言語の報告書（デフォルト）
+                - "json": 材料名ごとの内容と、状態ごとのコレクターの所要時間の構造化オブジェクト
+                  （先の材料と同じ行は省き、shared_lines に出現元の材料名と行番号を示す）
+            response_profile: 応答プロファイル（空で RESPONSE_PROFILE）
+                - "full": すべてのセクション（デフォルト）
+                - "compact": 表題・見出しの装飾と定型文を省く（JSON 出力には影響しない）
+            max_response_chars: 応答の文字数上限（0 で MAX_RESPONSE_CHARS、超える場合は長いセクション・文字列から要約）
             ctx: FastMCP context（Sampling機能活用）
             
         Returns:
-            収集された材料の自然言語記述
+            収集された材料の自然言語記述（output_format="json" では JSON 文字列）
         """
         # MCPツール版は内部実装を呼び出し
-        return await _collect_reasoning_materials_impl(topic, material_types, depth, ctx)
+        return await _collect_reasoning_materials_impl(
+            topic, material_types, depth, ctx, output_format, response_profile, max_response_chars
+        )
 
     # ================== Phase3統合: システム管理エンジン ==================
     
@@ -2083,6 +2683,8 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
         operation: str,
         target: str = "",
         parameters: str = "",
+        response_profile: str = "",
+        max_response_chars: int = 0,
         ctx = None
     ) -> str:
         """
@@ -2093,6 +2695,7 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
         - get_history_statistics: 統計取得
         - learn_dynamic_constraints: 制約学習
         - manage_feature_flags: 機能フラグ管理
+        - キャッシュ統計の確認・クリア
         
         Args:
             operation: 実行する操作
@@ -2100,8 +2703,13 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
                 - "get_statistics": 統計情報取得（旧get_history_statistics）
                 - "learn_constraints": 動的制約学習（旧learn_dynamic_constraints）
                 - "manage_flags": 機能フラグ管理（旧manage_feature_flags）
+                - "cache_stats": 推論材料・推論結果・制約合成キャッシュとリポジトリ索引の統計（target="clear" でクリア）
             target: 操作対象（ツール名、フラグ名等）
             parameters: 操作パラメータ（JSON形式等）
+            response_profile: 応答プロファイル（空で RESPONSE_PROFILE）
+                - "full": すべてのセクション（デフォルト）
+                - "compact": 表題・見出しの装飾と定型文を省く
+            max_response_chars: 応答の文字数上限（0 で MAX_RESPONSE_CHARS、超える場合は長いセクションから要約）
             ctx: FastMCP context
             
         Returns:
@@ -2111,6 +2719,7 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
         logger.info(f"システム管理操作開始: {operation}")
         
         try:
+            profile, max_chars = response_options(response_profile, max_response_chars)
             result = ""
             
             if operation == "get_history":
@@ -2188,8 +2797,48 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
                 else:
                     result = "機能フラグ名と設定値を指定してください（target, parameters引数）"
                     
+            elif operation == "cache_stats":
+                # キャッシュ統計（target="clear" で推論材料・推論結果キャッシュをクリア）
+                if target == "clear":
+                    materials_cache.clear()
+                    result_cache.clear()
+                materials_stats = materials_cache.get_stats()
+                result_stats = result_cache.get_stats()
+                composer_stats = constraint_composer.get_stats()
+                lines = [
+                    "【推論材料キャッシュ】",
+                    f"状態: {'有効' if is_materials_cache_enabled() else '無効'}"
+                    + ("（クリアしました）" if target == "clear" else ""),
+                    f"保持材料: {materials_stats['entries']}/{materials_stats['max_entries']}件"
+                    f"（有効期限 {materials_stats['ttl_seconds']}秒）",
+                    f"材料単位: ヒット {materials_stats['hits']} / ミス {materials_stats['misses']}"
+                    f"（ヒット率 {materials_stats['hit_rate']:.1%}、期限切れ {materials_stats['expired']}）",
+                    f"要求単位: 全材料ヒット {materials_stats['full_hits']} / 一部ヒット {materials_stats['partial_hits']}"
+                    f" / ヒットなし {materials_stats['full_misses']}",
+                    "",
+                    "【推論結果キャッシュ】",
+                    f"状態: {'有効' if is_result_cache_enabled() else '無効'}, 保存先: {result_stats['path']}",
+                    f"保持結果: {result_stats['entries']}/{result_stats['max_entries']}件"
+                    f"（{result_stats['content_chars']:,}文字、有効期限 {result_stats['ttl_seconds'] or 'なし'}"
+                    f"{'秒' if result_stats['ttl_seconds'] else ''}）",
+                    f"ヒット {result_stats['hits']} / ミス {result_stats['misses']}"
+                    f"（ヒット率 {result_stats['hit_rate']:.1%}、期限切れ {result_stats['expired']}、破棄 {result_stats['evicted']}）",
+                    "",
+                    "【制約合成キャッシュ】",
+                    f"保持: {composer_stats['entries']}件, ヒット {composer_stats['hits']} / ミス {composer_stats['misses']}",
+                    f"制約インデックスのバージョン: {constraint_index.snapshot().version}",
+                    "",
+                    "【リポジトリ索引】",
+                    f"状態: {'有効' if is_repo_index_enabled() else '無効'}, バージョン: {repo_index.version}",
+                    "",
+                    "【変更履歴索引】",
+                    f"状態: {'有効' if is_change_history_index_enabled() and change_history.available else '無効'}"
+                    f", バージョン: {change_history.version}",
+                ]
+                result = "\n".join(lines)
+                
             else:
-                result = f"未対応の操作: {operation}\n利用可能: get_history, get_statistics, learn_constraints, manage_flags"
+                result = f"未対応の操作: {operation}\n利用可能: get_history, get_statistics, learn_constraints, manage_flags, cache_stats"
             
             # ログ記録
             if is_history_enabled():
@@ -2202,7 +2851,7 @@ Layer 1 → Layer 2 → Layer 3 → Layer 4
                 )
             
             logger.info(f"システム管理操作完了: {(datetime.now() - start_time).total_seconds():.2f}秒")
-            return result
+            return shape_response(result, profile, max_chars)
             
         except Exception as e:
             error_msg = f"システム管理エラー: {str(e)}"
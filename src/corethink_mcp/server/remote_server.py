@@ -27,13 +27,18 @@ if str(project_root) not in sys.path:
 
 from src.corethink_mcp import get_version_info
 from src.corethink_mcp.server.corethink_server import (
-    load_constraints, load_combined_constraints, load_domain_constraints,
-    create_sandbox, CONSTRAINTS_FILE, REPO_ROOT, SANDBOX_DIR,
+    load_constraints, load_domain_constraints, compose_constraints,
+    create_sandbox_async, CONSTRAINTS_FILE, REPO_ROOT, SANDBOX_DIR,
     _detect_domain, parse_constraint_file, _load_domain_keywords,
     feature_flags, is_sampling_enabled, is_history_enabled, get_sampling_timeout,
-    log_tool_execution, _unified_gsr_reasoning_impl, _collect_reasoning_materials_impl
+    log_tool_execution, _unified_gsr_reasoning_impl, _unified_gsr_reasoning_batch_impl,
+    _collect_reasoning_materials_impl, validation_payload, RULE_TOP_K_BY_DEPTH, response_options
+)
+from src.corethink_mcp.response_format import (
+    FORMAT_JSON, TEMPLATE_SECTIONS, dumps_json, fit_payload, loads_json, normalize_output_format, shape_response
 )
 from src.corethink_mcp.reasoning_logger import reasoning_logger
+from src.corethink_mcp.gsr_engine import gsr_engine
 
 # ログ設定
 logging.basicConfig(
@@ -43,6 +48,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 全ツール共通の応答サイズ指定（inputSchema）
+RESPONSE_SIZE_PROPERTIES = {
+    'response_profile': {'type': 'string', 'description': '応答プロファイル (full, compact)（空で設定値）', 'default': ''},
+    'max_response_chars': {'type': 'integer', 'description': '応答の文字数上限（0 で設定値、超える場合は長いセクションから要約）', 'default': 0}
+}
+# compact プロファイルで省く定型セクション（HTTP Transport 版の応答に固有のものを追加）
+REMOTE_TEMPLATE_SECTIONS = TEMPLATE_SECTIONS + ("HTTP Transport制約", "CoreThink-MCP Remote Server")
+
+# 応答プロファイル・文字数上限を実装側で適用するツール（それ以外は応答の組み立て後に適用）
+_SIZED_BY_IMPL = ('unified_gsr_reasoning', 'unified_gsr_reasoning_batch', 'collect_reasoning_materials')
+
 class RemoteCoreThinkMCP:
     """Remote MCP Server for HTTP Transport"""
     
@@ -89,7 +105,7 @@ class RemoteCoreThinkMCP:
             'transport': 'http',
             'capabilities': {
                 'tools': [
-                    'unified_gsr_reasoning', 'collect_reasoning_materials', 
+                    'unified_gsr_reasoning', 'unified_gsr_reasoning_batch', 'collect_reasoning_materials', 
                     'execute_with_safeguards', 'validate_against_constraints',
                     'generate_detailed_trace', 'manage_system_state'
                 ],
@@ -97,6 +113,10 @@ class RemoteCoreThinkMCP:
                 'protocol_version': '2025-06-18',
                 'transport': 'http',
                 'gsr_architecture': '4-layer',
+                'gsr_stages': [
+                    {'name': stage.name, 'title': stage.title, 'depths': sorted(stage.depths)}
+                    for stage in gsr_engine.stages
+                ],
                 'paper_reference': 'arXiv:2509.00971v2'
             }
         })
@@ -207,11 +227,28 @@ class RemoteCoreThinkMCP:
                             'situation_description': {'type': 'string', 'description': '評価対象の状況説明'},
                             'required_judgment': {'type': 'string', 'description': '必要な判断タイプ', 'default': 'evaluate_and_decide'},
                             'context_depth': {'type': 'string', 'description': '文脈深度レベル', 'default': 'standard'},
-                            'domain_hints': {'type': 'string', 'description': '専門分野のヒント（医療、法律等）', 'default': ''}
+                            'domain_hints': {'type': 'string', 'description': '専門分野のヒント（医療、法律等）', 'default': ''},
+                            'output_format': {'type': 'string', 'description': '出力形式 (markdown, json)', 'default': 'markdown'},
+                            **RESPONSE_SIZE_PROPERTIES
                         },
                         'required': ['situation_description']
                     }
                 },
+                {
+                    'name': 'unified_gsr_reasoning_batch',
+                    'description': 'GSR統合推論のバッチ実行：複数の状況を並行推論し、入力順の結果と項目別所要時間を返す',
+                    'inputSchema': {
+                        'type': 'object',
+                        'properties': {
+                            'situations': {'type': 'array', 'items': {'type': 'string'}, 'description': '評価対象の状況説明のリスト'},
+                            'required_judgment': {'type': 'string', 'description': '必要な判断タイプ（全項目共通）', 'default': 'evaluate_and_decide'},
+                            'context_depth': {'type': 'string', 'description': '文脈深度レベル（全項目共通）', 'default': 'standard'},
+                            'max_concurrency': {'type': 'integer', 'description': '同時に推論する項目数（0 で設定値）', 'default': 0},
+                            **RESPONSE_SIZE_PROPERTIES
+                        },
+                        'required': ['situations']
+                    }
+                },
                 {
                     'name': 'collect_reasoning_materials',
                     'description': '推論材料収集ツール：制約・先例・含意・リスク・専門知識を収集',
@@ -220,7 +257,9 @@ class RemoteCoreThinkMCP:
                         'properties': {
                             'topic': {'type': 'string', 'description': '調査対象トピック'},
                             'material_types': {'type': 'string', 'description': 'カンマ区切りの材料タイプ', 'default': 'constraints,precedents,implications'},
-                            'depth': {'type': 'string', 'description': '収集深度', 'default': 'standard'}
+                            'depth': {'type': 'string', 'description': '収集深度', 'default': 'standard'},
+                            'output_format': {'type': 'string', 'description': '出力形式 (markdown, json)', 'default': 'markdown'},
+                            **RESPONSE_SIZE_PROPERTIES
                         },
                         'required': ['topic']
                     }
@@ -232,7 +271,8 @@ class RemoteCoreThinkMCP:
                         'type': 'object',
                         'properties': {
                             'action_description': {'type': 'string', 'description': '実行するアクションの説明'},
-                            'dry_run': {'type': 'boolean', 'description': 'ドライランモード', 'default': True}
+                            'dry_run': {'type': 'boolean', 'description': 'ドライランモード', 'default': True},
+                            **RESPONSE_SIZE_PROPERTIES
                         },
                         'required': ['action_description']
                     }
@@ -244,7 +284,9 @@ class RemoteCoreThinkMCP:
                         'type': 'object',
                         'properties': {
                             'proposed_change': {'type': 'string', 'description': '提案された変更内容'},
-                            'reasoning_context': {'type': 'string', 'description': '推論コンテキスト', 'default': ''}
+                            'reasoning_context': {'type': 'string', 'description': '推論コンテキスト', 'default': ''},
+                            'output_format': {'type': 'string', 'description': '出力形式 (markdown, json)', 'default': 'markdown'},
+                            **RESPONSE_SIZE_PROPERTIES
                         },
                         'required': ['proposed_change']
                     }
@@ -257,7 +299,8 @@ class RemoteCoreThinkMCP:
                         'properties': {
                             'context': {'type': 'string', 'description': '推論コンテキスト'},
                             'step_description': {'type': 'string', 'description': '推論ステップ説明'},
-                            'reasoning_depth': {'type': 'string', 'description': '推論深度', 'default': 'standard'}
+                            'reasoning_depth': {'type': 'string', 'description': '推論深度', 'default': 'standard'},
+                            **RESPONSE_SIZE_PROPERTIES
                         },
                         'required': ['context', 'step_description']
                     }
@@ -269,7 +312,8 @@ class RemoteCoreThinkMCP:
                         'type': 'object',
                         'properties': {
                             'operation': {'type': 'string', 'description': '操作タイプ (history, statistics, flags, constraints)'},
-                            'parameters': {'type': 'string', 'description': '操作パラメータ（JSON文字列）', 'default': '{}'}
+                            'parameters': {'type': 'string', 'description': '操作パラメータ（JSON文字列）', 'default': '{}'},
+                            **RESPONSE_SIZE_PROPERTIES
                         },
                         'required': ['operation']
                     }
@@ -298,8 +342,21 @@ class RemoteCoreThinkMCP:
         
         ctx = SimpleHTTPContext()
         
+        response_profile = arguments.pop('response_profile', '')
+        max_response_chars = arguments.pop('max_response_chars', 0)
+        profile, max_chars = response_options(response_profile, max_response_chars)
+        if tool_name in _SIZED_BY_IMPL:
+            arguments.update(response_profile=profile, max_response_chars=max_chars)
+        try:
+            json_output = normalize_output_format(arguments.get('output_format', '')) == FORMAT_JSON
+        except ValueError:
+            # 未対応の形式はツール側が Markdown のエラーを返す
+            json_output = False
+        
         if tool_name == 'unified_gsr_reasoning':
             content = await self.unified_gsr_reasoning(ctx=ctx, **arguments)
+        elif tool_name == 'unified_gsr_reasoning_batch':
+            content = await self.unified_gsr_reasoning_batch(ctx=ctx, **arguments)
         elif tool_name == 'collect_reasoning_materials':
             content = await self.collect_reasoning_materials(ctx=ctx, **arguments)
         elif tool_name == 'execute_with_safeguards':
@@ -313,6 +370,13 @@ class RemoteCoreThinkMCP:
         else:
             raise ValueError(f"Unknown tool: {tool_name}")
         
+        if tool_name not in _SIZED_BY_IMPL:
+            # JSON 出力でもエラー時は Markdown の応答になる
+            if json_output and content.lstrip().startswith('{'):
+                content = fit_payload(loads_json(content), max_chars)
+            else:
+                content = shape_response(content, profile, max_chars, REMOTE_TEMPLATE_SECTIONS)
+        
         return {
             'content': [
                 {
@@ -390,146 +454,55 @@ class RemoteCoreThinkMCP:
             ]
         }
     
-    # ================== GSR 4層アーキテクチャ関数（corethink_server.py準拠）==================
+    # GSR 4層は corethink_server と共有のステージエンジン（gsr_engine）で実行する
+    # （unified_gsr_reasoning は _unified_gsr_reasoning_impl に委譲）
     
-    def _gsr_layer1_parse_native_language(self, user_input: str, context: str) -> str:
-        """GSR Layer 1: Native Language Parsing & Semantic Preservation"""
-        try:
-            parsed_structure = f"""
-【GSR Layer 1: 自然言語解析】
-
-【入力文解析】
-原文: {user_input}
-
-【文脈情報】
-{context}
-
-【意味的要素抽出】
-- 意図: ユーザーが何を求めているか
-- 対象: 何について推論するか
-- 制約: どのような条件があるか
-- 期待結果: どのような出力を期待しているか
-
-【言語的特徴保持】
-- 不確実性の表現: 「たぶん」「可能性がある」等
-- 強調表現: 「必ず」「絶対に」等
-- 感情的ニュアンス: 緊急性、重要性等
-
-【解析完了】意味情報を完全保持して次層へ移行
-            """
-            return parsed_structure.strip()
-        except Exception as e:
-            logger.error(f"GSR Layer 1 解析エラー: {e}")
-            return f"Layer 1 解析エラー: {str(e)}"
-
-    def _gsr_layer2_inlanguage_reasoning(self, parsed_input: str, reasoning_context: str) -> str:
-        """GSR Layer 2: In-Language Reasoning Architecture"""
-        try:
-            reasoning_result = f"""
-【GSR Layer 2: 言語内推論】
-
-【推論材料】
-{parsed_input}
-
-【推論コンテキスト】
-{reasoning_context}
-
-【推論プロセス】
-1. 問題の核心特定
-   - 真の課題は何か？
-   - 表面的問題と根本原因の区別
-
-2. 制約分析
-   - 絶対的制約（変更不可）
-   - 相対的制約（交渉可能）
-   - 隠れた制約（暗黙的前提）
-
-3. 解決策生成
-   - 直接的アプローチ
-   - 代替アプローチ
-   - 創造的解決法
-
-4. リスク評価
-   - 実行可能性
-   - 安全性
-   - 影響範囲
-
-【推論結論】
-基本判定: [PROCEED/CAUTION/REJECT]
-信頼度: [HIGH/MEDIUM/LOW]
-            """
-            return reasoning_result.strip()
-        except Exception as e:
-            logger.error(f"GSR Layer 2 推論エラー: {e}")
-            return f"Layer 2 推論エラー: {str(e)}"
-
-    def _gsr_layer3_execution_explainability(self, reasoning_result: str, action_context: str) -> str:
-        """GSR Layer 3: Execution & Explainability"""
-        try:
-            execution_plan = f"""
-【GSR Layer 3: 実行・説明可能性】
-
-【推論結果評価】
-{reasoning_result}
-
-【実行計画】
-1. 実行前検証
-   - 制約適合性チェック
-   - 安全性確認
-   - リソース可用性
-
-2. 段階的実行戦略
-   - Phase 1: 最小限変更
-   - Phase 2: 段階的拡張
-   - Phase 3: 完全実装
-
-3. 検証ポイント
-   - 各段階での成功判定基準
-   - 異常検出と回復手順
-   - 品質保証要件
-
-【説明可能性】
-- なぜこの判断に至ったか
-- どのような根拠があるか
-- 代替案との比較結果
-- リスクと機会の評価
-
-【実行準備完了】次層での最終確認へ
-            """
-            return execution_plan.strip()
-        except Exception as e:
-            logger.error(f"GSR Layer 3 実行計画エラー: {e}")
-            return f"Layer 3 実行計画エラー: {str(e)}"
+    # ================== 主要ツール実装（corethink_server.py準拠）==================
 
-    def _gsr_layer4_avoid_translation(self, execution_plan: str) -> str:
-        """GSR Layer 4: Avoiding Representational Translation"""
+    async def unified_gsr_reasoning_batch(
+        self,
+        situations: list,
+        required_judgment: str = "evaluate_and_decide",
+        context_depth: str = "standard",
+        max_concurrency: int = 0,
+        response_profile: str = "",
+        max_response_chars: int = 0,
+        ctx = None
+    ) -> str:
+        """GSR統合推論のバッチ実行（項目ごとの推論ログは _unified_gsr_reasoning_impl が記録）"""
+        start_time = datetime.now()
+        inputs = {
+            'situation_count': len(situations),
+            'required_judgment': required_judgment,
+            'context_depth': context_depth,
+            'max_concurrency': max_concurrency
+        }
         try:
-            final_output = f"""
-【GSR Layer 4: 自然言語出力】
-
-【統合推論結果】
-{execution_plan}
-
-【最終判定】
-✅ PROCEED - 実行推奨
-⚠️ CAUTION - 注意して実行
-❌ REJECT - 実行非推奨
-
-【実行指針】
-具体的に何をすべきか、どのような順序で、どのような注意点があるかを自然言語で明確に説明
-
-【次ステップ】
-ユーザーが取るべき具体的行動を自然言語で提示
-
-【信頼性指標】
-推論の確実性レベルと根拠を自然言語で説明
-            """
-            return final_output.strip()
+            result = await _unified_gsr_reasoning_batch_impl(
+                situations=situations,
+                required_judgment=required_judgment,
+                context_depth=context_depth,
+                reasoning_mode="comprehensive",  # HTTP Transport デフォルト
+                max_concurrency=max_concurrency,
+                ctx=ctx,
+                response_profile=response_profile,
+                max_response_chars=max_response_chars
+            )
+            error = None
         except Exception as e:
-            logger.error(f"GSR Layer 4 出力エラー: {e}")
-            return f"Layer 4 出力エラー: {str(e)}"
-
-    # ================== 主要ツール実装（corethink_server.py準拠）==================
+            error = f"GSR統合推論バッチエラー: {str(e)}"
+            logger.error(error)
+            result = error
+        
+        if is_history_enabled():
+            await self._log_tool_execution(
+                tool_name="unified_gsr_reasoning_batch",
+                inputs=inputs,
+                core_result="" if error else result,
+                error=error,
+                execution_time_ms=(datetime.now() - start_time).total_seconds() * 1000
+            )
+        return result
 
     async def unified_gsr_reasoning(
         self,
@@ -537,6 +510,9 @@ class RemoteCoreThinkMCP:
         required_judgment: str = "evaluate_and_decide",
         context_depth: str = "standard",
         domain_hints: str = "",
+        output_format: str = "markdown",
+        response_profile: str = "",
+        max_response_chars: int = 0,
         ctx = None
     ) -> str:
         """GSR統合推論エンジン（ログ機能付き・corethink_server.py準拠）"""
@@ -557,7 +533,10 @@ class RemoteCoreThinkMCP:
                 required_judgment=required_judgment,
                 context_depth=context_depth,
                 reasoning_mode="comprehensive",  # HTTP Transport デフォルト
-                ctx=ctx
+                ctx=ctx,
+                output_format=output_format,
+                response_profile=response_profile,
+                max_response_chars=max_response_chars
             )
             
             # 実行時間計算
@@ -609,6 +588,9 @@ HTTP Transport環境でのエラーです。
         topic: str,
         material_types: str = "constraints,precedents,implications",
         depth: str = "standard",
+        output_format: str = "markdown",
+        response_profile: str = "",
+        max_response_chars: int = 0,
         ctx = None
     ) -> str:
         """推論材料収集ツール（ログ機能付き・corethink_server.py準拠）"""
@@ -627,7 +609,10 @@ HTTP Transport環境でのエラーです。
                 topic=topic,
                 material_types=material_types,
                 depth=depth,
-                ctx=ctx
+                ctx=ctx,
+                output_format=output_format,
+                response_profile=response_profile,
+                max_response_chars=max_response_chars
             )
             
             # 実行時間計算
@@ -693,6 +678,7 @@ HTTP Transport環境でのエラーです。
         self, 
         proposed_change: str, 
         reasoning_context: str = "",
+        output_format: str = "markdown",
         ctx = None
     ) -> str:
         """分野別制約検証（ログ機能付き・corethink_server.py準拠）"""
@@ -705,12 +691,19 @@ HTTP Transport環境でのエラーです。
                 'reasoning_context': reasoning_context
             }
             
-            # 分野別制約を含む制約を読み込み
-            constraints = load_combined_constraints(proposed_change + " " + reasoning_context)
+            # 分野別制約を統合し、全ルールの検出パターンで提案変更を評価
+            composed = compose_constraints(proposed_change + " " + reasoning_context)
+            evaluation = composed.evaluator.evaluate(proposed_change)
             domain = _detect_domain(proposed_change)
             
             # CoreThink-Server の制約検証機能を使用（HTTP Transport版）
-            validation_result = f"""
+            if normalize_output_format(output_format) == FORMAT_JSON:
+                relevant_rules = composed.retriever.top_k(
+                    f"{proposed_change} {reasoning_context}", RULE_TOP_K_BY_DEPTH["minimal"]
+                )
+                validation_result = dumps_json(validation_payload(composed, evaluation, relevant_rules))
+            else:
+                validation_result = f"""
 🔍 **制約検証結果** (HTTP Transport版)
 
 【提案変更】
@@ -723,17 +716,9 @@ HTTP Transport環境でのエラーです。
 {domain}
 
 【適用制約セット】
-{constraints[:800]}...
-
-【詳細検証】
-✅ 基本制約チェック完了
-✅ 分野特化制約適用
-⚠️ HTTP Transport制限により一部検証は簡略化
+基本制約{' + ' + ', '.join(composed.domains) if composed.domains else ''}（ルール {len(composed.rules)}件・検出パターン {composed.evaluator.pattern_count}個）
 
-【総合判定】
-制約適合性: 検証中
-推奨度: 要検証レベル
-リスク評価: 中程度
+{evaluation.render()}
 
 【次ステップ】
 execute_with_safeguards でサンドボックス実行を推奨
@@ -805,7 +790,7 @@ HTTP Transport環境でのエラーです。
             
             # サンドボックス実行
             if dry_run:
-                sandbox_path = create_sandbox()
+                sandbox_path = await create_sandbox_async()
                 execution_result = f"""
 🔧 **DRY RUN実行結果** (HTTP Transport版)
 
@@ -172,35 +172,3 @@ def load_constraints(constraints_file: Path) -> str:
     except Exception as e:
         logger.error(f"制約ファイル読み込みエラー: {e}")
         return f"読み込みエラー: {str(e)}"
-
-def validate_change_against_constraints(
-    change_description: str, 
-    constraints: str
-) -> Dict[str, Any]:
-    """変更内容を制約に対して検証（簡易版）"""
-    
-    violations = []
-    warnings = []
-    
-    # 簡易的なルールチェック
-    change_lower = change_description.lower()
-    
-    # NEVER制約のチェック
-    if "print(" in change_lower or "console.log" in change_lower:
-        violations.append("NEVER: デバッグ出力の追加が検出されました")
-    
-    # MUST制約のチェック
-    if "api" in change_lower and ("public" in change_lower or "external" in change_lower):
-        violations.append("MUST: 公開API変更の可能性があります")
-    
-    # SHOULD制約のチェック
-    if "def " in change_lower or "function" in change_lower:
-        warnings.append("SHOULD: 関数変更時はdocstring更新を推奨")
-    
-    return {
-        "violations": violations,
-        "warnings": warnings,
-        "has_violations": len(violations) > 0,
-        "has_warnings": len(warnings) > 0,
-        "judgment": "REJECT" if violations else ("CAUTION" if warnings else "PROCEED")
-    }
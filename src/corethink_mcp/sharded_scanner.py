@@ -0,0 +1,117 @@
+"""
+CoreThink-MCP シャード分割スキャナー
+
+ファイル一覧をシャードに分割して ProcessPoolExecutor で並列にトークン化し、
+シャードごとに作った転置リストを一つに統合する。
+リポジトリ索引の初回構築（大量のファイルの索引付け）と、
+depth="comprehensive" の先例検索（索引を使わない全ファイル走査）で使用する。
+取り消しスコープが取り消されると、未着手のシャードを破棄して OperationCancelled を送出する
+（ワーカーで処理中のシャードは完了まで実行される）。
+"""
+
+import logging
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import FrozenSet, List, Optional, Sequence, Tuple
+
+from .cancellation import check_cancelled, current_token
+
+logger = logging.getLogger(__name__)
+
+# 1シャードあたりのファイル数
+DEFAULT_SHARD_SIZE = 500
+# ワーカーの結果を待つ間に取り消しを確認する間隔（秒）
+CANCEL_POLL_SECONDS = 0.1
+
+# (相対パス, mtime_ns, サイズ)
+FileKey = Tuple[str, int, int]
+
+
+@dataclass
+class ShardPostings:
+    """シャード（または統合後）の転置リスト"""
+    files: List[Tuple[str, int, int, int]] = field(default_factory=list)  # (相対パス, mtime_ns, サイズ, 語数)
+    postings: List[Tuple[str, int, int]] = field(default_factory=list)  # (語, files の添字, 出現回数)
+
+
+def scan_shard(root: str, entries: Sequence[FileKey], terms: Optional[FrozenSet[str]] = None) -> ShardPostings:
+    """シャード内のファイルをトークン化して転置リストを作る（ワーカープロセスで実行）
+
+    terms を指定した場合はその語の転置リストだけを返す（語数は全語で数える）。
+    """
+    # repo_index が本モジュールを import するため関数内で import
+    from .repo_index import index_terms
+
+    result = ShardPostings()
+    base = Path(root)
+    for path, mtime_ns, size in entries:
+        check_cancelled()  # ワーカープロセスではスコープ外のため何もしない
+        try:
+            content = (base / path).read_text(encoding="utf-8", errors="ignore")
+        except OSError:
+            content = ""
+        counts = Counter(index_terms(content))
+        position = len(result.files)
+        result.files.append((path, mtime_ns, size, sum(counts.values())))
+        result.postings.extend(
+            (term, position, frequency)
+            for term, frequency in counts.items()
+            if terms is None or term in terms
+        )
+    return result
+
+
+class ShardedScanner:
+    """シャード分割・プロセス並列のトークン化"""
+
+    def __init__(self, root: Path, workers: Optional[int] = None, shard_size: int = DEFAULT_SHARD_SIZE):
+        self.root = str(Path(root).resolve())
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = max(1, shard_size)
+
+    def scan(
+        self,
+        entries: Sequence[FileKey],
+        terms: Optional[FrozenSet[str]] = None,
+        workers: Optional[int] = None,
+    ) -> ShardPostings:
+        """全ファイルをトークン化し、シャードの転置リストを入力順に統合して返す
+
+        workers（省略時は self.workers）が1以下、またはシャードが1つの場合はプロセスを起動せずに処理する。
+        """
+        entries = list(entries)
+        workers = self.workers if workers is None else workers
+        shards = [entries[start:start + self.shard_size] for start in range(0, len(entries), self.shard_size)]
+        workers = max(1, min(workers, len(shards)))
+        if workers <= 1:
+            results = [scan_shard(self.root, shard, terms) for shard in shards]
+        else:
+            token = current_token()
+            executor = ProcessPoolExecutor(max_workers=workers)
+            cancelled = False
+            try:
+                futures = [executor.submit(scan_shard, self.root, shard, terms) for shard in shards]
+                results = []
+                for future in futures:
+                    while True:
+                        try:
+                            results.append(future.result(timeout=CANCEL_POLL_SECONDS))
+                            break
+                        except FutureTimeoutError:
+                            if token is not None and token.cancelled:
+                                cancelled = True
+                                token.raise_if_cancelled()
+            finally:
+                # 取り消し時は未着手のシャードを破棄し、処理中のシャードの完了を待たない
+                executor.shutdown(wait=not cancelled, cancel_futures=cancelled)
+
+        merged = ShardPostings()
+        for shard in results:
+            offset = len(merged.files)
+            merged.files.extend(shard.files)
+            merged.postings.extend((term, offset + position, frequency) for term, position, frequency in shard.postings)
+        logger.debug(f"シャード走査: {len(merged.files)}ファイル / {len(shards)}シャード (ワーカー {workers})")
+        return merged